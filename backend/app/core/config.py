@@ -7,9 +7,30 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    # One engine per process; DB_PGBOUNCER disables client-side pooling when PgBouncer
+    # (transaction mode) sits in front of Postgres
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 10.0
+    db_pool_recycle_seconds: int = 1800
+    db_pgbouncer: bool = False
+    # Async engine for endpoints that await the database (default: DATABASE_URL on asyncpg);
+    # it keeps its own pool of the same size
+    async_database_url: str | None = None
 
-    # MongoDB
+    # API threadpool for sync endpoints and dependencies (anyio's default is 40)
+    api_threadpool_size: int = 40
+
+    # MongoDB: one pooled client per process. After MONGO_CIRCUIT_FAILURES consecutive connection
+    # failures it is skipped for MONGO_CIRCUIT_OPEN_SECONDS (reads return empty results, writes fail fast)
     mongo_uri: str
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 0
+    mongo_server_selection_timeout_ms: int = 2000
+    mongo_connect_timeout_ms: int = 2000
+    mongo_socket_timeout_ms: int = 20000
+    mongo_circuit_failures: int = 3
+    mongo_circuit_open_seconds: float = 30.0
 
     # AWS Configuration
     aws_region: str = "us-west-2"
@@ -27,6 +48,10 @@ class Settings(BaseSettings):
     # JWT
     jwt_secret: str = "dev-secret"
     jwt_algorithm: str = "HS256"
+    # How long an authenticated user is reused without a users lookup (0 = always look up)
+    auth_principal_cache_ttl_seconds: float = 60.0
+    # How long a user's owned/assigned home set is reused for access checks (0 = always look up)
+    auth_home_access_cache_ttl_seconds: float = 60.0
 
     # Frontend
     frontend_origin: str = "http://d3fe6gbiiqsn3r.cloudfront.net"
@@ -38,6 +63,105 @@ class Settings(BaseSettings):
     smtp_password: str | None = None
     smtp_use_tls: bool = True
     smtp_from_email: str | None = None
+    smtp_timeout_seconds: float = 10.0
+    smtp_pool_size: int = 2
+
+    # Worker inference batching
+    worker_batch_size: int = 10
+    worker_batch_max_wait_ms: int = 250
+    worker_batch_max_audio_seconds: float = 300.0
+    worker_inference_timeout_seconds: int = 60
+
+    # Worker inference pool (0 processes = one per intra-op thread group of available CPUs)
+    worker_inference_processes: int = 0
+    worker_tf_intra_op_threads: int = 2
+    worker_tf_inter_op_threads: int = 1
+    worker_pin_cpus: bool = False
+    worker_max_pending_batches: int = 0
+
+    # Worker inference engine: "tensorflow" (SavedModel) or "tflite" (quantized, "dynamic" or "int8")
+    worker_inference_engine: str = "tensorflow"
+    worker_tflite_quantization: str = "dynamic"
+    worker_tflite_model_path: str | None = None
+
+    # Worker cold start: pool start method, model warmup and readiness file
+    worker_mp_start_method: str = "forkserver"
+    worker_warmup_clip_seconds: list[float] = [1.0, 5.0, 10.0, 30.0]
+    worker_warmup_timeout_seconds: int = 600
+    worker_ready_file: str = "/tmp/worker-ready"
+
+    # Shared-memory audio handoff to the inference pool (0 slots = one per clip in flight)
+    worker_shm_enabled: bool = True
+    worker_shm_slots: int = 0
+    worker_shm_slot_seconds: float = 30.0
+
+    # Inference result cache keyed by clip content hash + model version
+    worker_model_version: str = "yamnet-1"
+    worker_inference_cache_enabled: bool = True
+    worker_inference_cache_ttl_seconds: int = 7 * 24 * 3600
+    worker_inference_cache_max_entries: int = 10000
+
+    # Streaming windowed inference for long clips
+    worker_stream_enabled: bool = True
+    worker_stream_min_seconds: float = 60.0
+    worker_stream_window_seconds: float = 9.6
+    worker_stream_chunk_bytes: int = 256 * 1024
+
+    # Keep per-frame YAMNet scores and embeddings (float16) per event for re-scoring
+    worker_store_frames: bool = True
+
+    # Worker per-home routing snapshot cache
+    worker_routing_cache_ttl_seconds: float = 30.0
+
+    # Worker alert coalescing: repeat detections of an open alert's type within the window
+    # update that alert instead of creating (and notifying) a new one. Scope is device, room or home.
+    worker_alert_coalesce_seconds: int = 300
+    worker_alert_coalesce_scope: str = "device"
+
+    # Worker SQS polling and acknowledgement batching
+    worker_sqs_max_receivers: int = 4
+    worker_sqs_hot_wait_seconds: int = 1
+    worker_sqs_ack_flush_ms: int = 500
+
+    # Worker SQS visibility heartbeat, retry backoff and dead-lettering
+    worker_sqs_visibility_timeout: int = 60
+    worker_sqs_max_in_flight_seconds: int = 900
+    worker_sqs_retry_base_seconds: int = 10
+    worker_sqs_retry_max_seconds: int = 900
+    worker_sqs_max_receives: int = 5
+    worker_sqs_dead_letter_queue_url: str | None = None
+
+    # Worker notification outbox dispatcher
+    worker_notify_poll_seconds: float = 5.0
+    worker_notify_batch_size: int = 20
+    worker_notify_max_attempts: int = 6
+    worker_notify_retry_base_seconds: int = 30
+    worker_notify_lease_seconds: int = 120
+
+    # Worker Prometheus metrics endpoint (0 = disabled)
+    worker_metrics_port: int = 9100
+    # Worker log level; DEBUG adds a line per job and per batch
+    worker_log_level: str = "INFO"
+
+    # Worker pipeline stages
+    worker_download_threads: int = 8
+    worker_persist_threads: int = 4
+    worker_stage_queue_size: int = 20
+
+    # Worker adaptive concurrency: AIMD on the in-flight job limit and batch size
+    # (0 max in flight = everything the pipeline's queues and threads can hold)
+    worker_autotune_enabled: bool = True
+    worker_target_latency_seconds: float = 30.0
+    worker_autotune_interval_seconds: float = 15.0
+    worker_min_in_flight: int = 10
+    worker_max_in_flight: int = 0
+
+    # Worker silence gate (per-home overrides via the "audio_gate" model config)
+    worker_gate_enabled: bool = True
+    worker_gate_rms_floor_dbfs: float = -55.0
+    worker_gate_peak_floor_dbfs: float = -35.0
+    worker_gate_flux_floor_dbfs: float = -65.0
+    worker_gate_prefix_bytes: int = 0
 
     model_config = SettingsConfigDict(
         env_file=".env",
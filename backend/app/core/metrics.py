@@ -0,0 +1,38 @@
+"""Prometheus metrics shared by the API and the worker; the API serves them on /metrics."""
+from prometheus_client import Counter, Gauge, Histogram
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a Postgres connection from the pool, including opening a new one, by engine (sync/async)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS",
+    ["engine"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pooled Postgres connections by state: checked_out, idle, overflow",
+    ["engine", "state"],
+)
+PRINCIPAL_CACHE_LOOKUPS = Counter(
+    "principal_cache_lookups_total",
+    "get_current_user lookups of the authenticated user, by result: hit (no query) or miss",
+    ["result"],
+)
+HOME_ACCESS_CACHE_LOOKUPS = Counter(
+    "home_access_cache_lookups_total",
+    "Home access checks by result: hit (set lookup, no query) or miss",
+    ["result"],
+)
+MONGO_CIRCUIT_OPEN = Gauge(
+    "mongo_circuit_open",
+    "1 while MongoDB is treated as unreachable and queries are not sent",
+)
+MONGO_DEGRADED_CALLS = Counter(
+    "mongo_degraded_calls_total",
+    "MongoDB calls that failed to connect or were skipped by the open circuit, by operation",
+    ["operation"],
+)
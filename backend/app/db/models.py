@@ -45,6 +45,8 @@ class User(Base):
     experience_level: Mapped[str | None] = mapped_column(Text, nullable=True)
     certifications: Mapped[str | None] = mapped_column(Text, nullable=True)
     profile_picture_url: Mapped[str | None] = mapped_column(Text, nullable=True) # Profile picture S3 URL
+    # Bumped to revoke the user's tokens, which carry it as the "tv" claim
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
@@ -78,6 +80,9 @@ class Home(Base):
         index=True,
     )
     timezone: Mapped[str] = mapped_column(Text, nullable=False)
+    # Bumped by database triggers whenever the home's devices, rooms, model
+    # configs, contacts or policy change; the worker's routing cache keys on it
+    config_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         server_default=func.now(),
@@ -193,7 +198,10 @@ class Alert(Base):
         default="open",
         index=True,
     )  # 'open', 'acked', 'escalated', 'closed'
-    score: Mapped[float | None] = mapped_column(Numeric, nullable=True)
+    score: Mapped[float | None] = mapped_column(Numeric, nullable=True)  # max over coalesced detections
+    # Detections merged into this alert by the worker's coalescing window, and the latest one
+    occurrences: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    last_seen_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         server_default=func.now(),
@@ -211,6 +219,42 @@ class Alert(Base):
     device: Mapped["Device | None"] = relationship("Device", back_populates="alerts")
 
 
+class NotificationOutbox(Base):
+    """A notification waiting to be delivered, written in the same transaction as its alert."""
+
+    __tablename__ = "notification_outbox"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    alert_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("alerts.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    channel: Mapped[str] = mapped_column(String(20), nullable=False)  # 'email'
+    recipient: Mapped[str] = mapped_column(Text, nullable=False)
+    subject: Mapped[str] = mapped_column(Text, nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default="pending",
+    )  # 'pending', 'sent', 'failed'
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+
+
 class Contact(Base):
     """Contact model for emergency contacts."""
 
@@ -1,17 +1,164 @@
 """Database session management."""
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 
 from app.core.config import Settings
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_CONNECTIONS, DB_POOL_TIMEOUTS
+
+# One engine (and connection pool) per process, shared by every session factory
+_engine: Engine | None = None
+_session_factory: sessionmaker | None = None
+_engine_lock = threading.Lock()
+# Async engine for endpoints that await the database; it has its own pool
+_async_engine: AsyncEngine | None = None
+_async_session_factory: async_sessionmaker | None = None
+
+# Async drivers for the sync URL's dialect
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection, including connecting."""
+
+    engine_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(engine=self.engine_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(engine=self.engine_label).observe(time.perf_counter() - start)
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """TimedQueuePool for the async engine."""
+
+    engine_label = "async"
+
+
+def _export_pool_gauges(pool: QueuePool, engine_label: str) -> None:
+    DB_POOL_CONNECTIONS.labels(engine=engine_label, state="checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels(engine=engine_label, state="idle").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels(engine=engine_label, state="overflow").set_function(
+        lambda: max(0, pool.overflow())
+    )
+
+
+def get_engine(settings: Settings) -> Engine:
+    """Create a SQLAlchemy engine with the configured pool.
+
+    With DB_PGBOUNCER, connections are not pooled here (NullPool): PgBouncer
+    in transaction mode already pools them, and holding idle server
+    connections in every process would defeat it.
+    """
+    if settings.db_pgbouncer:
+        return create_engine(settings.database_url, poolclass=NullPool)
+    engine = create_engine(
+        settings.database_url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=True,
+    )
+    _export_pool_gauges(engine.pool, "sync")
+    return engine
+
+
+def init_engine(settings: Settings) -> sessionmaker:
+    """Create this process's engine and session factory, if not created yet."""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is None:
+            _engine = get_engine(settings)
+            _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+        return _session_factory
+
+
+def dispose_engine() -> None:
+    """Close the pooled connections and forget the engine, e.g. at shutdown."""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
+
+
+def get_session_local(settings: Settings) -> sessionmaker:
+    """Return the process-wide SessionLocal factory, creating the engine on first use."""
+    if _session_factory is not None:
+        return _session_factory
+    return init_engine(settings)
+
+
+def get_async_database_url(settings: Settings) -> str:
+    """ASYNC_DATABASE_URL, or DATABASE_URL with its driver swapped for the dialect's async one."""
+    if settings.async_database_url:
+        return settings.async_database_url
+    url = make_url(settings.database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()!r}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_engine(settings: Settings) -> AsyncEngine:
+    """Create an async SQLAlchemy engine with the same pool settings as the sync one.
+
+    With DB_PGBOUNCER, asyncpg's prepared statement cache is turned off as
+    well: in transaction mode consecutive statements may reach different
+    server connections, where the prepared statements do not exist.
+    """
+    url = get_async_database_url(settings)
+    if settings.db_pgbouncer:
+        connect_args = {"statement_cache_size": 0} if make_url(url).get_driver_name() == "asyncpg" else {}
+        return create_async_engine(url, poolclass=NullPool, connect_args=connect_args)
+    engine = create_async_engine(
+        url,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=True,
+    )
+    _export_pool_gauges(engine.sync_engine.pool, "async")
+    return engine
+
 
+def init_async_engine(settings: Settings) -> async_sessionmaker:
+    """Create this process's async engine and AsyncSession factory, if not created yet."""
+    global _async_engine, _async_session_factory
+    with _engine_lock:
+        if _async_engine is None:
+            _async_engine = get_async_engine(settings)
+            # Loaded rows stay readable after commit without another round trip
+            _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+        return _async_session_factory
 
-def get_engine(settings: Settings):
-    """Create and return SQLAlchemy engine."""
-    return create_engine(settings.database_url, pool_pre_ping=True)
 
+async def dispose_async_engine() -> None:
+    """Close the async engine's pooled connections and forget it, e.g. at shutdown."""
+    global _async_engine, _async_session_factory
+    with _engine_lock:
+        engine, _async_engine, _async_session_factory = _async_engine, None, None
+    if engine is not None:
+        await engine.dispose()
 
-def get_session_local(settings: Settings):
-    """Create and return SessionLocal factory."""
-    engine = get_engine(settings)
-    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_session_local(settings: Settings) -> async_sessionmaker:
+    """Return the process-wide AsyncSession factory, creating the async engine on first use."""
+    if _async_session_factory is not None:
+        return _async_session_factory
+    return init_async_engine(settings)
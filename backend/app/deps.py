@@ -1,14 +1,23 @@
 """FastAPI dependencies."""
-from typing import Annotated, Optional
+from typing import Annotated, AsyncIterator, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import Settings
 from app.core.security import decode_token
-from app.db.models import Assignment, Home, User
-from app.db.session import get_session_local
+from app.db.models import User
+from app.db.session import get_async_session_local, get_session_local
+from app.services.home_access_cache import HomeAccess, home_access_cache
+from app.services.principal_cache import principal_cache
+from app.services.events_repository import (
+    AsyncEventsRepository,
+    EventsRepository,
+    get_async_events_repository,
+    get_events_repository,
+)
 
 # Singleton settings instance
 _settings: Settings | None = None
@@ -25,7 +34,7 @@ def get_settings() -> Settings:
 
 
 def get_db(settings: Annotated[Settings, Depends(get_settings)]) -> Session:
-    """Get database session."""
+    """Get a database session from the process-wide engine's pool."""
     SessionLocal = get_session_local(settings)
     db = SessionLocal()
     try:
@@ -34,28 +43,47 @@ def get_db(settings: Annotated[Settings, Depends(get_settings)]) -> Session:
         db.close()
 
 
+async def get_async_db(settings: Annotated[Settings, Depends(get_settings)]) -> AsyncIterator[AsyncSession]:
+    """Get an AsyncSession from the process-wide async engine's pool, for async endpoints."""
+    AsyncSessionLocal = get_async_session_local(settings)
+    async with AsyncSessionLocal() as adb:
+        yield adb
+
+
+def get_events_repo(settings: Annotated[Settings, Depends(get_settings)]) -> EventsRepository:
+    """Get the process-wide EventsRepository and its pooled MongoClient."""
+    return get_events_repository(settings)
+
+
+def get_async_events_repo(settings: Annotated[Settings, Depends(get_settings)]) -> AsyncEventsRepository:
+    """Get the process-wide AsyncEventsRepository, for async endpoints."""
+    return get_async_events_repository(settings)
+
+
 def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: Annotated[Session, Depends(get_db)],
     settings: Annotated[Settings, Depends(get_settings)],
 ) -> User:
-    """Get the current authenticated user from JWT token."""
+    """Get the current authenticated user from JWT token.
+
+    The user comes from principal_cache, so most requests make no users query.
+    """
+    from uuid import UUID
+
     token = credentials.credentials
     try:
         payload = decode_token(token, settings)
-        user_id: str = payload.get("user_id")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-            )
+        user_id = UUID(payload["user_id"])
+        # Tokens issued before token versions existed are version 0
+        token_version = int(payload.get("tv", 0))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = principal_cache.get(db, user_id, token_version, settings.auth_principal_cache_ttl_seconds)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,50 +108,50 @@ def require_role(*allowed_roles: str):
     return role_checker
 
 
+def _check_home_access(current_user: User, access: HomeAccess, home_id: Optional[str]) -> Optional[str]:
+    """The home to act on: home_id if the user may access it (else 403), or their default home."""
+    from uuid import UUID
+
+    if not home_id:
+        # Owners default to their first home, technicians/staff to their first assignment
+        default_home_id = access.default_home_id
+        return str(default_home_id) if default_home_id else None
+    try:
+        home_uuid = UUID(home_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid home_id format")
+    if home_uuid not in access:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this home")
+    return home_id
+
+
 def get_user_home_access(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
     home_id: Optional[str] = None,
 ) -> tuple[User, Optional[str]]:
-    """Get user and validate home access."""
-    from uuid import UUID
+    """Get user and validate home access.
 
+    The user's owned or assigned homes come from home_access_cache, so the
+    check is usually a set lookup with no query.
+    """
     if current_user.role == "admin":
         return current_user, home_id
 
-    if current_user.role == "owner":
-        if home_id:
-            try:
-                home_uuid = UUID(home_id)
-            except ValueError:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid home_id format")
-            home = db.query(Home).filter(Home.id == home_uuid, Home.owner_id == current_user.id).first()
-            if not home:
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this home")
-        else:
-            # Get first owned home
-            home = db.query(Home).filter(Home.owner_id == current_user.id).first()
-            if home:
-                home_id = str(home.id)
-        return current_user, home_id
+    access = home_access_cache.get(db, current_user, get_settings().auth_home_access_cache_ttl_seconds)
+    return current_user, _check_home_access(current_user, access, home_id)
 
-    # For technician/staff, check assignments
-    if home_id:
-        try:
-            home_uuid = UUID(home_id)
-        except ValueError:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid home_id format")
-        assignment = (
-            db.query(Assignment)
-            .filter(Assignment.user_id == current_user.id, Assignment.home_id == home_uuid)
-            .first()
-        )
-        if not assignment:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this home")
-    else:
-        assignment = db.query(Assignment).filter(Assignment.user_id == current_user.id).first()
-        if assignment:
-            home_id = str(assignment.home_id)
 
-    return current_user, home_id
+async def get_user_home_access_async(
+    current_user: User,
+    adb: AsyncSession,
+    home_id: Optional[str] = None,
+) -> tuple[User, Optional[str]]:
+    """get_user_home_access on an AsyncSession."""
+    if current_user.role == "admin":
+        return current_user, home_id
 
+    access = await home_access_cache.get_async(
+        adb, current_user, get_settings().auth_home_access_cache_ttl_seconds
+    )
+    return current_user, _check_home_access(current_user, access, home_id)
@@ -1,8 +1,14 @@
 """FastAPI application entry point."""
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.core.config import Settings
+from app.db.session import dispose_async_engine, dispose_engine, init_async_engine, init_engine
 from app.deps import get_settings
 from app.routers import (
     admin,
@@ -22,14 +28,38 @@ from app.routers import (
     users,
     ws,
 )
+from app.services.events_repository import (
+    MongoUnavailableError,
+    close_async_events_repository,
+    close_events_repository,
+    init_events_repository,
+)
 
 
 def create_app(settings: Settings) -> FastAPI:
     """Create and configure FastAPI application."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # One engine and connection pool for the whole process, shared by every request;
+        # async endpoints get their own async engine and pool
+        init_engine(settings)
+        init_async_engine(settings)
+        # One pooled MongoClient; it connects in the background, so startup does not wait on MongoDB
+        init_events_repository(settings)
+        # Sync endpoints and dependencies run in this threadpool, off the event loop
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.api_threadpool_size
+        yield
+        await close_async_events_repository()
+        close_events_repository()
+        await dispose_async_engine()
+        dispose_engine()
+
     app = FastAPI(
         title="Smart Home Cloud Platform API",
         description="Backend API for Smart Home Cloud Platform",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     # CORS middleware
@@ -59,11 +89,21 @@ def create_app(settings: Settings) -> FastAPI:
     app.include_router(admin.router)
     app.include_router(ws.router)
 
+    @app.exception_handler(MongoUnavailableError)
+    async def mongo_unavailable_handler(request: Request, exc: MongoUnavailableError):
+        """Writes that need MongoDB fail fast with 503 while it is unreachable."""
+        return JSONResponse(status_code=503, content={"detail": "Event storage is temporarily unavailable"})
+
     @app.get("/healthz")
     async def health_check():
         """Health check endpoint."""
         return {"status": "ok"}
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics, including database pool checkout waits."""
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
     return app
 
 
@@ -5,12 +5,13 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app.core.config import Settings
-from app.deps import get_current_user, get_db, get_settings, require_role
+from app.deps import get_current_user, get_db, get_events_repo, require_role
 from app.db.models import User
 from app.schemas.homes import HomeCreate, HomeResponse, HomeUpdate
 from app.schemas.users import UserCreate, UserResponse, UserUpdate
 from app.services.admin_analytics_service import get_admin_overview
+from app.services.events_repository import EventsRepository
+from app.services.home_access_cache import home_access_cache
 from app.services.home_service import create_home, delete_home, get_home, list_homes, update_home
 from app.services.user_service import create_user, delete_user, get_user, list_users, update_user
 
@@ -18,17 +19,17 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 @router.get("/overview")
-async def admin_overview_endpoint(
+def admin_overview_endpoint(
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
-    settings: Annotated[Settings, Depends(get_settings)] = None,
+    events_repo: Annotated[EventsRepository, Depends(get_events_repo)] = None,
 ):
     """Get admin overview statistics for entire platform."""
-    return get_admin_overview(db, settings)
+    return get_admin_overview(db, events_repo)
 
 
 @router.get("/users", response_model=list[UserResponse])
-async def list_users_endpoint(
+def list_users_endpoint(
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
 ):
@@ -64,7 +65,7 @@ async def list_users_endpoint(
 
 
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user_endpoint(
+def create_user_endpoint(
     user_data: UserCreate,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -123,7 +124,7 @@ async def create_user_endpoint(
 
 
 @router.patch("/users/{user_id}", response_model=UserResponse)
-async def update_user_endpoint(
+def update_user_endpoint(
     user_id: UUID,
     user_data: UserUpdate,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
@@ -181,7 +182,7 @@ async def update_user_endpoint(
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user_endpoint(
+def delete_user_endpoint(
     user_id: UUID,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -192,7 +193,7 @@ async def delete_user_endpoint(
 
 
 @router.get("/homes")
-async def list_homes_endpoint(
+def list_homes_endpoint(
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
 ):
@@ -236,7 +237,7 @@ async def list_homes_endpoint(
 
 
 @router.get("/assignments")
-async def list_assignments_admin_endpoint(
+def list_assignments_admin_endpoint(
     technician_id: Annotated[Optional[UUID], Query()] = None,
     home_id: Annotated[Optional[UUID], Query()] = None,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
@@ -291,7 +292,7 @@ async def list_assignments_admin_endpoint(
 
 
 @router.post("/assignments", status_code=status.HTTP_201_CREATED)
-async def create_assignment_admin_endpoint(
+def create_assignment_admin_endpoint(
     payload: dict,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -335,6 +336,7 @@ async def create_assignment_admin_endpoint(
         assignment = Assignment(user_id=user_id, home_id=home_id, role=role)
         db.add(assignment)
         db.commit()
+        home_access_cache.invalidate(user_id)
         db.refresh(assignment)
 
     from app.db.models import Device, Alert
@@ -364,7 +366,7 @@ async def create_assignment_admin_endpoint(
 
 
 @router.delete("/assignments/{assignment_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_assignment_admin_endpoint(
+def delete_assignment_admin_endpoint(
     assignment_id: UUID,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -376,13 +378,15 @@ async def delete_assignment_admin_endpoint(
     if not assignment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignment not found")
 
+    user_id = assignment.user_id
     db.delete(assignment)
     db.commit()
+    home_access_cache.invalidate(user_id)
     return None
 
 
 @router.post("/homes", response_model=HomeResponse, status_code=status.HTTP_201_CREATED)
-async def create_home_endpoint(
+def create_home_endpoint(
     home_data: HomeCreate,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -404,7 +408,7 @@ async def create_home_endpoint(
 
 
 @router.patch("/homes/{home_id}", response_model=HomeResponse)
-async def update_home_endpoint(
+def update_home_endpoint(
     home_id: UUID,
     home_data: HomeUpdate,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
@@ -426,7 +430,7 @@ async def update_home_endpoint(
 
 
 @router.delete("/homes/{home_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_home_endpoint(
+def delete_home_endpoint(
     home_id: UUID,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -437,7 +441,7 @@ async def delete_home_endpoint(
 
 
 @router.get("/alerts")
-async def list_all_alerts_endpoint(
+def list_all_alerts_endpoint(
     status: Annotated[Optional[str], Query()] = None,
     severity: Annotated[Optional[str], Query()] = None,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
@@ -482,7 +486,7 @@ async def list_all_alerts_endpoint(
 
 
 @router.get("/devices")
-async def list_all_devices_endpoint(
+def list_all_devices_endpoint(
     status: Annotated[Optional[str], Query()] = None,
     device_type: Annotated[Optional[str], Query()] = None,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
@@ -521,7 +525,7 @@ async def list_all_devices_endpoint(
 
 
 @router.get("/models")
-async def list_all_models_endpoint(
+def list_all_models_endpoint(
     enabled: Annotated[Optional[bool], Query()] = None,
     current_user: Annotated[User, Depends(require_role("admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -597,7 +601,7 @@ async def list_all_models_endpoint(
 
 
 @router.get("/audit")
-async def list_audit_logs_endpoint(
+def list_audit_logs_endpoint(
     user: Annotated[Optional[str], Query()] = None,
     action: Annotated[Optional[str], Query()] = None,
     start_date: Annotated[Optional[str], Query()] = None,
@@ -3,12 +3,20 @@ from typing import Annotated, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.deps import get_current_user, get_db, get_user_home_access
+from app.deps import get_async_db, get_current_user, get_db, get_user_home_access, get_user_home_access_async
 from app.db.models import User
 from app.schemas.alerts import AlertResponse
-from app.services.alert_service import ack_alert, close_alert, escalate_alert, get_alert, list_alerts
+from app.services.alert_service import (
+    ack_alert,
+    close_alert,
+    escalate_alert,
+    get_alert,
+    get_alert_async,
+    list_alerts_async,
+)
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
@@ -18,14 +26,14 @@ async def list_alerts_endpoint(
     home_id: Annotated[UUID, Query()],
     status: Annotated[Optional[str], Query()] = None,
     current_user: Annotated[User, Depends(get_current_user)] = None,
-    db: Annotated[Session, Depends(get_db)] = None,
+    adb: Annotated[AsyncSession, Depends(get_async_db)] = None,
 ):
     """List alerts for a home."""
-    _, validated_home_id = get_user_home_access(current_user, db, str(home_id))
+    _, validated_home_id = await get_user_home_access_async(current_user, adb, str(home_id))
     if not validated_home_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No home access")
 
-    alerts = list_alerts(db, UUID(validated_home_id), status)
+    alerts = await list_alerts_async(adb, UUID(validated_home_id), status)
     return alerts
 
 
@@ -33,15 +41,15 @@ async def list_alerts_endpoint(
 async def get_alert_endpoint(
     alert_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
-    db: Annotated[Session, Depends(get_db)] = None,
+    adb: Annotated[AsyncSession, Depends(get_async_db)] = None,
 ):
     """Get an alert by ID."""
-    alert = get_alert(db, alert_id)
+    alert = await get_alert_async(adb, alert_id)
     if not alert:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alert not found")
 
     # Validate home access
-    _, validated_home_id = get_user_home_access(current_user, db, str(alert.home_id))
+    _, validated_home_id = await get_user_home_access_async(current_user, adb, str(alert.home_id))
     if not validated_home_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
 
@@ -49,7 +57,7 @@ async def get_alert_endpoint(
 
 
 @router.post("/{alert_id}/ack", response_model=AlertResponse)
-async def ack_alert_endpoint(
+def ack_alert_endpoint(
     alert_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -69,7 +77,7 @@ async def ack_alert_endpoint(
 
 
 @router.post("/{alert_id}/escalate", response_model=AlertResponse)
-async def escalate_alert_endpoint(
+def escalate_alert_endpoint(
     alert_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -89,7 +97,7 @@ async def escalate_alert_endpoint(
 
 
 @router.post("/{alert_id}/close", response_model=AlertResponse)
-async def close_alert_endpoint(
+def close_alert_endpoint(
     alert_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/assignments", tags=["assignments"])
 
 
 @router.get("")
-async def list_assignments_endpoint(
+def list_assignments_endpoint(
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
 ):
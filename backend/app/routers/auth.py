@@ -14,7 +14,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(
+def login(
     login_data: LoginRequest,
     db: Annotated[Session, Depends(get_db)],
     settings: Annotated[Settings, Depends(get_settings)],
@@ -42,7 +42,7 @@ async def login(
 
 
 @router.post("/register", response_model=UserResponse)
-async def register(
+def register(
     register_data: RegisterRequest,
     db: Annotated[Session, Depends(get_db)],
 ):
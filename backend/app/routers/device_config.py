@@ -17,7 +17,7 @@ router = APIRouter(prefix="/device-config", tags=["device-config"])
 
 
 @router.get("/{device_id}", response_model=DeviceConfigResponse)
-async def get_device_config_endpoint(
+def get_device_config_endpoint(
     device_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -47,7 +47,7 @@ async def get_device_config_endpoint(
 
 
 @router.patch("/{device_id}", response_model=DeviceConfigResponse)
-async def update_device_config_endpoint(
+def update_device_config_endpoint(
     device_id: UUID,
     config_data: DeviceConfigUpdate,
     current_user: Annotated[User, Depends(get_current_user)] = None,
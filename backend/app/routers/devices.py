@@ -22,7 +22,7 @@ router = APIRouter(prefix="/devices", tags=["devices"])
 
 
 @router.get("", response_model=list[DeviceResponse])
-async def list_devices_endpoint(
+def list_devices_endpoint(
     home_id: Annotated[UUID, Query()],
     room_id: Annotated[Optional[UUID], Query()] = None,
     status: Annotated[Optional[str], Query()] = None,
@@ -54,7 +54,7 @@ async def list_devices_endpoint(
 
 
 @router.post("", response_model=DeviceResponse, status_code=status.HTTP_201_CREATED)
-async def create_device_endpoint(
+def create_device_endpoint(
     device_data: DeviceCreate,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -86,7 +86,7 @@ async def create_device_endpoint(
 
 
 @router.get("/{device_id}", response_model=DeviceResponse)
-async def get_device_endpoint(
+def get_device_endpoint(
     device_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -120,7 +120,7 @@ async def get_device_endpoint(
 
 
 @router.patch("/{device_id}", response_model=DeviceResponse)
-async def update_device_endpoint(
+def update_device_endpoint(
     device_id: UUID,
     device_data: DeviceUpdate,
     current_user: Annotated[User, Depends(get_current_user)] = None,
@@ -156,7 +156,7 @@ async def update_device_endpoint(
 
 
 @router.delete("/{device_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_device_endpoint(
+def delete_device_endpoint(
     device_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -175,7 +175,7 @@ async def delete_device_endpoint(
 
 
 @router.post("/{device_id}/heartbeat", response_model=DeviceResponse)
-async def heartbeat_device_endpoint(
+def heartbeat_device_endpoint(
     device_id: UUID,
     heartbeat_data: DeviceHeartbeatRequest,
     current_user: Annotated[User, Depends(get_current_user)] = None,
@@ -220,7 +220,7 @@ async def heartbeat_device_endpoint(
 
 
 @router.post("/{device_id}/disable", response_model=DeviceResponse)
-async def disable_device_endpoint(
+def disable_device_endpoint(
     device_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -275,7 +275,7 @@ async def disable_device_endpoint(
 
 
 @router.post("/{device_id}/enable", response_model=DeviceResponse)
-async def enable_device_endpoint(
+def enable_device_endpoint(
     device_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
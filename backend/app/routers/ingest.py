@@ -5,26 +5,17 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.config import Settings
-from app.deps import get_current_user, get_db, get_settings
+from app.deps import get_current_user, get_db, get_events_repo, get_settings
 from app.db.models import User
 from app.schemas.ingest import ConfirmUploadRequest, ConfirmUploadResponse, PresignRequest, PresignResponse
-from app.services.ingestion_service import (
-    EventsRepository,
-    confirm_upload,
-    create_presigned_url,
-    insert_pending_event,
-)
+from app.services.events_repository import EventsRepository
+from app.services.ingestion_service import confirm_upload, create_presigned_url, insert_pending_event
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
 
 
-def get_events_repo(settings: Annotated[Settings, Depends(get_settings)]) -> EventsRepository:
-    """Get EventsRepository instance."""
-    return EventsRepository(settings.mongo_uri)
-
-
 @router.post("", response_model=PresignResponse)
-async def presign_upload(
+def presign_upload(
     request: PresignRequest,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     settings: Annotated[Settings, Depends(get_settings)] = None,
@@ -44,7 +35,7 @@ async def presign_upload(
 
 
 @router.post("/confirm", response_model=ConfirmUploadResponse)
-async def confirm_upload_endpoint(
+def confirm_upload_endpoint(
     request: ConfirmUploadRequest,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     settings: Annotated[Settings, Depends(get_settings)] = None,
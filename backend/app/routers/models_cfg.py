@@ -14,7 +14,7 @@ router = APIRouter(prefix="/model-config", tags=["models"])
 
 
 @router.get("", response_model=list[ModelConfigResponse])
-async def list_model_configs_endpoint(
+def list_model_configs_endpoint(
     home_id: Annotated[UUID, Query()],
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -29,7 +29,7 @@ async def list_model_configs_endpoint(
 
 
 @router.patch("/{model_key}", response_model=ModelConfigResponse)
-async def update_model_config_endpoint(
+def update_model_config_endpoint(
     model_key: str,
     config_data: ModelConfigUpdate,
     home_id: Annotated[UUID, Query()],
@@ -5,29 +5,29 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.core.config import Settings
-from app.deps import get_current_user, get_db, get_settings, require_role
+from app.deps import get_current_user, get_db, get_events_repo, require_role
 from app.db.models import User
 from app.schemas.analytics import AlertsHeatmapResponse, OpsOverviewResponse
 from app.services.admin_analytics_service import get_admin_overview
 from app.services.alerts_heatmap_service import get_alerts_heatmap
+from app.services.events_repository import EventsRepository
 from app.services.ops_service import get_ops_overview, list_ops_homes
 
 router = APIRouter(prefix="/ops", tags=["ops"])
 
 
 @router.get("/overview", response_model=OpsOverviewResponse)
-async def ops_overview_endpoint(
+def ops_overview_endpoint(
     current_user: Annotated[User, Depends(require_role("staff", "admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
-    settings: Annotated[Settings, Depends(get_settings)] = None,
+    events_repo: Annotated[EventsRepository, Depends(get_events_repo)] = None,
 ):
     """Get operations overview (staff/admin only)."""
-    return get_ops_overview(db, settings)
+    return get_ops_overview(db, events_repo)
 
 
 @router.get("/houses")
-async def list_ops_houses_endpoint(
+def list_ops_houses_endpoint(
     current_user: Annotated[User, Depends(require_role("staff", "admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
 ):
@@ -36,7 +36,7 @@ async def list_ops_houses_endpoint(
 
 
 @router.get("/alerts/heatmap", response_model=AlertsHeatmapResponse)
-async def alerts_heatmap_endpoint(
+def alerts_heatmap_endpoint(
     period: Annotated[str, Query(description="Time period: '24h' or '7d'")] = "24h",
     current_user: Annotated[User, Depends(require_role("staff", "admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -50,7 +50,7 @@ async def alerts_heatmap_endpoint(
 
 
 @router.get("/audit")
-async def list_audit_logs_endpoint(
+def list_audit_logs_endpoint(
     user: Annotated[Optional[str], Query()] = None,
     action: Annotated[Optional[str], Query()] = None,
     start_date: Annotated[Optional[str], Query()] = None,
@@ -3,10 +3,17 @@ from typing import Annotated, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.config import Settings
-from app.deps import get_current_user, get_db, get_settings, require_role
+from app.deps import (
+    get_async_db,
+    get_async_events_repo,
+    get_current_user,
+    get_db,
+    get_user_home_access_async,
+    require_role,
+)
 from app.db.models import User
 from app.schemas.analytics import OwnerOverviewResponse
 from app.schemas.installation_requests import (
@@ -15,64 +22,45 @@ from app.schemas.installation_requests import (
     OwnerInstallationStatusUpdate,
 )
 from app.schemas.rooms import RoomCreate, RoomResponse, RoomUpdate
+from app.services.events_repository import AsyncEventsRepository
 from app.services.owner_analytics_service import get_owner_overview
 
 router = APIRouter(prefix="/owner", tags=["owner"])
 
 
-@router.get("/overview", response_model=OwnerOverviewResponse)
-async def owner_overview_endpoint(
-    home_id: Annotated[Optional[str], Query()] = None,
-    current_user: Annotated[User, Depends(require_role("owner", "admin"))] = None,
-    db: Annotated[Session, Depends(get_db)] = None,
-    settings: Annotated[Settings, Depends(get_settings)] = None,
-):
-    """Get owner overview statistics for a specific home."""
-    from app.db.models import Home
-    
-    # Get home_id from query param or user's first home
-    home_uuid: Optional[UUID] = None
-    
-    if home_id:
-        try:
-            home_uuid = UUID(home_id)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid home_id format",
-            )
-    else:
-        # Get user's first home
-        if current_user.role == "owner":
-            home = db.query(Home).filter(Home.owner_id == current_user.id).first()
-            if not home:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No home found for this user",
-                )
-            home_uuid = home.id
-        else:  # admin
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="home_id is required for admin users",
-            )
+async def _resolve_home_async(adb: AsyncSession, current_user: User, home_id: Optional[str]) -> UUID:
+    """Resolve the home to report on (query param or the owner's first home) and verify access."""
+    if not home_id and current_user.role != "owner":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="home_id is required for admin users",
+        )
 
-    if not home_uuid:
+    _, validated_home_id = await get_user_home_access_async(current_user, adb, home_id)
+    if not validated_home_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No home found for this user",
+        )
+    try:
+        return UUID(validated_home_id)
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="home_id is required",
+            detail="Invalid home_id format",
         )
 
-    # Verify access
-    if current_user.role == "owner":
-        home = db.query(Home).filter(Home.id == home_uuid, Home.owner_id == current_user.id).first()
-        if not home:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to this home",
-            )
 
-    return get_owner_overview(db, settings, home_uuid)
+@router.get("/overview", response_model=OwnerOverviewResponse)
+async def owner_overview_endpoint(
+    home_id: Annotated[Optional[str], Query()] = None,
+    current_user: Annotated[User, Depends(require_role("owner", "admin"))] = None,
+    adb: Annotated[AsyncSession, Depends(get_async_db)] = None,
+    events_repo: Annotated[AsyncEventsRepository, Depends(get_async_events_repo)] = None,
+):
+    """Get owner overview statistics for a specific home."""
+    home_uuid = await _resolve_home_async(adb, current_user, home_id)
+    return await get_owner_overview(adb, events_repo, home_uuid)
 
 
 @router.get("/events/timeseries")
@@ -80,62 +68,18 @@ async def owner_events_timeseries_endpoint(
     home_id: Annotated[Optional[str], Query()] = None,
     hours: Annotated[int, Query(description="Number of hours to look back", ge=1, le=168)] = 24,
     current_user: Annotated[User, Depends(require_role("owner", "admin"))] = None,
-    db: Annotated[Session, Depends(get_db)] = None,
-    settings: Annotated[Settings, Depends(get_settings)] = None,
+    adb: Annotated[AsyncSession, Depends(get_async_db)] = None,
+    events_repo: Annotated[AsyncEventsRepository, Depends(get_async_events_repo)] = None,
 ):
     """Get events time-series data for a home."""
-    from app.db.models import Home
-    from app.services.events_repository import EventsRepository
-    
-    # Get home_id from query param or user's first home
-    home_uuid: Optional[UUID] = None
-    
-    if home_id:
-        try:
-            home_uuid = UUID(home_id)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid home_id format",
-            )
-    else:
-        if current_user.role == "owner":
-            home = db.query(Home).filter(Home.owner_id == current_user.id).first()
-            if not home:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No home found for this user",
-                )
-            home_uuid = home.id
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="home_id is required for admin users",
-            )
-
-    if not home_uuid:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="home_id is required",
-        )
-
-    # Verify access
-    if current_user.role == "owner":
-        home = db.query(Home).filter(Home.id == home_uuid, Home.owner_id == current_user.id).first()
-        if not home:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to this home",
-            )
+    home_uuid = await _resolve_home_async(adb, current_user, home_id)
+    events_data = await events_repo.get_events_by_hour_last_24h(home_uuid)
 
-    events_repo = EventsRepository(settings.mongo_uri)
-    events_data = events_repo.get_events_by_hour_last_24h(home_uuid)
-    
     return {"data": events_data}
 
 
 @router.get("/rooms", response_model=list[RoomResponse])
-async def list_owner_rooms_endpoint(
+def list_owner_rooms_endpoint(
     current_user: Annotated[User, Depends(require_role("owner"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
 ):
@@ -156,7 +100,7 @@ async def list_owner_rooms_endpoint(
 
 
 @router.post("/rooms", response_model=RoomResponse, status_code=status.HTTP_201_CREATED)
-async def create_owner_room_endpoint(
+def create_owner_room_endpoint(
     room_data: RoomCreate,
     current_user: Annotated[User, Depends(require_role("owner"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -178,7 +122,7 @@ async def create_owner_room_endpoint(
 
 
 @router.patch("/rooms/{room_id}", response_model=RoomResponse)
-async def update_owner_room_endpoint(
+def update_owner_room_endpoint(
     room_id: UUID,
     room_data: RoomUpdate,
     current_user: Annotated[User, Depends(require_role("owner"))] = None,
@@ -212,7 +156,7 @@ async def update_owner_room_endpoint(
 
 
 @router.delete("/rooms/{room_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_owner_room_endpoint(
+def delete_owner_room_endpoint(
     room_id: UUID,
     current_user: Annotated[User, Depends(require_role("owner"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -240,7 +184,7 @@ async def delete_owner_room_endpoint(
 
 
 @router.post("/installation-requests", response_model=InstallationRequestResponse, status_code=status.HTTP_201_CREATED)
-async def create_installation_request_endpoint(
+def create_installation_request_endpoint(
     payload: InstallationRequestCreate,
     current_user: Annotated[User, Depends(require_role("owner"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -335,7 +279,7 @@ async def create_installation_request_endpoint(
 
 
 @router.get("/installation-requests", response_model=list[InstallationRequestResponse])
-async def list_owner_installation_requests_endpoint(
+def list_owner_installation_requests_endpoint(
     current_user: Annotated[User, Depends(require_role("owner"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
 ):
@@ -391,7 +335,7 @@ async def list_owner_installation_requests_endpoint(
 
 
 @router.patch("/installation-requests/{request_id}", response_model=InstallationRequestResponse)
-async def owner_update_installation_request_status_endpoint(
+def owner_update_installation_request_status_endpoint(
     request_id: UUID,
     payload: OwnerInstallationStatusUpdate,
     current_user: Annotated[User, Depends(require_role("owner"))] = None,
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/profile", tags=["profile"])
 
 
 @router.get("", response_model=UserResponse)
-async def get_profile(
+def get_profile(
     current_user: Annotated[dict, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
 ):
@@ -24,7 +24,7 @@ async def get_profile(
 
 
 @router.patch("", response_model=UserResponse)
-async def update_profile(
+def update_profile(
     profile_data: ProfileUpdateRequest,
     current_user: Annotated[dict, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
@@ -35,7 +35,7 @@ async def update_profile(
 
 
 @router.post("/picture", response_model=ProfilePictureUploadResponse)
-async def get_profile_picture_upload_url(
+def get_profile_picture_upload_url(
     current_user: Annotated[dict, Depends(get_current_user)],
     settings: Annotated[Settings, Depends(get_settings)],
 ):
@@ -47,7 +47,7 @@ async def get_profile_picture_upload_url(
 
 
 @router.post("/picture/confirm", response_model=UserResponse)
-async def confirm_profile_picture(
+def confirm_profile_picture(
     picture_key: str,
     current_user: Annotated[dict, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
@@ -61,7 +61,7 @@ async def confirm_profile_picture(
 
 
 @router.delete("/picture", response_model=UserResponse)
-async def delete_profile_picture(
+def delete_profile_picture(
     current_user: Annotated[dict, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
     settings: Annotated[Settings, Depends(get_settings)],
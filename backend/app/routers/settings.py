@@ -20,7 +20,7 @@ router = APIRouter(prefix="/settings", tags=["settings"])
 
 
 @router.get("/contacts", response_model=list[ContactResponse])
-async def list_contacts_endpoint(
+def list_contacts_endpoint(
     home_id: Annotated[UUID, Query()],
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -35,7 +35,7 @@ async def list_contacts_endpoint(
 
 
 @router.post("/contacts", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
-async def create_contact_endpoint(
+def create_contact_endpoint(
     contact_data: ContactCreate,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -51,7 +51,7 @@ async def create_contact_endpoint(
 
 
 @router.delete("/contacts/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_contact_endpoint(
+def delete_contact_endpoint(
     contact_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -72,7 +72,7 @@ async def delete_contact_endpoint(
 
 
 @router.get("/policies", response_model=PolicyResponse)
-async def get_policy_endpoint(
+def get_policy_endpoint(
     home_id: Annotated[UUID, Query()],
     current_user: Annotated[User, Depends(get_current_user)] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -90,7 +90,7 @@ async def get_policy_endpoint(
 
 
 @router.patch("/policies/{home_id}", response_model=PolicyResponse)
-async def update_policy_endpoint(
+def update_policy_endpoint(
     home_id: UUID,
     policy_data: PolicyUpdate,
     current_user: Annotated[User, Depends(get_current_user)] = None,
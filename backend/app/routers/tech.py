@@ -5,31 +5,31 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app.core.config import Settings
-from app.deps import get_db, get_settings, require_role
+from app.deps import get_db, get_events_repo, require_role
 from app.db.models import User
 from app.schemas.installation_requests import (
     InstallationRequestResponse,
     TechInstallationUpdate,
     TechInstallationItemUpdate,
 )
+from app.services.events_repository import EventsRepository
 from app.services.tech_analytics_service import get_tech_overview
 
 router = APIRouter(prefix="/tech", tags=["tech"])
 
 
 @router.get("/overview")
-async def tech_overview_endpoint(
+def tech_overview_endpoint(
     current_user: Annotated[User, Depends(require_role("technician", "admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
-    settings: Annotated[Settings, Depends(get_settings)] = None,
+    events_repo: Annotated[EventsRepository, Depends(get_events_repo)] = None,
 ):
     """Get technician overview statistics for assigned homes."""
-    return get_tech_overview(db, settings, current_user.id)
+    return get_tech_overview(db, events_repo, current_user.id)
 
 
 @router.get("/installation-requests", response_model=list[InstallationRequestResponse])
-async def list_tech_installation_requests_endpoint(
+def list_tech_installation_requests_endpoint(
     status_filter: Annotated[Optional[str], Query(alias="status")] = None,
     current_user: Annotated[User, Depends(require_role("technician", "admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -101,7 +101,7 @@ async def list_tech_installation_requests_endpoint(
     "/installation-requests/{request_id}",
     response_model=InstallationRequestResponse,
 )
-async def update_tech_installation_request_endpoint(
+def update_tech_installation_request_endpoint(
     request_id: UUID,
     payload: TechInstallationUpdate,
     current_user: Annotated[User, Depends(require_role("technician", "admin"))] = None,
@@ -174,7 +174,7 @@ async def update_tech_installation_request_endpoint(
     "/installation-requests/{request_id}/items/{item_id}",
     response_model=InstallationRequestResponse,
 )
-async def update_tech_installation_item_endpoint(
+def update_tech_installation_item_endpoint(
     request_id: UUID,
     item_id: UUID,
     payload: TechInstallationItemUpdate,
@@ -293,7 +293,7 @@ async def update_tech_installation_item_endpoint(
     "/installation-requests/{request_id}/approve-all",
     response_model=InstallationRequestResponse,
 )
-async def approve_all_items_for_request_endpoint(
+def approve_all_items_for_request_endpoint(
     request_id: UUID,
     current_user: Annotated[User, Depends(require_role("technician", "admin"))] = None,
     db: Annotated[Session, Depends(get_db)] = None,
@@ -17,6 +17,8 @@ class AlertResponse(BaseModel):
     severity: str
     status: str
     score: Optional[float]
+    occurrences: int = 1
+    last_seen_at: Optional[datetime] = None
     created_at: datetime
     acked_at: Optional[datetime]
     escalated_at: Optional[datetime]
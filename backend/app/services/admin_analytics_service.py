@@ -2,12 +2,11 @@
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.core.config import Settings
 from app.db.models import Alert, Device, Home, User
 from app.services.events_repository import EventsRepository
 
 
-def get_admin_overview(db: Session, settings: Settings) -> dict:
+def get_admin_overview(db: Session, events_repo: EventsRepository) -> dict:
     """Get admin overview statistics for entire platform."""
     # Count all entities
     total_homes = db.query(func.count(Home.id)).scalar() or 0
@@ -27,7 +26,6 @@ def get_admin_overview(db: Session, settings: Settings) -> dict:
         alerts_by_severity[alert.severity] = alerts_by_severity.get(alert.severity, 0) + 1
 
     # Get events from MongoDB
-    events_repo = EventsRepository(settings.mongo_uri)
     events_by_home = events_repo.count_events_by_home_last_24h()
     total_events = sum(item["count"] for item in events_by_home)
 
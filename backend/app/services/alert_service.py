@@ -4,6 +4,8 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db.models import Alert, User
@@ -24,6 +26,23 @@ def get_alert(db: Session, alert_id: UUID) -> Optional[Alert]:
     return db.query(Alert).filter(Alert.id == alert_id).first()
 
 
+async def list_alerts_async(
+    adb: AsyncSession, home_id: UUID, status_filter: Optional[str] = None
+) -> list[Alert]:
+    """list_alerts on an AsyncSession."""
+    query = select(Alert).where(Alert.home_id == home_id)
+
+    if status_filter:
+        query = query.where(Alert.status == status_filter)
+
+    return list((await adb.scalars(query.order_by(Alert.created_at.desc()))).all())
+
+
+async def get_alert_async(adb: AsyncSession, alert_id: UUID) -> Optional[Alert]:
+    """get_alert on an AsyncSession."""
+    return await adb.get(Alert, alert_id)
+
+
 def ack_alert(db: Session, alert_id: UUID, user: User) -> Alert:
     """Acknowledge an alert."""
     alert = get_alert(db, alert_id)
@@ -29,6 +29,7 @@ def create_access_token_for_user(
     token_data = {
         "user_id": str(user.id),
         "role": user.role,
+        "tv": user.token_version or 0,
     }
     if home_id:
         token_data["home_id"] = str(home_id)
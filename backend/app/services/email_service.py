@@ -1,5 +1,8 @@
 """Email notification service for critical alerts."""
+import logging
+import queue
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
@@ -8,7 +11,33 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 
 from app.core.config import Settings
-from app.db.models import Alert, Contact, Home
+from app.db.models import Alert, Contact, Home, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(to_email: str, subject: str, body: str, settings: Settings) -> MIMEMultipart:
+    """An HTML email ready for SMTP.send_message."""
+    msg = MIMEMultipart()
+    msg["From"] = settings.smtp_from_email or "noreply@smarthome.com"
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "html"))
+    return msg
+
+
+def open_smtp_connection(settings: Settings) -> smtplib.SMTP:
+    """Connect, STARTTLS and log in to the configured SMTP relay."""
+    server = smtplib.SMTP(settings.smtp_host, settings.smtp_port or 587, timeout=settings.smtp_timeout_seconds)
+    try:
+        if settings.smtp_use_tls:
+            server.starttls()
+        if settings.smtp_username and settings.smtp_password:
+            server.login(settings.smtp_username, settings.smtp_password)
+    except Exception:
+        server.close()
+        raise
+    return server
 
 
 def send_email(
@@ -28,18 +57,8 @@ def send_email(
             print(f"[EMAIL] Body: {body}")
             return True
 
-        msg = MIMEMultipart()
-        msg["From"] = settings.smtp_from_email or "noreply@smarthome.com"
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "html"))
-
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port or 587) as server:
-            if settings.smtp_use_tls:
-                server.starttls()
-            if settings.smtp_username and settings.smtp_password:
-                server.login(settings.smtp_username, settings.smtp_password)
-            server.send_message(msg)
+        with open_smtp_connection(settings) as server:
+            server.send_message(build_message(to_email, subject, body, settings))
         
         return True
     except Exception as e:
@@ -47,6 +66,65 @@ def send_email(
         return False
 
 
+class SMTPConnectionPool:
+    """Up to `size` logged-in SMTP connections, reused across messages.
+
+    Connections are opened on first use and kept open, so a burst of
+    notifications pays for the TCP connect, STARTTLS and login once per
+    connection rather than once per message. A connection the relay has
+    dropped is replaced and the message retried once on the new one.
+    """
+
+    def __init__(self, settings: Settings, size: int):
+        self.settings = settings
+        self._idle: queue.LifoQueue[smtplib.SMTP] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def send(self, to_email: str, subject: str, body: str) -> None:
+        """Send one message, raising on failure."""
+        if not self.settings.smtp_host:
+            # Log email instead of sending in development
+            logger.info("[EMAIL] To: %s Subject: %s", to_email, subject)
+            return
+
+        msg = build_message(to_email, subject, body, self.settings)
+        with self._slots:
+            server = self._checkout()
+            try:
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # The relay dropped the idle connection; retry once on a fresh one
+                    server.close()
+                    server = open_smtp_connection(self.settings)
+                    server.send_message(msg)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # The relay refused this message but the connection is still usable
+                self._idle.put(server)
+                raise
+            except Exception:
+                server.close()
+                raise
+            self._idle.put(server)
+
+    def _checkout(self) -> smtplib.SMTP:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return open_smtp_connection(self.settings)
+
+    def close(self) -> None:
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                server.quit()
+            except smtplib.SMTPException:
+                server.close()
+
+
 def notify_contacts_for_alert(
     db: Session,
     alert: Alert,
@@ -69,9 +147,26 @@ def notify_contacts_for_alert(
     from app.db.models import Device, Room
     device = db.query(Device).filter(Device.id == alert.device_id).first() if alert.device_id else None
     room = db.query(Room).filter(Room.id == alert.room_id).first() if alert.room_id else None
-    
-    device_info = f"Device: {device.name}" if device else "Unknown device"
-    room_info = f"Room: {room.name}" if room else "Unknown room"
+
+    return send_alert_notifications(
+        alert,
+        home.name,
+        device.name if device else None,
+        room.name if room else None,
+        [(contact.channel, contact.value) for contact in contacts],
+        settings,
+    )
+
+
+def render_alert_email(
+    alert: Alert,
+    home_name: str,
+    device_name: Optional[str],
+    room_name: Optional[str],
+) -> tuple[str, str]:
+    """Subject and HTML body of a critical alert email."""
+    device_info = f"Device: {device_name}" if device_name else "Unknown device"
+    room_info = f"Room: {room_name}" if room_name else "Unknown room"
     
     subject = f"🚨 CRITICAL ALERT: {alert.type.upper()} Detected"
     body = f"""
@@ -80,7 +175,7 @@ def notify_contacts_for_alert(
         <h2 style="color: #d32f2f;">Critical Alert Notification</h2>
         <p><strong>Alert Type:</strong> {alert.type}</p>
         <p><strong>Severity:</strong> <span style="color: #d32f2f; font-weight: bold;">HIGH</span></p>
-        <p><strong>Home:</strong> {home.name}</p>
+        <p><strong>Home:</strong> {home_name}</p>
         <p><strong>{room_info}</strong></p>
         <p><strong>{device_info}</strong></p>
         <p><strong>Confidence Score:</strong> {alert.score * 100:.1f}%</p>
@@ -93,12 +188,65 @@ def notify_contacts_for_alert(
     </body>
     </html>
     """
-    
+    return subject, body
+
+
+def send_alert_notifications(
+    alert: Alert,
+    home_name: str,
+    device_name: Optional[str],
+    room_name: Optional[str],
+    contacts: list[tuple[str, str]],
+    settings: Settings,
+) -> int:
+    """Email a critical alert to (channel, value) contacts, with the names already looked up.
+
+    Returns number of notifications sent.
+    """
+    if alert.severity != "high":
+        return 0  # Only notify for high-severity alerts
+
+    subject, body = render_alert_email(alert, home_name, device_name, room_name)
     notifications_sent = 0
-    for contact in contacts:
-        if contact.channel == "email":
-            if send_email(contact.value, subject, body, settings):
+    for channel, value in contacts:
+        if channel == "email":
+            if send_email(value, subject, body, settings):
                 notifications_sent += 1
     
     return notifications_sent
 
+
+def enqueue_alert_notifications(
+    db: Session,
+    alert: Alert,
+    home_name: str,
+    device_name: Optional[str],
+    room_name: Optional[str],
+    contacts: list[tuple[str, str]],
+) -> int:
+    """Add outbox rows for a critical alert to the session, to commit together with the alert.
+
+    The email is rendered once and shared by every recipient. Returns the
+    number of rows added; delivery is left to the notification dispatcher.
+    """
+    if alert.severity != "high":
+        return 0  # Only notify for high-severity alerts
+
+    recipients = [value for channel, value in contacts if channel == "email"]
+    if not recipients:
+        return 0
+    if alert.id is None:
+        # Assigns the alert's primary key
+        db.flush()
+    subject, body = render_alert_email(alert, home_name, device_name, room_name)
+    for recipient in recipients:
+        db.add(
+            NotificationOutbox(
+                alert_id=alert.id,
+                channel="email",
+                recipient=recipient,
+                subject=subject,
+                body=body,
+            )
+        )
+    return len(recipients)
@@ -1,69 +1,205 @@
-"""Events repository for analytics queries on MongoDB."""
+"""MongoDB events repository: ingestion writes, worker updates and analytics queries.
+
+Each process shares one pooled MongoClient (and one AsyncMongoClient for
+async endpoints), created by init_events_repository at startup. A circuit
+breaker stops sending queries to an unreachable MongoDB for a while, so
+requests do not each wait out the server selection timeout.
+"""
+import logging
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional
 from uuid import UUID
 
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import ConnectionFailure
+
+from app.core.config import Settings
+from app.core.metrics import MONGO_CIRCUIT_OPEN, MONGO_DEGRADED_CALLS
+
+logger = logging.getLogger(__name__)
+
+# Sentinel: the operation has no fallback and raises MongoUnavailableError instead
+_RAISE = object()
+
+
+class MongoUnavailableError(ConnectionFailure):
+    """MongoDB is unreachable, or the circuit breaker is open."""
+
+
+class MongoCircuitBreaker:
+    """Opens after consecutive connection failures and lets one probe through once it has cooled down.
+
+    While open, calls are not sent: reads return their fallback and writes
+    raise MongoUnavailableError straight away. Any reply from the server,
+    even an error, closes it again.
+    """
+
+    def __init__(self, failures: int = 3, open_seconds: float = 30.0):
+        self.failures = failures
+        self.open_seconds = open_seconds
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("MongoDB reachable again, closing circuit")
+                MONGO_CIRCUIT_OPEN.set(0)
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._probing or self._consecutive_failures >= self.failures:
+                if self._opened_at is None:
+                    logger.warning("MongoDB unreachable, skipping it for %.0fs: %s", self.open_seconds, error)
+                    MONGO_CIRCUIT_OPEN.set(1)
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+def _unavailable(operation: str, fallback: Any, error: Exception | None) -> Any:
+    MONGO_DEGRADED_CALLS.labels(operation=operation).inc()
+    if fallback is _RAISE:
+        raise MongoUnavailableError(str(error) if error else "MongoDB circuit open") from error
+    return fallback
 
 
 class EventsRepository:
-    """Repository for analytics queries on MongoDB events collection."""
+    """Repository for the MongoDB events collection."""
 
-    def __init__(self, mongo_uri: str, database_name: str = "smart_home"):
-        """Initialize MongoDB connection."""
+    def __init__(
+        self,
+        client: MongoClient,
+        database_name: str = "smart_home",
+        breaker: MongoCircuitBreaker | None = None,
+    ):
+        """Wrap a (shared) MongoClient; no connection is made until the first query."""
+        self.client = client
+        self.db: Database = self.client[database_name]
+        self.events: Collection = self.db["events"]
+        self.breaker = breaker or MongoCircuitBreaker()
+
+    def _run(self, operation: str, call: Callable[[], Any], fallback: Any = _RAISE) -> Any:
+        if not self.breaker.allow():
+            return _unavailable(operation, fallback, None)
         try:
-            self.client = MongoClient(mongo_uri, serverSelectionTimeoutMS=2000)
-            # Trigger a connection check
-            self.client.admin.command('ping')
-            self.db: Database = self.client[database_name]
-            self.events: Collection = self.db["events"]
-            print(f"Connected to MongoDB at {mongo_uri}")
-        except Exception as e:
-            print(f"WARNING: Could not connect to MongoDB: {e}")
-            self.client = None
-            self.db = None
-            self.events = None
+            result = call()
+        except ConnectionFailure as e:
+            self.breaker.record_failure(e)
+            return _unavailable(operation, fallback, e)
+        except Exception:
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
 
-    def count_events_last_24h(self, home_id: UUID) -> int:
-        """Count events for a specific home in the last 24 hours."""
-        if self.events is None:
+    def insert_event(
+        self,
+        timestamp: datetime,
+        home_id: str,
+        device_id: str,
+        s3_key: str,
+        duration_ms: Optional[int] = None,
+        scores: Optional[dict] = None,
+        decision: Optional[str] = None,
+    ) -> str:
+        """Insert an event document."""
+        event_doc = {
+            "timestamp": timestamp,
+            "home_id": home_id,
+            "device_id": device_id,
+            "s3_key": s3_key,
+            "duration_ms": duration_ms,
+            "scores": scores,
+            "decision": decision,
+            "status": "pending" if duration_ms is None else "uploaded",
+        }
+        result = self._run("insert_event", lambda: self.events.insert_one(event_doc))
+        return str(result.inserted_id)
+
+    def update_event(self, event_id: str, duration_ms: Optional[int] = None, **kwargs) -> bool:
+        """Update an event document."""
+        from bson import ObjectId
+
+        update_data = {}
+        if duration_ms is not None:
+            update_data["duration_ms"] = duration_ms
+            update_data["status"] = "uploaded"
+        update_data.update(kwargs)
+        result = self._run(
+            "update_event", lambda: self.events.update_one({"_id": ObjectId(event_id)}, {"$set": update_data})
+        )
+        return result.modified_count > 0
+
+    def update_event_by_s3_key(self, s3_key: str, **kwargs) -> bool:
+        """Update the event document for an S3 key."""
+        result = self._run("update_event", lambda: self.events.update_one({"s3_key": s3_key}, {"$set": kwargs}))
+        return result.modified_count > 0
+
+    def update_events(self, updates: list[tuple[Any, dict]]) -> int:
+        """Set fields on many events in one round trip. Takes (event _id, fields) pairs."""
+        if not updates:
             return 0
+        requests = [UpdateOne({"_id": event_id}, {"$set": fields}) for event_id, fields in updates]
+        result = self._run("update_events", lambda: self.events.bulk_write(requests, ordered=False))
+        return result.modified_count
+
+    def get_events_by_ids(self, event_ids: list, projection: Optional[dict] = None) -> list[dict]:
+        """Events with the given _ids, in no particular order."""
+        return self._run("get_events", lambda: list(self.events.find({"_id": {"$in": event_ids}}, projection)))
+
+    def get_event_by_s3_key(self, s3_key: str) -> Optional[dict]:
+        """Get an event by S3 key."""
+        return self._run("get_events", lambda: self.events.find_one({"s3_key": s3_key}))
+
+    def count_events_last_24h(self, home_id: UUID) -> int:
+        """Count events for a specific home in the last 24 hours (0 while MongoDB is unreachable)."""
         cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        count = self.events.count_documents(
-            {
-                "home_id": str(home_id),
-                "timestamp": {"$gte": cutoff_time},
-            }
+        return self._run(
+            "count_events",
+            lambda: self.events.count_documents({"home_id": str(home_id), "timestamp": {"$gte": cutoff_time}}),
+            fallback=0,
         )
-        return count
 
     def count_events_by_home_last_24h(self) -> list[dict]:
         """Count events per home in the last 24 hours."""
-        if self.events is None:
-            return []
         cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        
+
         pipeline = [
             {"$match": {"timestamp": {"$gte": cutoff_time}}},
             {"$group": {"_id": "$home_id", "count": {"$sum": 1}}},
             {"$project": {"home_id": "$_id", "count": 1, "_id": 0}},
         ]
-        
-        results = list(self.events.aggregate(pipeline))
-        return results
+
+        return self._run("events_by_home", lambda: list(self.events.aggregate(pipeline)), fallback=[])
 
     def device_uptime_summary(self, home_id: UUID) -> list[dict]:
         """
         Calculate device uptime summary for a home.
-        
+
         Devices with more recent events are considered more "online".
         """
-        if self.events is None:
-            return []
         cutoff_time = datetime.utcnow() - timedelta(days=7)
-        
+
         pipeline = [
             {
                 "$match": {
@@ -106,47 +242,183 @@ class EventsRepository:
                 }
             },
         ]
-        
-        results = list(self.events.aggregate(pipeline))
-        return results
+
+        return self._run("device_uptime", lambda: list(self.events.aggregate(pipeline)), fallback=[])
 
     def get_events_by_hour_last_24h(self, home_id: Optional[UUID] = None) -> list[dict]:
         """Get event counts grouped by hour for the last 24 hours."""
-        if self.events is None:
-            return []
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        
-        match_stage = {"timestamp": {"$gte": cutoff_time}}
-        if home_id:
-            match_stage["home_id"] = str(home_id)
-        
+        pipeline = events_by_hour_pipeline(home_id)
+        return self._run("events_by_hour", lambda: list(self.events.aggregate(pipeline)), fallback=[])
+
+    def latest_rssi_by_device(self, device_ids: list[str]) -> dict[str, int]:
+        """Latest reported RSSI per device from the device_telemetry collection ({} while unreachable)."""
         pipeline = [
-            {"$match": match_stage},
-            {
-                "$group": {
-                    "_id": {
-                        "year": {"$year": "$timestamp"},
-                        "month": {"$month": "$timestamp"},
-                        "day": {"$dayOfMonth": "$timestamp"},
-                        "hour": {"$hour": "$timestamp"},
-                    },
-                    "count": {"$sum": 1},
-                }
-            },
-            {
-                "$project": {
-                    "hour": "$_id.hour",
-                    "day": "$_id.day",
-                    "month": "$_id.month",
-                    "year": "$_id.year",
-                    "count": 1,
-                    "_id": 0,
-                }
-            },
-            {"$sort": {"year": 1, "month": 1, "day": 1, "hour": 1}},
+            {"$match": {"device_id": {"$in": device_ids}, "rssi": {"$exists": True}}},
+            {"$sort": {"timestamp": -1}},
+            {"$group": {"_id": "$device_id", "rssi": {"$first": "$rssi"}}},
         ]
-        
-        results = list(self.events.aggregate(pipeline))
-        return results
+        rows = self._run(
+            "device_telemetry", lambda: list(self.db["device_telemetry"].aggregate(pipeline)), fallback=[]
+        )
+        return {row["_id"]: row["rssi"] for row in rows}
+
+
+def events_by_hour_pipeline(home_id: Optional[UUID] = None) -> list[dict]:
+    """Aggregation pipeline counting events per hour over the last 24 hours."""
+    cutoff_time = datetime.utcnow() - timedelta(hours=24)
+
+    match_stage = {"timestamp": {"$gte": cutoff_time}}
+    if home_id:
+        match_stage["home_id"] = str(home_id)
+
+    return [
+        {"$match": match_stage},
+        {
+            "$group": {
+                "_id": {
+                    "year": {"$year": "$timestamp"},
+                    "month": {"$month": "$timestamp"},
+                    "day": {"$dayOfMonth": "$timestamp"},
+                    "hour": {"$hour": "$timestamp"},
+                },
+                "count": {"$sum": 1},
+            }
+        },
+        {
+            "$project": {
+                "hour": "$_id.hour",
+                "day": "$_id.day",
+                "month": "$_id.month",
+                "year": "$_id.year",
+                "count": 1,
+                "_id": 0,
+            }
+        },
+        {"$sort": {"year": 1, "month": 1, "day": 1, "hour": 1}},
+    ]
+
+
+class AsyncEventsRepository:
+    """Analytics queries for async endpoints, on PyMongo's asyncio client.
+
+    Shares the process's circuit breaker with EventsRepository, since both
+    talk to the same server.
+    """
+
+    def __init__(
+        self,
+        client: AsyncMongoClient,
+        database_name: str = "smart_home",
+        breaker: MongoCircuitBreaker | None = None,
+    ):
+        """Wrap a (shared) AsyncMongoClient; no connection is made until the first query."""
+        self.client = client
+        self.events: AsyncCollection = self.client[database_name]["events"]
+        self.breaker = breaker or MongoCircuitBreaker()
+
+    async def _run(self, operation: str, call: Callable[[], Any], fallback: Any = _RAISE) -> Any:
+        if not self.breaker.allow():
+            return _unavailable(operation, fallback, None)
+        try:
+            result = await call()
+        except ConnectionFailure as e:
+            self.breaker.record_failure(e)
+            return _unavailable(operation, fallback, e)
+        except Exception:
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def count_events_last_24h(self, home_id: UUID) -> int:
+        """Count events for a specific home in the last 24 hours (0 while MongoDB is unreachable)."""
+        cutoff_time = datetime.utcnow() - timedelta(hours=24)
+        return await self._run(
+            "count_events",
+            lambda: self.events.count_documents({"home_id": str(home_id), "timestamp": {"$gte": cutoff_time}}),
+            fallback=0,
+        )
+
+    async def get_events_by_hour_last_24h(self, home_id: Optional[UUID] = None) -> list[dict]:
+        """Get event counts grouped by hour for the last 24 hours ([] while MongoDB is unreachable)."""
+        pipeline = events_by_hour_pipeline(home_id)
+
+        async def aggregate() -> list[dict]:
+            cursor = await self.events.aggregate(pipeline)
+            return await cursor.to_list()
+
+        return await self._run("events_by_hour", aggregate, fallback=[])
+
+
+# One client, repository and circuit breaker per process
+_repository: EventsRepository | None = None
+_async_repository: AsyncEventsRepository | None = None
+_breaker: MongoCircuitBreaker | None = None
+_lock = threading.Lock()
+
+
+def mongo_client_options(settings: Settings) -> dict:
+    """Pool size and timeouts for MongoClient and AsyncMongoClient."""
+    return {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+    }
+
+
+def get_mongo_client(settings: Settings) -> MongoClient:
+    """Create a MongoClient with the configured pool and timeouts."""
+    return MongoClient(settings.mongo_uri, **mongo_client_options(settings))
+
+
+def _get_breaker(settings: Settings) -> MongoCircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        _breaker = MongoCircuitBreaker(settings.mongo_circuit_failures, settings.mongo_circuit_open_seconds)
+    return _breaker
+
+
+def init_events_repository(settings: Settings) -> EventsRepository:
+    """Create this process's MongoClient and EventsRepository, if not created yet."""
+    global _repository
+    with _lock:
+        if _repository is None:
+            _repository = EventsRepository(get_mongo_client(settings), breaker=_get_breaker(settings))
+        return _repository
+
+
+def get_events_repository(settings: Settings) -> EventsRepository:
+    """Return the process-wide EventsRepository, creating it on first use."""
+    if _repository is not None:
+        return _repository
+    return init_events_repository(settings)
+
+
+def close_events_repository() -> None:
+    """Close the process's MongoClient and forget it, e.g. at shutdown."""
+    global _repository
+    with _lock:
+        repo, _repository = _repository, None
+    if repo is not None:
+        repo.client.close()
+
+
+def get_async_events_repository(settings: Settings) -> AsyncEventsRepository:
+    """Return the process-wide AsyncEventsRepository, creating it on first use."""
+    global _async_repository
+    with _lock:
+        if _async_repository is None:
+            client = AsyncMongoClient(settings.mongo_uri, **mongo_client_options(settings))
+            _async_repository = AsyncEventsRepository(client, breaker=_get_breaker(settings))
+        return _async_repository
 
 
+async def close_async_events_repository() -> None:
+    """Close the process's AsyncMongoClient and forget it, e.g. at shutdown."""
+    global _async_repository
+    with _lock:
+        repo, _async_repository = _async_repository, None
+    if repo is not None:
+        await repo.client.close()
@@ -0,0 +1,104 @@
+"""Each user's accessible homes, cached so authorization checks are set lookups instead of queries."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.metrics import HOME_ACCESS_CACHE_LOOKUPS
+from app.db.models import Assignment, Home, User
+
+
+class HomeAccess:
+    """The homes a user can act on as of one lookup: owned homes for owners, assignments otherwise."""
+
+    def __init__(self, role: str, home_ids: list[UUID]):
+        self.role = role
+        # In the order get_user_home_access picks a default home from
+        self.home_ids = tuple(home_ids)
+        self._home_set = frozenset(home_ids)
+
+    def __contains__(self, home_id: UUID) -> bool:
+        return home_id in self._home_set
+
+    @property
+    def default_home_id(self) -> Optional[UUID]:
+        return self.home_ids[0] if self.home_ids else None
+
+
+def _home_ids_query(user: User):
+    if user.role == "owner":
+        return select(Home.id).where(Home.owner_id == user.id).order_by(Home.created_at)
+    return select(Assignment.home_id).where(Assignment.user_id == user.id)
+
+
+class HomeAccessCache:
+    """HomeAccess by user id, trusted for ttl_seconds.
+
+    home_service, user_service and the assignment endpoints invalidate the
+    affected users when ownership or assignments change, in this process;
+    other API processes pick the change up when their entry expires, so
+    the TTL bounds how long a removed assignment keeps working there.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[UUID, tuple[float, HomeAccess]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user: User, ttl_seconds: float) -> HomeAccess:
+        access = self._lookup(user, ttl_seconds)
+        if access is None:
+            access = HomeAccess(user.role, list(db.execute(_home_ids_query(user)).scalars()))
+            self._store(user.id, access, ttl_seconds)
+        return access
+
+    async def get_async(self, adb: AsyncSession, user: User, ttl_seconds: float) -> HomeAccess:
+        access = self._lookup(user, ttl_seconds)
+        if access is None:
+            access = HomeAccess(user.role, list((await adb.execute(_home_ids_query(user))).scalars()))
+            self._store(user.id, access, ttl_seconds)
+        return access
+
+    def _lookup(self, user: User, ttl_seconds: float) -> Optional[HomeAccess]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user.id)
+            # An entry loaded under another role lists the wrong kind of homes
+            if entry is not None and now - entry[0] < ttl_seconds and entry[1].role == user.role:
+                self._entries.move_to_end(user.id)
+                HOME_ACCESS_CACHE_LOOKUPS.labels(result="hit").inc()
+                return entry[1]
+        HOME_ACCESS_CACHE_LOOKUPS.labels(result="miss").inc()
+        return None
+
+    def _store(self, user_id: UUID, access: HomeAccess, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), access)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID | str) -> None:
+        with self._lock:
+            self._entries.pop(UUID(str(user_id)), None)
+
+    def invalidate_home(self, home_id: UUID | str) -> None:
+        """Drop every user with access to the home, e.g. when it changes owner or is deleted."""
+        home_id = UUID(str(home_id))
+        with self._lock:
+            for user_id in [user_id for user_id, (_, access) in self._entries.items() if home_id in access]:
+                del self._entries[user_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+home_access_cache = HomeAccessCache()
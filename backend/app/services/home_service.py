@@ -6,6 +6,7 @@ from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.db.models import Device, Home, Room, User
+from app.services.home_access_cache import home_access_cache
 
 
 def get_home(db: Session, home_id: UUID) -> Optional[Home]:
@@ -47,6 +48,7 @@ def create_home(
     )
     db.add(home)
     db.commit()
+    home_access_cache.invalidate(owner_id)
     db.refresh(home)
     return home
 
@@ -98,4 +100,5 @@ def delete_home(db: Session, home_id: UUID) -> None:
 
     db.delete(home)
     db.commit()
+    home_access_cache.invalidate_home(home_id)
 
@@ -6,66 +6,9 @@ from uuid import UUID
 
 import boto3
 from botocore.exceptions import ClientError
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
 
 from app.core.config import Settings
-
-
-class EventsRepository:
-    """Repository for storing ingestion events in MongoDB."""
-
-    def __init__(self, mongo_uri: str, database_name: str = "smart_home"):
-        """Initialize MongoDB connection."""
-        self.client = MongoClient(mongo_uri)
-        self.db: Database = self.client[database_name]
-        self.events: Collection = self.db["events"]
-
-    def insert_event(
-        self,
-        timestamp: datetime,
-        home_id: str,
-        device_id: str,
-        s3_key: str,
-        duration_ms: Optional[int] = None,
-        scores: Optional[dict] = None,
-        decision: Optional[str] = None,
-    ) -> str:
-        """Insert an event document."""
-        event_doc = {
-            "timestamp": timestamp,
-            "home_id": home_id,
-            "device_id": device_id,
-            "s3_key": s3_key,
-            "duration_ms": duration_ms,
-            "scores": scores,
-            "decision": decision,
-            "status": "pending" if duration_ms is None else "uploaded",
-        }
-        result = self.events.insert_one(event_doc)
-        return str(result.inserted_id)
-
-    def update_event(self, event_id: str, duration_ms: Optional[int] = None, **kwargs) -> bool:
-        """Update an event document."""
-        from bson import ObjectId
-
-        update_data = {}
-        if duration_ms is not None:
-            update_data["duration_ms"] = duration_ms
-            update_data["status"] = "uploaded"
-        update_data.update(kwargs)
-        result = self.events.update_one({"_id": ObjectId(event_id)}, {"$set": update_data})
-        return result.modified_count > 0
-
-    def get_event_by_s3_key(self, s3_key: str) -> Optional[dict]:
-        """Get an event by S3 key."""
-        return self.events.find_one({"s3_key": s3_key})
-
-
-def get_mongo_client(settings: Settings) -> MongoClient:
-    """Get MongoDB client."""
-    return MongoClient(settings.mongo_uri)
+from app.services.events_repository import EventsRepository
 
 
 def create_presigned_url(
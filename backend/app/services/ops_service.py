@@ -5,12 +5,11 @@ from uuid import UUID
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.core.config import Settings
 from app.db.models import Alert, Device, Home, User
 from app.services.events_repository import EventsRepository
 
 
-def get_ops_overview(db: Session, settings: Settings) -> dict:
+def get_ops_overview(db: Session, events_repo: EventsRepository) -> dict:
     """Get operations overview statistics."""
     total_homes = db.query(func.count(Home.id)).scalar() or 0
     total_devices = db.query(func.count(Device.id)).scalar() or 0
@@ -23,7 +22,6 @@ def get_ops_overview(db: Session, settings: Settings) -> dict:
         alerts_by_severity[alert.severity] = alerts_by_severity.get(alert.severity, 0) + 1
 
     # Get events from MongoDB
-    events_repo = EventsRepository(settings.mongo_uri)
     events_by_home = events_repo.count_events_by_home_last_24h()
     
     # Get device uptime summary (aggregate across all homes)
@@ -1,139 +1,95 @@
 """Owner analytics service."""
-from typing import Optional
+from datetime import datetime, timedelta
 from uuid import UUID
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import Settings
-from app.db.models import Alert, Device, Home, Room
-from app.services.events_repository import EventsRepository
+from app.db.models import Alert, Device, Room
+from app.services.events_repository import AsyncEventsRepository
 
+SEVERITIES = ("high", "medium", "low")
+TREND_DAYS = 7
 
-def get_owner_overview(db: Session, settings: Settings, home_id: UUID) -> dict:
-    """Get owner overview statistics for a specific home."""
-    # Count open alerts
-    open_alerts_count = (
-        db.query(func.count(Alert.id))
-        .filter(Alert.home_id == home_id, Alert.status == "open")
-        .scalar()
-        or 0
-    )
-    
-    open_alerts_high = (
-        db.query(func.count(Alert.id))
-        .filter(Alert.home_id == home_id, Alert.status == "open", Alert.severity == "high")
-        .scalar()
-        or 0
-    )
 
-    # Count devices
-    devices_online_count = (
-        db.query(func.count(Device.id))
-        .filter(Device.home_id == home_id, Device.status == "online")
-        .scalar()
-        or 0
-    )
-    
-    total_devices = (
-        db.query(func.count(Device.id))
-        .filter(Device.home_id == home_id)
-        .scalar()
-        or 0
-    )
+def _utc_day(adb: AsyncSession, column):
+    """The UTC calendar day of a timestamp, as a GROUP BY key."""
+    if adb.bind.dialect.name == "postgresql":
+        return func.date_trunc("day", func.timezone("UTC", column))
+    return func.date(column)
 
-    # Count rooms
-    rooms_count = (
-        db.query(func.count(Room.id))
-        .filter(Room.home_id == home_id)
-        .scalar()
-        or 0
-    )
 
-    # Get events from MongoDB
-    events_repo = EventsRepository(settings.mongo_uri)
-    events_last_24h = events_repo.count_events_last_24h(home_id)
+async def get_owner_overview(adb: AsyncSession, events_repo: AsyncEventsRepository, home_id: UUID) -> dict:
+    """Get owner overview statistics for a specific home.
 
-    # Per-room stats with alerts
-    rooms = db.query(Room).filter(Room.home_id == home_id).all()
-    per_room_stats = []
-    for room in rooms:
-        room_devices_count = (
-            db.query(func.count(Device.id))
-            .filter(Device.room_id == room.id)
-            .scalar()
-            or 0
+    Four grouped queries, whatever the number of rooms: devices and open
+    alerts per room (home totals are their sums), the rooms, and alerts per
+    day and severity for the trend.
+    """
+    devices_by_room = {
+        room_id: (total, online)
+        for room_id, total, online in await adb.execute(
+            select(Device.room_id, func.count(Device.id), func.count(Device.id).filter(Device.status == "online"))
+            .where(Device.home_id == home_id)
+            .group_by(Device.room_id)
         )
-        room_alerts_count = (
-            db.query(func.count(Alert.id))
-            .filter(Alert.room_id == room.id, Alert.status == "open")
-            .scalar()
-            or 0
+    }
+    open_alerts_by_room = {
+        room_id: (total, high)
+        for room_id, total, high in await adb.execute(
+            select(Alert.room_id, func.count(Alert.id), func.count(Alert.id).filter(Alert.severity == "high"))
+            .where(Alert.home_id == home_id, Alert.status == "open")
+            .group_by(Alert.room_id)
         )
-        per_room_stats.append({
+    }
+    rooms = (await adb.scalars(select(Room).where(Room.home_id == home_id))).all()
+
+    # Get events from MongoDB
+    events_last_24h = await events_repo.count_events_last_24h(home_id)
+
+    per_room_stats = [
+        {
             "room_id": str(room.id),
             "room_name": room.name,
-            "devices_count": room_devices_count,
-            "alert_count": room_alerts_count,
-        })
+            "devices_count": devices_by_room.get(room.id, (0, 0))[0],
+            "alert_count": open_alerts_by_room.get(room.id, (0, 0))[0],
+        }
+        for room in rooms
+    ]
 
-    # Get alert trends (last 7 days)
-    from datetime import datetime, timedelta
-    alert_trends = []
-    for i in range(7):
-        date = datetime.utcnow() - timedelta(days=6 - i)
-        start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        high_count = (
-            db.query(func.count(Alert.id))
-            .filter(
+    # Alert trends over the last 7 UTC days, today included
+    first_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=TREND_DAYS - 1)
+    day = _utc_day(adb, Alert.created_at).label("day")
+    counts = {
+        # Postgres returns a timestamp, SQLite a 'YYYY-MM-DD' string
+        (str(day_value)[:10], severity): count
+        for day_value, severity, count in await adb.execute(
+            select(day, Alert.severity, func.count(Alert.id))
+            .where(
                 Alert.home_id == home_id,
-                Alert.severity == "high",
-                Alert.created_at >= start_of_day,
-                Alert.created_at <= end_of_day,
+                Alert.severity.in_(SEVERITIES),
+                Alert.created_at >= first_day,
+                Alert.created_at < first_day + timedelta(days=TREND_DAYS),
             )
-            .scalar()
-            or 0
+            .group_by(day, Alert.severity)
         )
-        medium_count = (
-            db.query(func.count(Alert.id))
-            .filter(
-                Alert.home_id == home_id,
-                Alert.severity == "medium",
-                Alert.created_at >= start_of_day,
-                Alert.created_at <= end_of_day,
-            )
-            .scalar()
-            or 0
-        )
-        low_count = (
-            db.query(func.count(Alert.id))
-            .filter(
-                Alert.home_id == home_id,
-                Alert.severity == "low",
-                Alert.created_at >= start_of_day,
-                Alert.created_at <= end_of_day,
-            )
-            .scalar()
-            or 0
-        )
-        
+    }
+    alert_trends = []
+    for i in range(TREND_DAYS):
+        start_of_day = first_day + timedelta(days=i)
+        date_key = start_of_day.date().isoformat()
         alert_trends.append({
             "date": start_of_day.isoformat(),
-            "high": high_count,
-            "medium": medium_count,
-            "low": low_count,
+            **{severity: counts.get((date_key, severity), 0) for severity in SEVERITIES},
         })
 
     return {
-        "openAlertsCount": open_alerts_count,
-        "openAlertsHigh": open_alerts_high,
-        "devicesOnlineCount": devices_online_count,
+        "openAlertsCount": sum(total for total, _ in open_alerts_by_room.values()),
+        "openAlertsHigh": sum(high for _, high in open_alerts_by_room.values()),
+        "devicesOnlineCount": sum(online for _, online in devices_by_room.values()),
         "eventsLast24h": events_last_24h,
-        "totalDevices": total_devices,
-        "roomsCount": rooms_count,
+        "totalDevices": sum(total for total, _ in devices_by_room.values()),
+        "roomsCount": len(rooms),
         "perRoomStats": per_room_stats,
         "alertTrends": alert_trends,
     }
-
@@ -0,0 +1,73 @@
+"""Authenticated users cached between requests, so get_current_user can skip the users lookup."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.metrics import PRINCIPAL_CACHE_LOOKUPS
+from app.db.models import User
+
+
+def _snapshot(user: User) -> User:
+    """A detached copy of the user's column values, safe to share between sessions and threads."""
+    snapshot = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+class PrincipalCache:
+    """User snapshots by id, trusted for ttl_seconds.
+
+    An entry only answers for tokens with the token_version it was loaded
+    at; a token from before a version bump misses, is checked against the
+    row and rejected. user_service and profile_service invalidate a user's
+    entry when they change it, in this process; other API processes pick
+    the change up when their entry expires, so the TTL bounds how stale a
+    role or profile can be there.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[UUID, tuple[float, User]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: UUID, token_version: int, ttl_seconds: float) -> Optional[User]:
+        """The user, attached to db, or None if it no longer exists or the token was revoked."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            fresh = entry is not None and now - entry[0] < ttl_seconds and entry[1].token_version == token_version
+            if fresh:
+                self._entries.move_to_end(user_id)
+        if fresh:
+            PRINCIPAL_CACHE_LOOKUPS.labels(result="hit").inc()
+            # Copies the snapshot into this request's session without a query
+            return db.merge(entry[1], load=False)
+
+        PRINCIPAL_CACHE_LOOKUPS.labels(result="miss").inc()
+        user = db.get(User, user_id)
+        if user is None or user.token_version != token_version:
+            self.invalidate(user_id)
+            return None
+        if ttl_seconds > 0:
+            with self._lock:
+                self._entries[user_id] = (now, _snapshot(user))
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id: UUID | str) -> None:
+        with self._lock:
+            self._entries.pop(UUID(str(user_id)), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
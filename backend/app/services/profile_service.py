@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.core.config import Settings
 from app.db.models import User
 from app.schemas.profile import ProfileUpdateRequest
+from app.services.principal_cache import principal_cache
 
 
 def get_user_profile(db: Session, user_id: str) -> User:
@@ -29,6 +30,7 @@ def update_user_profile(db: Session, user_id: str, profile_data: ProfileUpdateRe
         setattr(user, field, value)
     
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -75,6 +77,7 @@ def confirm_profile_picture_upload(db: Session, user_id: str, picture_key: str,
     
     user.profile_picture_url = picture_url
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -109,5 +112,6 @@ def delete_profile_picture(db: Session, user_id: str, settings: Settings) -> Use
     # Update user record
     user.profile_picture_url = None
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
@@ -5,12 +5,11 @@ from uuid import UUID
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.core.config import Settings
 from app.db.models import Alert, Assignment, Device, Home, Room
 from app.services.events_repository import EventsRepository
 
 
-def get_tech_overview(db: Session, settings: Settings, user_id: UUID) -> dict:
+def get_tech_overview(db: Session, events_repo: EventsRepository, user_id: UUID) -> dict:
     """Get technician overview statistics for assigned homes."""
     # Get technician's assignments
     assignments = db.query(Assignment).filter(Assignment.user_id == user_id).all()
@@ -59,7 +58,6 @@ def get_tech_overview(db: Session, settings: Settings, user_id: UUID) -> dict:
     )
 
     # Get events from MongoDB
-    events_repo = EventsRepository(settings.mongo_uri)
     total_events = 0
     for home_id in home_ids:
         total_events += events_repo.count_events_last_24h(home_id)
@@ -7,6 +7,8 @@ from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash
 from app.db.models import Home, User
+from app.services.home_access_cache import home_access_cache
+from app.services.principal_cache import principal_cache
 
 
 def get_user(db: Session, user_id: UUID) -> Optional[User]:
@@ -68,6 +70,9 @@ def create_user(
         home.owner_id = user.id
 
     db.commit()
+    if home_id and role == "owner":
+        # The home's previous owner lost it
+        home_access_cache.invalidate_home(home_id)
     db.refresh(user)
     return user
 
@@ -101,6 +106,9 @@ def update_user(
     if role is not None:
         if role not in ["owner", "technician", "staff", "admin"]:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role")
+        if role != user.role:
+            # Tokens carry the role; revoke them so the user logs in again with the new one
+            user.token_version = (user.token_version or 0) + 1
         user.role = role
 
     if home_id is not None and user.role == "owner":
@@ -125,6 +133,10 @@ def update_user(
         user.profile_picture_url = profile_picture_url
 
     db.commit()
+    principal_cache.invalidate(user_id)
+    home_access_cache.invalidate(user_id)
+    if home_id is not None and user.role == "owner":
+        home_access_cache.invalidate_home(home_id)
     db.refresh(user)
     return user
 
@@ -135,5 +147,11 @@ def delete_user(db: Session, user_id: UUID) -> None:
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
+    # Their homes go with them (ON DELETE CASCADE), and with them other users' access
+    owned_home_ids = [home.id for home in db.query(Home).filter(Home.owner_id == user_id).all()]
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user_id)
+    home_access_cache.invalidate(user_id)
+    for home_id in owned_home_ids:
+        home_access_cache.invalidate_home(home_id)
@@ -0,0 +1,88 @@
+"""add homes.config_version, bumped by triggers when routing data changes
+
+Revision ID: cc33dd44ee55
+Revises: bb22cc44dd55
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "cc33dd44ee55"
+down_revision: Union[str, Sequence[str], None] = "bb22cc44dd55"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Child tables whose rows feed the worker's routing snapshot, and the
+# columns whose updates matter (None = any column)
+_TRACKED_TABLES = {
+    "devices": "name, room_id, home_id",
+    "rooms": "name, home_id",
+    "model_configs": None,
+    "contacts": None,
+    "policies": None,
+}
+
+
+def upgrade() -> None:
+    op.add_column(
+        "homes",
+        sa.Column("config_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_home_config_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE homes SET config_version = config_version + 1 WHERE id = OLD.home_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.home_id IS DISTINCT FROM OLD.home_id) THEN
+                UPDATE homes SET config_version = config_version + 1 WHERE id = NEW.home_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, columns in _TRACKED_TABLES.items():
+        update = f"UPDATE OF {columns}" if columns else "UPDATE"
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_bump_home_config_version
+            AFTER INSERT OR {update} OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION bump_home_config_version()
+            """
+        )
+
+    # The home's own name is part of the snapshot too
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_own_config_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.config_version := OLD.config_version + 1;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER homes_bump_config_version
+        BEFORE UPDATE OF name ON homes
+        FOR EACH ROW EXECUTE FUNCTION bump_own_config_version()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS homes_bump_config_version ON homes")
+    op.execute("DROP FUNCTION IF EXISTS bump_own_config_version()")
+    for table in _TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_home_config_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_home_config_version()")
+    op.drop_column("homes", "config_version")
@@ -0,0 +1,43 @@
+"""add alerts.occurrences and alerts.last_seen_at for worker alert coalescing
+
+Revision ID: ee55ff66aa77
+Revises: dd44ee55ff66
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ee55ff66aa77"
+down_revision: Union[str, Sequence[str], None] = "dd44ee55ff66"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "alerts",
+        sa.Column("occurrences", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.add_column(
+        "alerts",
+        sa.Column("last_seen_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    # The worker looks up the latest open alert of a type in a home on every detection
+    op.create_index(
+        "ix_alerts_open_home_type",
+        "alerts",
+        ["home_id", "type", "created_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'open'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alerts_open_home_type", table_name="alerts")
+    op.drop_column("alerts", "last_seen_at")
+    op.drop_column("alerts", "occurrences")
@@ -0,0 +1,29 @@
+"""add users.token_version for revoking tokens and validating cached principals
+
+Revision ID: ff66aa77bb88
+Revises: ee55ff66aa77
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ff66aa77bb88"
+down_revision: Union[str, Sequence[str], None] = "ee55ff66aa77"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_version")
@@ -0,0 +1,116 @@
+"""Benchmark worker inference throughput for different pool sizes and TF thread settings.
+
+Replays the clips under `Test Sounds/` through `InferencePool` and prints
+clips/sec for each (processes, intra-op threads) combination, so the estimated
+pool sizes in the README can be measured on a given instance type.
+
+    uv run python scripts/bench_inference_pool.py --clips 200 --threads 1 2 4
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import Settings
+from worker.inference_pool import InferencePool, available_cpus
+
+TEST_SOUNDS_DIR = Path(__file__).parent.parent.parent / "Test Sounds"
+
+
+def _bench_settings(**overrides) -> Settings:
+    """Settings for an offline run; connection settings are not used."""
+    return Settings(
+        database_url="postgresql+psycopg2://unused",
+        mongo_uri="mongodb://unused",
+        s3_bucket="unused",
+        sqs_queue_url="unused",
+        **overrides,
+    )
+
+
+def _load_clips(count: int) -> list[bytes]:
+    paths = sorted(TEST_SOUNDS_DIR.glob("*.wav"))
+    if not paths:
+        raise SystemExit(f"No WAV files found in {TEST_SOUNDS_DIR}")
+    clips = [path.read_bytes() for path in paths]
+    return [clips[i % len(clips)] for i in range(count)]
+
+
+def run_case(clips: list[bytes], processes: int, intra_op: int, inter_op: int, batch_size: int, pin: bool) -> dict:
+    """Time one pool configuration. Pool start-up and model load are excluded."""
+    settings = _bench_settings(
+        worker_inference_processes=processes,
+        worker_tf_intra_op_threads=intra_op,
+        worker_tf_inter_op_threads=inter_op,
+        worker_pin_cpus=pin,
+    )
+    pool = InferencePool(settings)
+    try:
+        # Warm every process so model load and graph tracing are not timed
+        threads = [threading.Thread(target=pool.predict_batch, args=(clips[:1],)) for _ in range(processes * 2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        batches = [clips[i : i + batch_size] for i in range(0, len(clips), batch_size)]
+        lock = threading.Lock()
+
+        def drain():
+            while True:
+                with lock:
+                    if not batches:
+                        return
+                    batch = batches.pop()
+                pool.predict_batch(batch)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=drain) for _ in range(processes)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.terminate()
+
+    return {
+        "processes": processes,
+        "intra_op": intra_op,
+        "inter_op": inter_op,
+        "clips_per_sec": len(clips) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=100, help="Clips per configuration")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="Intra-op thread counts to try")
+    parser.add_argument("--inter-op", type=int, default=1)
+    parser.add_argument("--pin", action="store_true", help="Pin each process to its own CPUs")
+    args = parser.parse_args()
+
+    cpus = len(available_cpus())
+    clips = _load_clips(args.clips)
+    print(f"Available CPUs: {cpus}, clips per case: {len(clips)}")
+    print(f"{'processes':>9} {'intra_op':>8} {'inter_op':>8} {'clips/sec':>10}")
+
+    for intra_op in args.threads:
+        processes = 1
+        while processes * intra_op <= cpus:
+            result = run_case(clips, processes, intra_op, args.inter_op, args.batch_size, args.pin)
+            print(
+                f"{result['processes']:>9} {result['intra_op']:>8} {result['inter_op']:>8} "
+                f"{result['clips_per_sec']:>10.2f}",
+                flush=True,
+            )
+            processes *= 2
+
+
+if __name__ == "__main__":
+    main()
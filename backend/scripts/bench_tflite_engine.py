@@ -0,0 +1,171 @@
+"""Compare the quantized TFLite engine against the TensorFlow SavedModel.
+
+Replays the clips under `Test Sounds/` through each engine, each in its own
+process, and reports, relative to the SavedModel:
+
+- agreement on the top user label, and per label on whether the score
+  passes the default threshold
+- score deltas, on the user labels and on the raw YAMNet classes
+- latency per clip and resident memory after loading the model
+
+Long clips are cut into --segment-seconds pieces so a small clip set still
+gives enough decisions to compare. int8 models calibrated on these same
+clips will look better here than on unseen audio.
+
+    uv run python scripts/bench_tflite_engine.py --quantization dynamic int8 --repeat 5
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from worker.audio import MODEL_SAMPLE_RATE, load_waveform
+from worker.label_mapping import DEFAULT_CLASS_MAPPING, DEFAULT_THRESHOLD, USER_LABELS, LabelMapping, load_yamnet_classes
+
+TEST_SOUNDS_DIR = Path(__file__).parent.parent.parent / "Test Sounds"
+
+
+def _load_waveforms(segment_seconds: float) -> list[np.ndarray]:
+    paths = sorted(TEST_SOUNDS_DIR.glob("*.wav"))
+    if not paths:
+        raise SystemExit(f"No WAV files found in {TEST_SOUNDS_DIR}")
+    waveforms = []
+    for path in paths:
+        waveform = load_waveform(path.read_bytes())
+        step = int(segment_seconds * MODEL_SAMPLE_RATE)
+        if step <= 0 or len(waveform) <= step:
+            waveforms.append(waveform)
+            continue
+        waveforms.extend(waveform[start : start + step] for start in range(0, len(waveform) - step + 1, step))
+    return waveforms
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _run_engine(options: dict, waveforms: list[np.ndarray], repeat: int, threads: int) -> dict:
+    """Load one engine in this (fresh) process and score every waveform."""
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    from worker.model_runner import ModelRunner
+
+    runner = ModelRunner(**options)
+    start = time.perf_counter()
+    runner.load()
+    load_seconds = time.perf_counter() - start
+    rss_loaded = _rss_mb()
+
+    # One untimed pass, which also gives the scores
+    mean_scores = np.stack([runner._frame_scores(waveform).mean(axis=0) for waveform in waveforms])
+    timings = []
+    for _ in range(repeat):
+        for waveform in waveforms:
+            start = time.perf_counter()
+            runner._frame_scores(waveform)
+            timings.append(time.perf_counter() - start)
+    timings_ms = np.array(timings) * 1000
+    return {
+        "mean_scores": mean_scores,
+        "load_seconds": load_seconds,
+        "rss_loaded_mb": rss_loaded,
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50_ms": float(np.percentile(timings_ms, 50)),
+        "p95_ms": float(np.percentile(timings_ms, 95)),
+        "audio_seconds_per_sec": sum(len(w) for w in waveforms) * repeat / MODEL_SAMPLE_RATE / (timings_ms.sum() / 1000),
+    }
+
+
+def run_engine(options: dict, waveforms: list[np.ndarray], repeat: int, threads: int) -> dict:
+    # A fresh spawned process per engine keeps RSS and TF state separate
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_engine, (options, waveforms, repeat, threads))
+
+
+def compare(baseline: np.ndarray, candidate: np.ndarray, mapping: LabelMapping) -> dict:
+    """Agreement and score deltas of candidate clip scores against the baseline."""
+    base_labels = mapping.label_scores(baseline)
+    cand_labels = mapping.label_scores(candidate)
+    label_deltas = np.abs(cand_labels - base_labels)
+    passes_agree = (base_labels >= DEFAULT_THRESHOLD) == (cand_labels >= DEFAULT_THRESHOLD)
+    return {
+        "top_label_agreement": float(np.mean(base_labels.argmax(axis=1) == cand_labels.argmax(axis=1))),
+        "class_delta_max": float(np.abs(candidate - baseline).max()),
+        "class_delta_mean": float(np.abs(candidate - baseline).mean()),
+        "labels": {
+            label: {
+                "threshold_agreement": float(passes_agree[:, i].mean()),
+                "delta_mean": float(label_deltas[:, i].mean()),
+                "delta_max": float(label_deltas[:, i].max()),
+            }
+            for i, label in enumerate(USER_LABELS)
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quantization", nargs="+", default=["dynamic"], choices=["dynamic", "int8"])
+    parser.add_argument("--segment-seconds", type=float, default=2.0, help="Cut clips into pieces this long (0 = whole clips)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the clip set")
+    parser.add_argument("--threads", type=int, default=2, help="Intra-op / interpreter threads")
+    parser.add_argument("--json", type=Path, help="Also write the full report here")
+    args = parser.parse_args()
+
+    waveforms = _load_waveforms(args.segment_seconds)
+    print(f"Clips: {len(waveforms)}, audio: {sum(len(w) for w in waveforms) / MODEL_SAMPLE_RATE:.1f}s")
+
+    engines = {"tensorflow": {"engine": "tensorflow"}}
+    for quantization in args.quantization:
+        engines[f"tflite-{quantization}"] = {
+            "engine": "tflite",
+            "tflite_quantization": quantization,
+            "tflite_threads": args.threads,
+        }
+
+    results = {name: run_engine(options, waveforms, args.repeat, args.threads) for name, options in engines.items()}
+    mapping = LabelMapping(load_yamnet_classes(), DEFAULT_CLASS_MAPPING)
+    baseline = results["tensorflow"]["mean_scores"]
+
+    print(f"\n{'engine':<16} {'load s':>7} {'RSS MB':>7} {'peak MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'audio x':>8} {'top-1':>6}")
+    report = {}
+    for name, result in results.items():
+        comparison = compare(baseline, result.pop("mean_scores"), mapping)
+        report[name] = {**result, **comparison}
+        print(
+            f"{name:<16} {result['load_seconds']:>7.1f} {result['rss_loaded_mb']:>7.0f} {result['rss_peak_mb']:>8.0f} "
+            f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['audio_seconds_per_sec']:>8.0f} "
+            f"{comparison['top_label_agreement']:>6.1%}"
+        )
+
+    for name, entry in report.items():
+        if name == "tensorflow":
+            continue
+        print(f"\n{name}: class score delta mean {entry['class_delta_mean']:.5f}, max {entry['class_delta_max']:.5f}")
+        print(f"  {'label':<22} {'agree':>7} {'mean Δ':>8} {'max Δ':>8}")
+        for label, stats in entry["labels"].items():
+            print(
+                f"  {label:<22} {stats['threshold_agreement']:>7.1%} "
+                f"{stats['delta_mean']:>8.4f} {stats['delta_max']:>8.4f}"
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""End-to-end worker throughput benchmark against local stand-ins.
+
+Uploads the WAVs under `Test Sounds/` (cycled up to --clips) to S3, inserts
+their pending events and enqueues their jobs, then runs the real worker loop
+(`worker.main.main_loop`) until every event is settled. S3 and SQS come from
+an in-process moto server unless --aws-endpoint points at LocalStack; Mongo
+is --mongo-uri (a local mongod) or mongomock with --mongomock; Postgres is
+DATABASE_URL, e.g. the docker-compose database after `alembic upgrade head`.
+
+Reports clips/sec, p50/p95/p99 per stage (download per clip, inference per
+batch, persist per clip, and enqueue-to-persisted per clip) and the peak RSS
+of each inference process, and writes the same figures as JSON so runs can be
+diffed between commits:
+
+    uv run python scripts/bench_worker_e2e.py --clips 200 --json bench.json
+    uv run python scripts/bench_worker_e2e.py --clips 200 --baseline bench.json
+
+The inference cache is off unless --cache is given, since cycled clips are
+byte-identical, and the in-flight limit and batch size stay at their maximums
+unless --autotune is given. Everything the run creates (a bench owner, home, device,
+events, bucket and queue) is removed afterwards.
+"""
+import argparse
+import json
+import multiprocessing
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import boto3
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import Settings
+from app.db.models import Device, Home, Room, User
+from app.db.session import get_session_local
+from app.services.events_repository import EventsRepository, get_events_repository
+from worker import pipeline as pipeline_module
+from worker.inference_pool import InferencePool
+from worker.main import main_loop
+
+TEST_SOUNDS_DIR = Path(__file__).parent.parent.parent / "Test Sounds"
+SETTLED_STATUSES = ["processed", "skipped_silent", "failed"]
+
+
+class StageTimer:
+    """Wall-clock samples per stage, collected from wrappers around the pipeline's stage calls."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+
+        return timed
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        result = {}
+        for stage, samples in sorted(self.samples.items()):
+            ms = np.array(samples) * 1000
+            result[stage] = {
+                "count": len(samples),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+            }
+        return result
+
+
+class ChildRSSSampler:
+    """Peak RSS (VmHWM) of the worker's child processes, sampled until stopped."""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.peak_mb: dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.sample()
+        self._stop.set()
+        self._thread.join()
+
+    def sample(self) -> None:
+        for child in multiprocessing.active_children():
+            try:
+                with open(f"/proc/{child.pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmHWM:"):
+                            peak = int(line.split()[1]) / 1024
+                            self.peak_mb[child.pid] = max(peak, self.peak_mb.get(child.pid, 0.0))
+            except OSError:
+                continue
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _events_repo(settings: Settings, use_mongomock: bool) -> EventsRepository:
+    if not use_mongomock:
+        return get_events_repository(settings)
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("mongomock is not installed: uv add --dev mongomock (or pass --mongo-uri)")
+
+    return EventsRepository(mongomock.MongoClient())
+
+
+def _create_home(session_factory) -> tuple[str, str, str]:
+    """A throwaway owner, home, room and device. Returns (owner_id, home_id, device_id).
+
+    The home has no contacts, so alerts raised during the run queue no mail.
+    """
+    db = session_factory()
+    try:
+        suffix = uuid.uuid4().hex[:8]
+        owner = User(email=f"bench-{suffix}@example.invalid", password_hash="!", role="owner")
+        db.add(owner)
+        db.flush()
+        home = Home(name=f"Bench home {suffix}", owner_id=owner.id, timezone="UTC")
+        db.add(home)
+        db.flush()
+        room = Room(home_id=home.id, name="Bench room")
+        db.add(room)
+        db.flush()
+        device = Device(home_id=home.id, room_id=room.id, name="Bench mic", type="microphone")
+        db.add(device)
+        db.commit()
+        return str(owner.id), str(home.id), str(device.id)
+    finally:
+        db.close()
+
+
+def _delete_owner(session_factory, owner_id: str) -> None:
+    db = session_factory()
+    try:
+        # Cascades to the home and everything in it
+        db.query(User).filter(User.id == uuid.UUID(owner_id)).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(args) -> dict:
+    moto_server = None
+    endpoint = args.aws_endpoint
+    if endpoint is None:
+        try:
+            from moto.server import ThreadedMotoServer
+        except ImportError:
+            raise SystemExit("moto is not installed: uv add --dev 'moto[server]' (or pass --aws-endpoint)")
+
+        moto_server = ThreadedMotoServer(port=args.moto_port, verbose=False)
+        moto_server.start()
+        endpoint = f"http://127.0.0.1:{args.moto_port}"
+
+    run_id = uuid.uuid4().hex[:8]
+    ready_file = Path(tempfile.gettempdir()) / f"bench-worker-ready-{run_id}"
+    aws = {"region_name": "us-west-2", "aws_access_key_id": "test", "aws_secret_access_key": "test", "endpoint_url": endpoint}
+    s3 = boto3.client("s3", **aws)
+    sqs = boto3.client("sqs", **aws)
+    bucket = f"bench-audio-{run_id}"
+    s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+    queue_url = sqs.create_queue(QueueName=f"bench-ingest-{run_id}")["QueueUrl"]
+
+    overrides = dict(
+        aws_region="us-west-2",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        aws_s3_endpoint_url=endpoint,
+        aws_sqs_endpoint_url=endpoint,
+        s3_bucket=bucket,
+        sqs_queue_url=queue_url,
+        worker_metrics_port=0,
+        worker_ready_file=str(ready_file),
+        worker_inference_cache_enabled=args.cache,
+        worker_autotune_enabled=args.autotune,
+        worker_batch_size=args.batch_size,
+        worker_inference_processes=args.processes,
+    )
+    if args.database_url:
+        overrides["database_url"] = args.database_url
+    if args.mongo_uri:
+        overrides["mongo_uri"] = args.mongo_uri
+    elif args.mongomock:
+        overrides.setdefault("mongo_uri", "mongodb://unused")
+    settings = Settings(**overrides)
+
+    session_factory = get_session_local(settings)
+    events_repo = _events_repo(settings, args.mongomock)
+    owner_id, home_id, device_id = _create_home(session_factory)
+
+    timer = StageTimer()
+    enqueued_at: dict[str, float] = {}
+    handle_result = pipeline_module.handle_result
+
+    def persist(job, *rest, **kwargs):
+        try:
+            return handle_result(job, *rest, **kwargs)
+        finally:
+            timer.add("end_to_end", time.time() - enqueued_at[job["s3_key"]])
+
+    pipeline_module.fetch_audio = timer.wrap("download", pipeline_module.fetch_audio)
+    pipeline_module.handle_result = timer.wrap("persist", persist)
+    InferencePool.predict_batch = timer.wrap("inference_batch", InferencePool.predict_batch)
+
+    paths = sorted(TEST_SOUNDS_DIR.glob("*.wav"))
+    if not paths:
+        raise SystemExit(f"No WAV files found in {TEST_SOUNDS_DIR}")
+    clips = [path.read_bytes() for path in paths]
+
+    stop = threading.Event()
+    worker = threading.Thread(target=main_loop, args=(settings, session_factory, events_repo, stop), daemon=True)
+    sampler = ChildRSSSampler()
+    keys = []
+    try:
+        worker.start()
+        # Let the pool warm up before the clock starts
+        while not ready_file.exists():
+            if not worker.is_alive():
+                raise SystemExit("Worker exited before becoming ready")
+            time.sleep(0.2)
+        sampler.start()
+
+        print(f"Uploading {args.clips} clip(s)...", flush=True)
+        for i in range(args.clips):
+            key = f"audio-clips/bench-{run_id}/{i:06d}.wav"
+            s3.put_object(Bucket=bucket, Key=key, Body=clips[i % len(clips)])
+            events_repo.insert_event(datetime.utcnow(), home_id, device_id, key, duration_ms=0)
+            keys.append(key)
+
+        start = time.perf_counter()
+        for i in range(0, len(keys), 10):
+            entries = []
+            for j, key in enumerate(keys[i : i + 10]):
+                enqueued_at[key] = time.time()
+                body = {"s3_key": key, "home_id": home_id, "device_id": device_id, "timestamp": datetime.utcnow().isoformat()}
+                entries.append({"Id": str(j), "MessageBody": json.dumps(body)})
+            sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+
+        deadline = start + args.timeout
+        settled = 0
+        while time.perf_counter() < deadline:
+            settled = events_repo.events.count_documents({"s3_key": {"$in": keys}, "status": {"$in": SETTLED_STATUSES}})
+            if settled >= len(keys):
+                break
+            time.sleep(0.2)
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+        statuses = {
+            status: events_repo.events.count_documents({"s3_key": {"$in": keys}, "status": status})
+            for status in SETTLED_STATUSES
+        }
+    finally:
+        stop.set()
+        worker.join(timeout=60)
+        events_repo.events.delete_many({"s3_key": {"$in": keys}})
+        _delete_owner(session_factory, owner_id)
+        if moto_server is not None:
+            moto_server.stop()
+
+    return {
+        "commit": _git_commit(),
+        "run_at": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "clips": args.clips,
+            "processes": args.processes,
+            "batch_size": args.batch_size,
+            "inference_cache": args.cache,
+            "autotune": args.autotune,
+            "mongo": "mongomock" if args.mongomock else "mongod",
+            "aws": "moto" if moto_server else endpoint,
+        },
+        "settled": settled,
+        "timed_out": settled < len(keys),
+        "wall_seconds": elapsed,
+        "clips_per_sec": settled / elapsed if elapsed else 0.0,
+        "stages": timer.summary(),
+        "inference_peak_rss_mb": max(sampler.peak_mb.values(), default=0.0),
+        "child_peak_rss_mb": sorted(sampler.peak_mb.values(), reverse=True),
+        "statuses": statuses,
+    }
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    def delta(value: float, old: float | None) -> str:
+        if old in (None, 0):
+            return ""
+        return f" ({(value - old) / old:+.1%})"
+
+    base_stages = (baseline or {}).get("stages", {})
+    print(f"\nCommit {report['commit']}: {report['settled']} clip(s) in {report['wall_seconds']:.1f}s")
+    print(f"Throughput: {report['clips_per_sec']:.2f} clips/sec{delta(report['clips_per_sec'], (baseline or {}).get('clips_per_sec'))}")
+    print(f"Inference process peak RSS: {report['inference_peak_rss_mb']:.0f} MB")
+    print(f"\n{'stage':<16} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage, stats in report["stages"].items():
+        old = base_stages.get(stage, {})
+        print(
+            f"{stage:<16} {stats['count']:>6} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+            f"{stats['p99_ms']:>10.1f}{delta(stats['p95_ms'], old.get('p95_ms'))}"
+        )
+    if report["timed_out"]:
+        print("\nWarning: timed out before every clip was settled")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=0, help="Inference processes (0 = sized from CPUs)")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--cache", action="store_true", help="Leave the inference cache on")
+    parser.add_argument(
+        "--autotune", action="store_true", help="Let the concurrency controller tune limits (default: fixed at max)"
+    )
+    parser.add_argument("--aws-endpoint", help="Use this S3/SQS endpoint (e.g. LocalStack) instead of moto")
+    parser.add_argument("--moto-port", type=int, default=5055)
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    parser.add_argument("--mongo-uri", help="Defaults to MONGO_URI")
+    parser.add_argument("--mongomock", action="store_true", help="Use in-process mongomock instead of a mongod")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for every clip to settle")
+    parser.add_argument("--json", type=Path, help="Write the report here")
+    parser.add_argument("--baseline", type=Path, help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(report, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
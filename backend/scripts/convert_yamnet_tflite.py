@@ -0,0 +1,45 @@
+"""Convert the bundled YAMNet SavedModel to a quantized TFLite model for the worker.
+
+"dynamic" needs nothing else and is also converted on the fly by the worker
+when missing. "int8" calibrates activation ranges on the clips under
+`Test Sounds/` (or --calibration-dir), so use recordings that look like
+production audio.
+
+    uv run python scripts/convert_yamnet_tflite.py --quantization int8
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from worker.audio import load_waveform
+from worker.tflite_engine import QUANTIZATIONS, convert_yamnet, default_model_path
+
+TEST_SOUNDS_DIR = Path(__file__).parent.parent.parent / "Test Sounds"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="dynamic")
+    parser.add_argument("--output", type=Path, help="Defaults to worker/yamnet_<quantization>.tflite")
+    parser.add_argument("--calibration-dir", type=Path, default=TEST_SOUNDS_DIR, help="WAV clips for int8 calibration")
+    args = parser.parse_args()
+
+    waveforms = None
+    if args.quantization == "int8":
+        paths = sorted(args.calibration_dir.glob("*.wav"))
+        if not paths:
+            raise SystemExit(f"No WAV files found in {args.calibration_dir}")
+        waveforms = [load_waveform(path.read_bytes()) for path in paths]
+        print(f"Calibrating on {len(waveforms)} clip(s) from {args.calibration_dir}")
+
+    output = args.output or default_model_path(args.quantization)
+    flatbuffer = convert_yamnet(args.quantization, representative_waveforms=waveforms)
+    output.write_bytes(flatbuffer)
+    print(f"Wrote {output} ({len(flatbuffer) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
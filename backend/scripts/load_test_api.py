@@ -0,0 +1,156 @@
+"""Closed-loop load test of the API's dashboard read endpoints.
+
+Logs in as an owner, then for each --concurrency level runs that many
+clients for --duration seconds, each requesting the next endpoint in the
+mix as soon as its previous response arrives:
+
+    GET /owner/overview?home_id=...
+    GET /owner/events/timeseries?home_id=...
+    GET /alerts?home_id=...
+    GET /devices?home_id=...
+
+Prints requests/sec and p50/p95/p99 latency per endpoint and level, and can
+write the same figures as JSON and diff against an earlier run, e.g. one
+taken before a change:
+
+    uv run uvicorn app.main:app --workers 1 &
+    uv run python scripts/load_test_api.py --concurrency 1 8 32 64 --json after.json
+    uv run python scripts/load_test_api.py --concurrency 1 8 32 64 --baseline before.json
+
+Run the API with a single worker so the figures show one event loop's
+concurrency. Needs httpx (a dev dependency) and a seeded owner with a home
+(scripts/seed_data.py).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:
+    raise SystemExit("httpx is not installed: uv add --dev httpx")
+
+ENDPOINTS = {
+    "overview": "/owner/overview",
+    "timeseries": "/owner/events/timeseries",
+    "alerts": "/alerts",
+    "devices": "/devices",
+}
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> tuple[str, str]:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    body = response.json()
+    home_id = body["user"]["home_id"]
+    if not home_id:
+        raise SystemExit(f"{email} has no home; seed one with scripts/seed_data.py")
+    return body["token"], home_id
+
+
+async def run_level(
+    client: httpx.AsyncClient, home_id: str, names: list[str], concurrency: int, duration: float
+) -> dict:
+    """Run `concurrency` clients for `duration` seconds; return latencies and errors per endpoint."""
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = {name: 0 for name in names}
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < deadline:
+            name = names[i % len(names)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(ENDPOINTS[name], params={"home_id": home_id})
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies[name].append(time.perf_counter() - start)
+            else:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(offset) for offset in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = {}
+    for name in names:
+        samples = latencies[name]
+        result[name] = {
+            "requests": len(samples),
+            "errors": errors[name],
+            "rps": len(samples) / elapsed,
+            "p50_ms": float(np.percentile(samples, 50)) * 1000 if samples else None,
+            "p95_ms": float(np.percentile(samples, 95)) * 1000 if samples else None,
+            "p99_ms": float(np.percentile(samples, 99)) * 1000 if samples else None,
+        }
+    result["total_rps"] = sum(len(latencies[name]) for name in names) / elapsed
+    return result
+
+
+def format_ms(value: float | None) -> str:
+    return f"{value:8.1f}" if value is not None else "     n/a"
+
+
+def print_report(results: dict, baseline: dict | None) -> None:
+    print(f"{'conc':>5} {'endpoint':<11} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for level, by_endpoint in results.items():
+        for name, stats in by_endpoint.items():
+            if name == "total_rps":
+                continue
+            line = (
+                f"{level:>5} {name:<11} {stats['rps']:8.1f} {format_ms(stats['p50_ms'])} "
+                f"{format_ms(stats['p95_ms'])} {format_ms(stats['p99_ms'])} {stats['errors']:7d}"
+            )
+            before = (baseline or {}).get(level, {}).get(name)
+            if before and before["rps"]:
+                line += f"   rps x{stats['rps'] / before['rps']:.2f}"
+            print(line)
+        total = f"{level:>5} {'total':<11} {by_endpoint['total_rps']:8.1f}"
+        before = (baseline or {}).get(level)
+        if before and before["total_rps"]:
+            total += f"   x{by_endpoint['total_rps'] / before['total_rps']:.2f}"
+        print(total)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the API's dashboard read endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="owner@example.com")
+    parser.add_argument("--password", default="owner123")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per concurrency level")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results written earlier with --json")
+    args = parser.parse_args()
+
+    baseline = json.loads(open(args.baseline).read()) if args.baseline else None
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+        token, home_id = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        # One untimed pass so connection pools and caches are warm
+        await run_level(client, home_id, args.endpoints, 1, 1.0)
+
+        results = {}
+        for level in args.concurrency:
+            print(f"Concurrency {level} for {args.duration:.0f}s...", file=sys.stderr)
+            results[str(level)] = await run_level(client, home_id, args.endpoints, level, args.duration)
+
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""Re-score a home's past events after its model configs (thresholds, mappings) change.
+
+Uses the float16 frame scores the worker stores per event, so no audio is
+downloaded and the model is not run. Events processed before frame storage
+was enabled, and streamed long clips, have no stored frames and are skipped.
+
+    uv run python scripts/rescore_home.py --home-id <uuid> --since 2024-01-01 --dry-run
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import Settings
+from app.db.session import get_session_local
+from app.services.events_repository import get_events_repository
+from worker.event_features import EventFeatureStore
+from worker.rescoring import rescore_home
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--home-id", required=True)
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only events at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only events before this time")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args()
+
+    settings = Settings()
+    events_repo = get_events_repository(settings)
+    feature_store = EventFeatureStore(settings, events_repo.db)
+    summary = rescore_home(
+        args.home_id,
+        get_session_local(settings),
+        events_repo,
+        feature_store,
+        since=args.since,
+        until=args.until,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(summary, indent=2))
+    if summary["events"]:
+        print(f"{summary['events'] / max(summary['seconds'], 1e-6):.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
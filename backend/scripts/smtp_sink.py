@@ -0,0 +1,81 @@
+"""Local SMTP stand-in for exercising the notification dispatcher without a real relay.
+
+Accepts every message, prints one line per delivery and, with --mbox, keeps
+them in an mbox file. --delay holds each message for a while to imitate a
+slow relay, and --fail-every refuses every Nth message with a 451 so the
+dispatcher's retries can be watched. Needs aiosmtpd, from the dev dependency
+group (`uv sync`).
+
+    uv run python scripts/smtp_sink.py --port 1025 --delay 2
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false uv run python -m worker.main
+"""
+import argparse
+import asyncio
+import mailbox
+from email import message_from_bytes
+from email.header import decode_header, make_header
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    raise SystemExit("aiosmtpd is not installed: uv sync")
+
+
+class SinkHandler:
+    def __init__(self, delay: float, fail_every: int, mbox_path: str | None):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.mbox = mailbox.mbox(mbox_path) if mbox_path else None
+        self.received = 0
+        self.sessions: set[int] = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        number = self.received
+        if self.fail_every and number % self.fail_every == 0:
+            print(f"#{number} refused (451) for {', '.join(envelope.rcpt_tos)}", flush=True)
+            return "451 Requested action aborted: simulated failure"
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        message = message_from_bytes(envelope.content)
+        subject = str(make_header(decode_header(message.get("Subject", ""))))
+        self.sessions.add(id(session))
+        print(
+            f"#{number} to {', '.join(envelope.rcpt_tos)}: {subject} "
+            f"({len(self.sessions)} connection(s) seen)",
+            flush=True,
+        )
+        if self.mbox is not None:
+            self.mbox.add(message)
+            self.mbox.flush()
+        return "250 Message accepted for delivery"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to hold each message")
+    parser.add_argument("--fail-every", type=int, default=0, help="Refuse every Nth message with a 451")
+    parser.add_argument("--mbox", help="Also append messages to this mbox file")
+    args = parser.parse_args()
+
+    controller = Controller(
+        SinkHandler(args.delay, args.fail_every, args.mbox),
+        hostname=args.host,
+        port=args.port,
+        auth_require_tls=False,
+    )
+    controller.start()
+    print(f"SMTP sink listening on {args.host}:{args.port} (Ctrl+C to stop)", flush=True)
+    try:
+        asyncio.run(asyncio.Event().wait())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
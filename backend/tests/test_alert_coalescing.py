@@ -0,0 +1,146 @@
+"""Folding repeat detections into the open alert, per coalescing scope."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.models import Alert, Device, Home, Room, User
+from worker.alert_coalescing import coalesce_alert
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+TYPE = "Fire / Smoke Alarm"
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as db:
+        yield db
+
+
+@pytest.fixture
+def home(db):
+    """A home with devices d1 and d2 in room r1, d3 in room r2 and d4 in no room."""
+    owner = User(email="owner@example.com", password_hash="x", role="owner")
+    db.add(owner)
+    db.flush()
+    home = Home(owner_id=owner.id, name="home", timezone="UTC")
+    db.add(home)
+    db.flush()
+    rooms = {name: Room(home_id=home.id, name=name) for name in ("r1", "r2")}
+    db.add_all(rooms.values())
+    db.flush()
+    devices = {
+        name: Device(home_id=home.id, room_id=rooms[room].id if room else None, name=name, type="microphone")
+        for name, room in (("d1", "r1"), ("d2", "r1"), ("d3", "r2"), ("d4", None))
+    }
+    db.add_all(devices.values())
+    db.commit()
+    ids = {name: device.id for name, device in devices.items()}
+    ids.update({name: room.id for name, room in rooms.items()}, id=home.id)
+    return ids
+
+
+def add_alert(db, home, device: str, *, age_seconds: float = 60, status: str = "open", alert_type: str = TYPE,
+              last_seen_seconds: float | None = None) -> Alert:
+    device_row = db.get(Device, home[device])
+    alert = Alert(
+        home_id=home["id"],
+        room_id=device_row.room_id,
+        device_id=device_row.id,
+        type=alert_type,
+        severity="high",
+        status=status,
+        score=0.6,
+        occurrences=1,
+        created_at=NOW - timedelta(seconds=age_seconds),
+        last_seen_at=NOW - timedelta(seconds=last_seen_seconds) if last_seen_seconds is not None else None,
+    )
+    db.add(alert)
+    db.commit()
+    return alert
+
+
+def coalesce(db, settings, home, device: str, *, scope: str = "device", window: int = 300,
+             alert_type: str = TYPE, score: float = 0.8) -> Alert | None:
+    settings.worker_alert_coalesce_scope = scope
+    settings.worker_alert_coalesce_seconds = window
+    device_row = db.get(Device, home[device])
+    return coalesce_alert(db, settings, home["id"], device_row.room_id, device_row.id, alert_type, score, NOW)
+
+
+def test_device_scope_merges_detections_from_the_same_device_only(db, settings, home):
+    alert = add_alert(db, home, "d1")
+
+    assert coalesce(db, settings, home, "d2") is None
+    assert coalesce(db, settings, home, "d1") is alert
+
+
+def test_room_scope_merges_detections_from_the_same_room(db, settings, home):
+    alert = add_alert(db, home, "d1")
+
+    assert coalesce(db, settings, home, "d2", scope="room") is alert
+    assert coalesce(db, settings, home, "d3", scope="room") is None
+
+
+def test_room_scope_falls_back_to_the_device_without_a_room(db, settings, home):
+    alert = add_alert(db, home, "d4")
+    add_alert(db, home, "d1")
+
+    assert coalesce(db, settings, home, "d4", scope="room") is alert
+    # d2 joins d1's alert for their room, never the room-less one
+    assert coalesce(db, settings, home, "d2", scope="room").device_id == home["d1"]
+
+
+def test_home_scope_merges_detections_from_anywhere_in_the_home(db, settings, home):
+    alert = add_alert(db, home, "d1")
+
+    assert coalesce(db, settings, home, "d3", scope="home") is alert
+    assert coalesce(db, settings, home, "d4", scope="home") is alert
+
+
+def test_merge_updates_occurrences_score_and_last_seen(db, settings, home):
+    alert = add_alert(db, home, "d1")
+
+    coalesce(db, settings, home, "d1", score=0.9)
+    coalesce(db, settings, home, "d1", score=0.7)
+
+    assert alert.occurrences == 3
+    assert alert.score == pytest.approx(0.9)
+    assert alert.last_seen_at == NOW
+
+
+def test_window_is_measured_from_the_latest_detection(db, settings, home):
+    alert = add_alert(db, home, "d1", age_seconds=600, last_seen_seconds=100)
+
+    assert coalesce(db, settings, home, "d1", window=300) is alert
+
+
+def test_alert_outside_the_window_is_not_merged(db, settings, home):
+    add_alert(db, home, "d1", age_seconds=600)
+    add_alert(db, home, "d2", age_seconds=900, last_seen_seconds=400)
+
+    assert coalesce(db, settings, home, "d1", window=300) is None
+    assert coalesce(db, settings, home, "d2", window=300) is None
+
+
+def test_alert_that_is_not_open_is_not_merged(db, settings, home):
+    add_alert(db, home, "d1", status="acknowledged")
+
+    assert coalesce(db, settings, home, "d1") is None
+
+
+def test_alert_of_another_type_is_not_merged(db, settings, home):
+    add_alert(db, home, "d1", alert_type="Glass Break")
+
+    assert coalesce(db, settings, home, "d1") is None
+
+
+def test_zero_window_disables_coalescing(db, settings, home):
+    add_alert(db, home, "d1")
+
+    assert coalesce(db, settings, home, "d1", window=0) is None
+    assert coalesce(db, settings, home, "d1", window=-1) is None
+
+
+def test_unknown_scope_is_rejected(db, settings, home):
+    with pytest.raises(ValueError, match="WORKER_ALERT_COALESCE_SCOPE"):
+        coalesce(db, settings, home, "d1", scope="building")
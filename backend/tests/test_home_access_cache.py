@@ -0,0 +1,119 @@
+"""Home access checks from the cached home set, and its invalidation when homes or assignments change."""
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+
+from app.db.models import Assignment, User
+from app.deps import get_user_home_access
+from app.routers.admin import create_assignment_admin_endpoint, delete_assignment_admin_endpoint
+from app.services import home_service, user_service
+from app.services.home_access_cache import home_access_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_home_access_cache():
+    home_access_cache.clear()
+    yield
+    home_access_cache.clear()
+
+
+@pytest.fixture
+def users(session_factory) -> dict[str, UUID]:
+    with session_factory() as db:
+        users = {
+            name: User(email=f"{name}@example.com", password_hash="x", role=role)
+            for name, role in (("owner", "owner"), ("neighbour", "owner"), ("technician", "technician"), ("admin", "admin"))
+        }
+        db.add_all(users.values())
+        db.commit()
+        return {name: user.id for name, user in users.items()}
+
+
+def create_home(session_factory, owner_id: UUID, name: str) -> str:
+    with session_factory() as db:
+        return str(home_service.create_home(db, name, owner_id, "UTC").id)
+
+
+def access(session_factory, user_id: UUID, home_id: str | None = None) -> str | None:
+    """get_user_home_access's home, or the HTTP status it refused with."""
+    with session_factory() as db:
+        try:
+            return get_user_home_access(db.get(User, user_id), db, home_id)[1]
+        except HTTPException as e:
+            return e.status_code
+
+
+def test_owner_reaches_own_homes_only(session_factory, users):
+    first = create_home(session_factory, users["owner"], "first")
+    second = create_home(session_factory, users["owner"], "second")
+    other = create_home(session_factory, users["neighbour"], "other")
+
+    assert access(session_factory, users["owner"]) == first
+    assert access(session_factory, users["owner"], second) == second
+    assert access(session_factory, users["owner"], other) == 403
+    assert access(session_factory, users["owner"], "not-a-uuid") == 400
+    assert access(session_factory, users["admin"], other) == other
+
+
+def test_repeat_checks_are_served_without_a_query(session_factory, queries, users):
+    home_id = create_home(session_factory, users["owner"], "home")
+    with session_factory() as db:
+        owner = db.get(User, users["owner"])
+        get_user_home_access(owner, db, home_id)
+        before = queries.count
+        for _ in range(3):
+            assert get_user_home_access(owner, db, home_id)[1] == home_id
+    assert queries.count == before
+
+
+def test_new_and_deleted_homes_are_seen_straight_away(session_factory, users):
+    first = create_home(session_factory, users["owner"], "first")
+    assert access(session_factory, users["owner"], first) == first
+
+    second = create_home(session_factory, users["owner"], "second")
+    assert access(session_factory, users["owner"], second) == second
+
+    with session_factory() as db:
+        home_service.delete_home(db, UUID(second))
+    assert access(session_factory, users["owner"], second) == 403
+
+
+def test_assignment_changes_are_seen_straight_away(session_factory, users):
+    home_id = create_home(session_factory, users["owner"], "home")
+    assert access(session_factory, users["technician"], home_id) == 403
+
+    with session_factory() as db:
+        payload = {"user_id": str(users["technician"]), "home_id": home_id}
+        assignment_id = create_assignment_admin_endpoint(payload, None, db)["id"]
+    assert access(session_factory, users["technician"], home_id) == home_id
+    assert access(session_factory, users["technician"]) == home_id
+
+    with session_factory() as db:
+        delete_assignment_admin_endpoint(UUID(assignment_id), None, db)
+    assert access(session_factory, users["technician"], home_id) == 403
+
+
+def test_home_given_to_another_owner_is_taken_from_the_previous_one(session_factory, users):
+    home_id = create_home(session_factory, users["owner"], "home")
+    assert access(session_factory, users["owner"], home_id) == home_id
+
+    with session_factory() as db:
+        user_service.update_user(db, users["neighbour"], home_id=UUID(home_id))
+
+    assert access(session_factory, users["owner"], home_id) == 403
+    assert access(session_factory, users["neighbour"], home_id) == home_id
+
+
+def test_entry_is_not_used_after_a_role_change(session_factory, users):
+    home_id = create_home(session_factory, users["owner"], "home")
+    with session_factory() as db:
+        db.add(Assignment(user_id=users["technician"], home_id=UUID(home_id), role="technician"))
+        db.commit()
+    assert access(session_factory, users["technician"], home_id) == home_id
+
+    # Changed behind the services' back, so nothing invalidated the entry
+    with session_factory() as db:
+        db.get(User, users["technician"]).role = "owner"
+        db.commit()
+    assert access(session_factory, users["technician"], home_id) == 403
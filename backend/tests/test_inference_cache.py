@@ -0,0 +1,82 @@
+import numpy as np
+
+from tests.test_sqs_loop import make_pipeline
+from worker.event_features import EventFeatureStore
+from worker.inference_cache import InferenceCache
+
+
+class FakeCollection:
+    """The few pymongo collection calls the cache and feature store make, over a dict."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        if doc is None or any(doc.get(field) != value for field, value in query.items()):
+            return None
+        return dict(doc)
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = {**doc, "_id": query["_id"]}
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def model_result() -> dict:
+    frames = {"scores": np.full((3, 521), 0.25, dtype=np.float32), "embeddings": np.ones((3, 1024), dtype=np.float32)}
+    return {
+        "type": "glass_break",
+        "severity": "high",
+        "score": 0.9,
+        "scores": {"glass_break": 0.9},
+        "yamnet_scores": np.full(521, 0.25, dtype=np.float32),
+        "frames": frames,
+    }
+
+
+def event(event_id: str) -> dict:
+    return {"_id": event_id, "home_id": 1, "device_id": event_id + "-device", "timestamp": None}
+
+
+def test_memory_and_mongo_hits_name_the_event_holding_the_frames(settings):
+    db = FakeDatabase()
+    cache = InferenceCache(settings, db)
+    key = cache.key_for(b"clip")
+    cache.put(key, model_result(), "first")
+
+    assert "frames" not in cache.get(key)
+    assert cache.get(key)["features_event_id"] == "first"
+    assert InferenceCache(settings, db).get(key)["features_event_id"] == "first"
+
+
+def test_cache_hit_copies_the_first_events_features(settings):
+    db = FakeDatabase()
+    cache = InferenceCache(settings, db)
+    pipeline = make_pipeline(settings)
+    pipeline.feature_store = store = EventFeatureStore(settings, db)
+    key = cache.key_for(b"clip")
+    result = model_result()
+
+    cache.put(key, result, "first")
+    pipeline._save_frames(event("first"), result)
+    pipeline._save_frames(event("second"), cache.get(key))
+
+    first, second = store.collection.docs["first"], store.collection.docs["second"]
+    assert second["device_id"] == "second-device"
+    assert second["scores"] == first["scores"]
+    assert second["embeddings"] == first["embeddings"]
+
+
+def test_copy_misses_when_the_first_event_has_no_features(settings):
+    store = EventFeatureStore(settings, FakeDatabase())
+
+    assert not store.copy("first", event("second"))
+    assert "second" not in store.collection.docs
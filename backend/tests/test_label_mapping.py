@@ -0,0 +1,140 @@
+"""Per-home label rules: the default mapping, thresholds, enabled flags and params_json overrides."""
+import numpy as np
+import pytest
+
+from worker.label_mapping import (
+    DEFAULT_CLASS_MAPPING,
+    USER_LABELS,
+    HomeRules,
+    LabelMapping,
+    load_yamnet_classes,
+)
+
+CLASSES = load_yamnet_classes()
+
+
+def yamnet_scores(by_class: dict[str, float]) -> np.ndarray:
+    """Clip-level YAMNet scores, zero except for the named classes."""
+    scores = np.zeros(len(CLASSES), dtype=np.float32)
+    for name, value in by_class.items():
+        scores[CLASSES.index(name)] = value
+    return scores
+
+
+def config(enabled: bool = True, threshold: float | None = None, **params) -> dict:
+    return {"enabled": enabled, "threshold": threshold, "params_json": params or None}
+
+
+def old_top_label(mean_scores: np.ndarray) -> tuple[str, float, dict[str, float]]:
+    """The per-class loop ModelRunner.predict used before the mapping was vectorized."""
+    user_scores = {label: 0.0 for label in USER_LABELS}
+    for i, score in enumerate(mean_scores):
+        user_label = DEFAULT_CLASS_MAPPING.get(CLASSES[i])
+        if user_label is not None:
+            user_scores[user_label] = max(user_scores[user_label], float(score))
+    top_label, top_score = max(user_scores.items(), key=lambda item: item[1])
+    return top_label, top_score, user_scores
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_default_mapping_matches_the_per_class_loop(seed):
+    mean_scores = np.random.default_rng(seed).uniform(0, 1, len(CLASSES)).astype(np.float32)
+    top_label, top_score, user_scores = old_top_label(mean_scores)
+
+    for decision in (
+        LabelMapping(CLASSES, DEFAULT_CLASS_MAPPING).decide(mean_scores),
+        HomeRules(CLASSES, {}).evaluate(mean_scores)[0],
+    ):
+        assert decision["type"] == top_label
+        assert decision["score"] == pytest.approx(top_score)
+        assert decision["scores"] == pytest.approx(user_scores)
+
+
+def test_disabled_top_label_falls_through_to_a_passing_lower_label():
+    rules = HomeRules(CLASSES, {"distress_pain": config(enabled=False)})
+    scores = yamnet_scores({"Shout": 0.9, "Cough": 0.7})
+
+    decision, alert = rules.evaluate(scores)
+
+    assert decision["type"] == "Distress / Pain"
+    assert alert == "Coughing"
+    assert rules.disabled_label(decision["scores"]) == "Distress / Pain"
+
+
+def test_no_alert_when_no_enabled_label_passes():
+    rules = HomeRules(CLASSES, {"distress_pain": config(enabled=False)})
+
+    decision, alert = rules.evaluate(yamnet_scores({"Shout": 0.9, "Cough": 0.2}))
+
+    assert alert is None
+    assert rules.disabled_label(decision["scores"]) == "Distress / Pain"
+
+
+def test_missing_threshold_means_the_default():
+    rules = HomeRules(CLASSES, {"coughing": config(threshold=None)})
+
+    assert rules.evaluate(yamnet_scores({"Cough": 0.5}))[1] == "Coughing"
+    assert rules.evaluate(yamnet_scores({"Cough": 0.49}))[1] is None
+
+
+def test_configured_threshold_is_used():
+    rules = HomeRules(CLASSES, {"coughing": config(threshold=0.3)})
+
+    assert rules.evaluate(yamnet_scores({"Cough": 0.35}))[1] == "Coughing"
+    assert rules.evaluate(yamnet_scores({"Cough": 0.25}))[1] is None
+
+
+def test_params_move_classes_between_labels():
+    rules = HomeRules(
+        CLASSES,
+        {
+            "fire_smoke_alarm": config(exclude_yamnet_classes=["Buzzer"], yamnet_classes=["Beep, bleep"]),
+            "door_knock": config(yamnet_classes=["Cough"]),
+            # Shout is not a Coughing class, so excluding it there changes nothing
+            "coughing": config(exclude_yamnet_classes=["Shout"]),
+        },
+    )
+
+    assert rules.evaluate(yamnet_scores({"Buzzer": 0.9}))[1] is None
+    assert rules.evaluate(yamnet_scores({"Beep, bleep": 0.8}))[1] == "Fire / Smoke Alarm"
+
+    decision, alert = rules.evaluate(yamnet_scores({"Cough": 0.8}))
+    assert alert == "Door / Knock"
+    assert decision["scores"]["Coughing"] == 0.0
+    assert rules.evaluate(yamnet_scores({"Shout": 0.8}))[1] == "Distress / Pain"
+
+
+def test_unknown_params_class_is_ignored():
+    rules = HomeRules(CLASSES, {"coughing": config(yamnet_classes=["Not a YAMNet class"])})
+
+    assert rules.evaluate(yamnet_scores({"Cough": 0.8}))[1] == "Coughing"
+
+
+def test_evaluate_batch_agrees_with_evaluate_row_by_row():
+    rules = HomeRules(
+        CLASSES,
+        {
+            "distress_pain": config(enabled=False),
+            "coughing": config(threshold=0.2),
+            "fire_smoke_alarm": config(threshold=0.9, yamnet_classes=["Beep, bleep"]),
+        },
+    )
+    # Sparse rows, so some clips alert and some do not
+    rng = np.random.default_rng(7)
+    batch = rng.uniform(0, 1, (64, len(CLASSES))).astype(np.float32) ** 8
+
+    scores, alerts = rules.evaluate_batch(batch)
+
+    assert (alerts == -1).any() and (alerts >= 0).any()
+    for row, label_scores, alert in zip(batch, scores, alerts):
+        decision, label = rules.evaluate(row)
+        assert dict(zip(USER_LABELS, label_scores.tolist())) == pytest.approx(decision["scores"])
+        assert (USER_LABELS[alert] if alert >= 0 else None) == label
+
+
+def test_urgent_label_considers_enabled_high_severity_labels_only():
+    rules = HomeRules(CLASSES, {"glass_break": config(enabled=False)})
+
+    assert rules.urgent_label(yamnet_scores({"Cough": 0.9})) is None
+    assert rules.urgent_label(yamnet_scores({"Shatter": 0.9})) is None
+    assert rules.urgent_label(yamnet_scores({"Shout": 0.6, "Cough": 0.9})) == "Distress / Pain"
@@ -0,0 +1,104 @@
+"""Packed batch inference must give every clip exactly the result it gets when scored alone."""
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from worker.audio import MIN_PATCH_SAMPLES, MODEL_SAMPLE_RATE, PATCH_HOP_SAMPLES, num_patches  # noqa: E402
+from worker.label_mapping import DEFAULT_CLASS_MAPPING, LabelMapping, load_yamnet_classes  # noqa: E402
+from worker.model_runner import ModelRunner  # noqa: E402
+
+NUM_CLASSES = 521
+EMBEDDING_SIZE = 1024
+# Each 15600-sample patch is summarised as 16 segment means of 975 samples
+SEGMENTS = 16
+
+
+class Output:
+    """Stands in for an eager tensor."""
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+
+    def numpy(self) -> np.ndarray:
+        return self.array
+
+
+class FakeYamnet:
+    """Scores each 0.96 s patch on its own content only, like YAMNet, with fixed random weights."""
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.class_weights = rng.normal(size=(SEGMENTS, NUM_CLASSES)).astype(np.float32)
+        self.embedding_weights = rng.normal(size=(SEGMENTS, EMBEDDING_SIZE)).astype(np.float32)
+        self.calls = 0
+
+    def __call__(self, waveform):
+        self.calls += 1
+        waveform = np.asarray(waveform, dtype=np.float32)
+        patches = num_patches(len(waveform))
+        padded = np.zeros(MIN_PATCH_SAMPLES + (patches - 1) * PATCH_HOP_SAMPLES, dtype=np.float32)
+        padded[: len(waveform)] = waveform
+        features = np.stack(
+            [
+                padded[p * PATCH_HOP_SAMPLES : p * PATCH_HOP_SAMPLES + MIN_PATCH_SAMPLES]
+                .reshape(SEGMENTS, 975)
+                .mean(axis=1)
+                for p in range(patches)
+            ]
+        )
+        scores = 1 / (1 + np.exp(-100 * features @ self.class_weights))
+        embeddings = features @ self.embedding_weights
+        return Output(scores.astype(np.float32)), Output(embeddings.astype(np.float32)), None
+
+
+@pytest.fixture
+def runner() -> ModelRunner:
+    runner = ModelRunner(keep_frames=True)
+    runner.yamnet_model = FakeYamnet()
+    runner.label_mapping = LabelMapping(load_yamnet_classes(), DEFAULT_CLASS_MAPPING)
+    return runner
+
+
+def clip(num_samples: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-1, 1, num_samples).astype(np.float32)
+
+
+def assert_same_result(batched: dict, alone: dict) -> None:
+    assert batched["type"] == alone["type"]
+    assert batched["score"] == alone["score"]
+    assert batched["scores"] == alone["scores"]
+    np.testing.assert_array_equal(batched["yamnet_scores"], alone["yamnet_scores"])
+    np.testing.assert_array_equal(batched["frames"]["scores"], alone["frames"]["scores"])
+    np.testing.assert_array_equal(batched["frames"]["embeddings"], alone["frames"]["embeddings"])
+
+
+@pytest.mark.parametrize("max_batch_seconds", [None, 3.0])
+def test_batched_results_equal_one_call_per_clip(runner, max_batch_seconds):
+    waveforms = [
+        clip(3 * MODEL_SAMPLE_RATE + 123, 1),
+        clip(5000, 2),  # shorter than one patch
+        None,  # failed to decode
+        clip(MIN_PATCH_SAMPLES, 3),
+        clip(5 * PATCH_HOP_SAMPLES + 1, 4),
+        clip(200, 5),
+        clip(10 * MODEL_SAMPLE_RATE, 6),
+    ]
+
+    batched = runner.predict_waveforms(waveforms, max_batch_seconds)
+    batched_calls = runner.yamnet_model.calls
+
+    assert len(batched) == len(waveforms)
+    assert batched[2]["type"] == "error"
+    for waveform, result in zip(waveforms, batched):
+        if waveform is None:
+            continue
+        alone = runner.predict_waveforms([waveform])[0]
+        assert len(result["frames"]["scores"]) == num_patches(len(waveform))
+        assert_same_result(result, alone)
+
+    if max_batch_seconds is None:
+        assert batched_calls == 1
+    else:
+        # Split into several groups, each still holding more than one clip at a time
+        assert 1 < batched_calls < len(waveforms) - 1
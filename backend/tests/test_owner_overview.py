@@ -0,0 +1,106 @@
+"""Owner overview counts, on the async engine for DATABASE_URL (Postgres in CI, SQLite locally)."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models import Alert, Device, Home, Room, User
+from app.db.session import get_async_database_url
+from app.services.owner_analytics_service import get_owner_overview
+
+
+class FakeEventsRepository:
+    async def count_events_last_24h(self, home_id):
+        return 5
+
+
+def utc_midnight(days_ago: int) -> datetime:
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days_ago)
+
+
+async def seed(adb: AsyncSession) -> tuple[Home, dict[str, Room]]:
+    owner = User(email="overview-owner@example.com", password_hash="x", role="owner")
+    adb.add(owner)
+    await adb.flush()
+    home = Home(owner_id=owner.id, name="home", timezone="UTC")
+    adb.add(home)
+    await adb.flush()
+    rooms = {name: Room(home_id=home.id, name=name) for name in ("kitchen", "hall", "empty")}
+    adb.add_all(rooms.values())
+    await adb.flush()
+
+    for room, status in (("kitchen", "online"), ("kitchen", "offline"), ("hall", "online"), (None, "online")):
+        adb.add(Device(home_id=home.id, room_id=rooms[room].id if room else None, name="mic", type="microphone",
+                       status=status))
+
+    def alert(room: str | None, severity: str, created_at: datetime, status: str = "open") -> Alert:
+        return Alert(home_id=home.id, room_id=rooms[room].id if room else None, type="Glass Break",
+                     severity=severity, status=status, created_at=created_at)
+
+    adb.add_all([
+        alert("kitchen", "high", utc_midnight(0) + timedelta(minutes=1)),
+        alert("kitchen", "low", utc_midnight(0) + timedelta(minutes=2), status="closed"),
+        alert("hall", "high", utc_midnight(2) + timedelta(hours=23, minutes=59)),
+        alert("hall", "medium", utc_midnight(2) + timedelta(hours=1)),
+        alert(None, "medium", utc_midnight(6) + timedelta(seconds=1)),
+        # Open, but outside the seven days of the trend
+        alert("kitchen", "high", utc_midnight(7) + timedelta(hours=23)),
+    ])
+    await adb.commit()
+    return home, rooms
+
+
+async def overview(url: str) -> tuple[dict, dict[str, Room], int]:
+    if url.startswith("sqlite"):
+        engine = create_async_engine(url, poolclass=StaticPool)
+    else:
+        engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            # Everything is rolled back, so a shared test database is left as it was
+            async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False) as adb:
+                home, rooms = await seed(adb)
+                selects = []
+                event.listen(engine.sync_engine, "before_cursor_execute",
+                             lambda conn, cursor, statement, *args: selects.append(statement.startswith("SELECT")))
+                result = await get_owner_overview(adb, FakeEventsRepository(), home.id)
+                return result, rooms, sum(selects)
+        finally:
+            await transaction.rollback()
+            await engine.dispose()
+
+
+def test_overview_counts(settings):
+    url = get_async_database_url(settings)
+    pytest.importorskip("aiosqlite" if url.startswith("sqlite") else "asyncpg")
+
+    result, rooms, selects = asyncio.run(overview(url))
+
+    # Devices and open alerts per room, the rooms, and the trend, whatever the number of rooms
+    assert selects == 4
+
+    assert result["openAlertsCount"] == 5
+    assert result["openAlertsHigh"] == 3
+    assert result["totalDevices"] == 4
+    assert result["devicesOnlineCount"] == 3
+    assert result["roomsCount"] == 3
+    assert result["eventsLast24h"] == 5
+    assert sorted(result["perRoomStats"], key=lambda stats: stats["room_name"]) == [
+        {"room_id": str(rooms["empty"].id), "room_name": "empty", "devices_count": 0, "alert_count": 0},
+        {"room_id": str(rooms["hall"].id), "room_name": "hall", "devices_count": 1, "alert_count": 2},
+        {"room_id": str(rooms["kitchen"].id), "room_name": "kitchen", "devices_count": 2, "alert_count": 2},
+    ]
+    assert [trend["date"] for trend in result["alertTrends"]] == [
+        utc_midnight(days_ago).replace(tzinfo=None).isoformat() for days_ago in range(6, -1, -1)
+    ]
+    assert [(t["high"], t["medium"], t["low"]) for t in result["alertTrends"]] == [
+        (0, 1, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0), (1, 1, 0), (0, 0, 0), (1, 0, 1),
+    ]
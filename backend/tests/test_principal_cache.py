@@ -0,0 +1,86 @@
+"""Principal cache hits, token version checks and invalidation by user_service."""
+import pytest
+
+from app.db.models import User
+from app.services import user_service
+from app.services.principal_cache import PrincipalCache, principal_cache
+
+TTL = 60.0
+
+
+@pytest.fixture
+def user_id(session_factory):
+    with session_factory() as db:
+        user = User(email="owner@example.com", password_hash="x", role="owner")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+@pytest.fixture(autouse=True)
+def empty_principal_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+def test_second_lookup_is_served_without_a_query(session_factory, queries, user_id):
+    cache = PrincipalCache()
+    with session_factory() as db:
+        assert cache.get(db, user_id, 0, TTL).email == "owner@example.com"
+    before = queries.count
+
+    with session_factory() as db:
+        user = cache.get(db, user_id, 0, TTL)
+        assert user.email == "owner@example.com"
+        # Attached to the request's session, so relationships still load
+        assert user in db
+    assert queries.count == before
+
+
+def test_token_with_another_version_is_rejected(session_factory, user_id):
+    cache = PrincipalCache()
+    with session_factory() as db:
+        cache.get(db, user_id, 0, TTL)
+        assert cache.get(db, user_id, 1, TTL) is None
+
+
+def test_zero_ttl_disables_the_cache(session_factory, queries, user_id):
+    cache = PrincipalCache()
+    with session_factory() as db:
+        cache.get(db, user_id, 0, 0)
+        before = queries.count
+        db.expunge_all()
+        cache.get(db, user_id, 0, 0)
+    assert queries.count > before
+
+
+def test_update_user_invalidates_the_entry(session_factory, user_id):
+    with session_factory() as db:
+        principal_cache.get(db, user_id, 0, TTL)
+    with session_factory() as db:
+        user_service.update_user(db, user_id, first_name="Ada")
+
+    with session_factory() as db:
+        assert principal_cache.get(db, user_id, 0, TTL).first_name == "Ada"
+
+
+def test_role_change_revokes_existing_tokens(session_factory, user_id):
+    with session_factory() as db:
+        principal_cache.get(db, user_id, 0, TTL)
+    with session_factory() as db:
+        user_service.update_user(db, user_id, role="technician")
+
+    with session_factory() as db:
+        assert principal_cache.get(db, user_id, 0, TTL) is None
+        assert principal_cache.get(db, user_id, 1, TTL).role == "technician"
+
+
+def test_deleted_user_is_not_served_from_the_cache(session_factory, user_id):
+    with session_factory() as db:
+        principal_cache.get(db, user_id, 0, TTL)
+    with session_factory() as db:
+        user_service.delete_user(db, user_id)
+
+    with session_factory() as db:
+        assert principal_cache.get(db, user_id, 0, TTL) is None
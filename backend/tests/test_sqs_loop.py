@@ -0,0 +1,372 @@
+"""SQS acknowledgement batching, visibility heartbeat and retry paths, against a fake SQS client."""
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from worker import sqs_loop
+from worker.pipeline import WorkerPipeline
+from worker.sqs_loop import (
+    AckBuffer,
+    AdaptiveReceiver,
+    VisibilityHeartbeat,
+    change_visibilities,
+    delete_messages,
+    receive_messages,
+)
+
+
+class FakeSQS:
+    """Records batch calls; each call pops the next scripted error, if any, and SQS rejects `rejected` handles."""
+
+    def __init__(self, errors=(), rejected=()):
+        self.errors = list(errors)
+        self.rejected = set(rejected)
+        self.deleted: list[str] = []
+        self.delete_calls: list[list[str]] = []
+        self.visibility_calls: list[list[tuple[str, int]]] = []
+        self.dead_lettered: list[str] = []
+        # Each receive pops a message count or an error to raise; once empty, receives come back full
+        self.receives: list = []
+        self.received = 0
+        self._lock = threading.Lock()
+
+    def _next_error(self):
+        with self._lock:
+            return self.errors.pop(0) if self.errors else None
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        handles = [entry["ReceiptHandle"] for entry in Entries]
+        with self._lock:
+            self.delete_calls.append(handles)
+        error = self._next_error()
+        if error is not None:
+            raise error
+        with self._lock:
+            self.deleted.extend(handle for handle in handles if handle not in self.rejected)
+        return self._failed(handles)
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        with self._lock:
+            self.visibility_calls.append([(entry["ReceiptHandle"], entry["VisibilityTimeout"]) for entry in Entries])
+        error = self._next_error()
+        if error is not None:
+            raise error
+        return self._failed([entry["ReceiptHandle"] for entry in Entries])
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, **kwargs):
+        with self._lock:
+            outcome = self.receives.pop(0) if self.receives else MaxNumberOfMessages
+            if isinstance(outcome, Exception):
+                raise outcome
+            start, self.received = self.received, self.received + outcome
+        return {"Messages": [{"ReceiptHandle": f"m{i}", "Body": "{}"} for i in range(start, start + outcome)]}
+
+    def send_message(self, QueueUrl, MessageBody, MessageAttributes):
+        error = self._next_error()
+        if error is not None:
+            raise error
+        with self._lock:
+            self.dead_lettered.append(MessageBody)
+        return {}
+
+    def _failed(self, handles):
+        return {
+            "Failed": [
+                {"Id": str(i), "Code": "ReceiptHandleIsInvalid", "SenderFault": True}
+                for i, handle in enumerate(handles)
+                if handle in self.rejected
+            ]
+        }
+
+
+def wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def fake_sqs(monkeypatch):
+    def install(errors=(), rejected=()):
+        client = FakeSQS(errors, rejected)
+        monkeypatch.setattr(sqs_loop, "_sqs_client", client)
+        return client
+
+    return install
+
+
+@pytest.fixture
+def ack_settings(settings):
+    settings.worker_sqs_ack_flush_ms = 10
+    return settings
+
+
+def test_acks_are_deleted_in_batches_of_ten(fake_sqs, ack_settings):
+    sqs = fake_sqs()
+    acks = AckBuffer(ack_settings)
+    acks.start()
+    handles = [f"h{i}" for i in range(23)]
+    for handle in handles:
+        acks.add(handle)
+    acks.close()
+
+    assert sorted(sqs.deleted) == sorted(handles)
+    assert all(len(call) <= 10 for call in sqs.delete_calls)
+
+
+def test_delete_messages_reports_connection_errors(fake_sqs, settings):
+    fake_sqs([EndpointConnectionError(endpoint_url="http://sqs")])
+
+    assert delete_messages(settings, ["a"]) is False
+    assert delete_messages(settings, ["a"]) is True
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        EndpointConnectionError(endpoint_url="http://sqs"),
+        ClientError({"Error": {"Code": "InternalError", "Message": "oops"}}, "DeleteMessageBatch"),
+        RuntimeError("unexpected"),
+    ],
+)
+def test_failed_flush_is_retried_and_the_flusher_survives(fake_sqs, ack_settings, error):
+    sqs = fake_sqs([error])
+    acks = AckBuffer(ack_settings)
+    acks.start()
+    acks.add("a")
+    acks.add("b")
+
+    assert wait_until(lambda: sorted(sqs.deleted) == ["a", "b"])
+    assert acks._thread.is_alive()
+    acks.add("c")
+    assert wait_until(lambda: "c" in sqs.deleted)
+    acks.close()
+    assert not acks._thread.is_alive()
+
+
+def test_rejected_entries_are_not_retried(fake_sqs, ack_settings):
+    sqs = fake_sqs(rejected=["stale"])
+    acks = AckBuffer(ack_settings)
+    acks.start()
+    acks.add("stale")
+    acks.add("fresh")
+    acks.close()
+
+    assert sqs.deleted == ["fresh"]
+    # Each handle was sent once
+    assert sorted(handle for call in sqs.delete_calls for handle in call) == ["fresh", "stale"]
+
+
+def test_close_gives_up_on_acks_it_cannot_send(fake_sqs, ack_settings):
+    sqs = fake_sqs([EndpointConnectionError(endpoint_url="http://sqs")] * 10)
+    acks = AckBuffer(ack_settings)
+    acks.start()
+    acks.add("a")
+    acks.close()
+
+    assert not acks._thread.is_alive()
+    assert sqs.deleted == []
+
+
+def make_due(heartbeat: VisibilityHeartbeat) -> None:
+    """Pretend every tracked message is about to become visible again."""
+    now = time.monotonic()
+    with heartbeat._lock:
+        for handle, (received_at, _) in heartbeat._tracked.items():
+            heartbeat._tracked[handle] = (received_at, now)
+
+
+def test_change_visibilities_returns_only_rejected_handles(fake_sqs, settings):
+    fake_sqs(rejected=["b"])
+
+    assert change_visibilities(settings, [("a", 30), ("b", 30), ("c", 30)]) == ["b"]
+
+
+def test_change_visibilities_returns_none_when_the_call_fails(fake_sqs, settings):
+    fake_sqs([EndpointConnectionError(endpoint_url="http://sqs")])
+
+    assert change_visibilities(settings, [("a", 30)]) is None
+
+
+def test_heartbeat_extends_due_messages_and_drops_rejected_ones(fake_sqs, settings):
+    sqs = fake_sqs(rejected=["gone"])
+    heartbeat = VisibilityHeartbeat(settings)
+    for handle in ("a", "gone"):
+        heartbeat.track(handle)
+    make_due(heartbeat)
+
+    heartbeat._extend_due()
+
+    assert sqs.visibility_calls == [[("a", heartbeat.timeout), ("gone", heartbeat.timeout)]]
+    assert list(heartbeat._tracked) == ["a"]
+    # Extended, so not due again on the next tick
+    heartbeat._extend_due()
+    assert len(sqs.visibility_calls) == 1
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        EndpointConnectionError(endpoint_url="http://sqs"),
+        ClientError({"Error": {"Code": "InternalError", "Message": "oops"}}, "ChangeMessageVisibilityBatch"),
+        RuntimeError("unexpected"),
+    ],
+)
+def test_heartbeat_keeps_messages_tracked_after_a_failed_call(fake_sqs, settings, error):
+    sqs = fake_sqs([error])
+    heartbeat = VisibilityHeartbeat(settings)
+    for handle in ("a", "b"):
+        heartbeat.track(handle)
+    make_due(heartbeat)
+
+    heartbeat._extend_due()
+    assert sorted(heartbeat._tracked) == ["a", "b"]
+
+    # Still due, so the next tick tries again
+    heartbeat._extend_due()
+    assert len(sqs.visibility_calls) == 2
+    assert sorted(heartbeat._tracked) == ["a", "b"]
+
+
+def test_heartbeat_thread_survives_unexpected_errors(fake_sqs, settings):
+    settings.worker_sqs_visibility_timeout = 3
+    sqs = fake_sqs([RuntimeError("unexpected")])
+    heartbeat = VisibilityHeartbeat(settings)
+    heartbeat.track("a")
+    make_due(heartbeat)
+    heartbeat.start()
+
+    assert wait_until(lambda: len(sqs.visibility_calls) >= 2, timeout=heartbeat.interval * 3)
+    assert heartbeat._thread.is_alive()
+    heartbeat.close()
+
+
+class FakeInferencePool:
+    processes = 1
+
+
+class FakeEventsRepository:
+    def __init__(self):
+        self.failed: list[str] = []
+
+    def update_event_by_s3_key(self, s3_key, **fields):
+        self.failed.append(s3_key)
+
+
+def make_pipeline(settings) -> WorkerPipeline:
+    return WorkerPipeline(settings, None, FakeEventsRepository(), FakeInferencePool(), None)
+
+
+def make_job(receive_count: int) -> dict:
+    return {
+        "receipt_handle": "r",
+        "s3_key": "audio/clip.wav",
+        "home_id": "h",
+        "device_id": "d",
+        "timestamp": "2024-01-01T00:00:00Z",
+        "receive_count": receive_count,
+    }
+
+
+@pytest.mark.parametrize("error", [EndpointConnectionError(endpoint_url="http://sqs"), RuntimeError("unexpected")])
+def test_fail_does_not_raise_when_the_retry_delay_cannot_be_set(fake_sqs, settings, error):
+    fake_sqs([error])
+    pipeline = make_pipeline(settings)
+    pipeline.submit(make_job(receive_count=1))
+    pipeline.download_queue.get_nowait()
+
+    pipeline._fail(make_job(receive_count=1), "download: boom")
+
+    assert pipeline.in_flight() == 0
+    assert "r" not in pipeline.heartbeat._tracked
+
+
+@pytest.mark.parametrize("error", [EndpointConnectionError(endpoint_url="http://sqs"), RuntimeError("unexpected")])
+def test_fail_keeps_the_message_when_dead_lettering_fails(fake_sqs, settings, error):
+    settings.worker_sqs_dead_letter_queue_url = "http://localhost:4566/000000000000/dlq"
+    sqs = fake_sqs([error])
+    pipeline = make_pipeline(settings)
+
+    pipeline._fail(make_job(receive_count=settings.worker_sqs_max_receives), "persist: boom")
+
+    assert pipeline.events_repo.failed == ["audio/clip.wav"]
+    assert sqs.dead_lettered == []
+    # Not acked: the message times out and is dead-lettered on its next receive
+    assert pipeline.acks._pending == []
+
+
+def test_fail_acks_once_dead_lettered(fake_sqs, settings):
+    settings.worker_sqs_dead_letter_queue_url = "http://localhost:4566/000000000000/dlq"
+    sqs = fake_sqs()
+    pipeline = make_pipeline(settings)
+
+    pipeline._fail(make_job(receive_count=settings.worker_sqs_max_receives), "persist: boom")
+
+    assert len(sqs.dead_lettered) == 1
+    assert pipeline.acks._pending == ["r"]
+
+
+def test_receive_messages_returns_nothing_on_connection_errors(fake_sqs, settings):
+    sqs = fake_sqs()
+    sqs.receives = [EndpointConnectionError(endpoint_url="http://sqs")]
+
+    assert receive_messages(settings) == []
+
+
+def test_receivers_double_while_receives_come_back_full(fake_sqs, settings):
+    settings.worker_sqs_max_receivers = 4
+    fake_sqs()
+    receiver = AdaptiveReceiver(settings, capacity=lambda: 100)
+
+    counts = []
+    for _ in range(4):
+        counts.append(receiver.receivers)
+        assert len(receiver.poll()) == 10 * counts[-1]
+    receiver.close()
+
+    assert counts == [1, 2, 4, 4]
+
+
+def test_receivers_halve_when_a_receive_comes_back_empty(fake_sqs, settings):
+    settings.worker_sqs_max_receivers = 4
+    sqs = fake_sqs()
+    receiver = AdaptiveReceiver(settings, capacity=lambda: 100)
+    receiver.receivers = 4
+    sqs.receives = [10, 0, 10, 10]
+
+    assert len(receiver.poll()) == 30
+    receiver.close()
+
+    assert receiver.receivers == 2
+
+
+def test_receivers_are_limited_by_pipeline_room(fake_sqs, settings):
+    settings.worker_sqs_max_receivers = 4
+    fake_sqs()
+    receiver = AdaptiveReceiver(settings, capacity=lambda: 15)
+    receiver.receivers = 4
+
+    # Room for one full batch only, so one receive asking for at most 10
+    assert len(receiver.poll()) == 10
+    receiver.close()
+
+
+@pytest.mark.parametrize("error", [EndpointConnectionError(endpoint_url="http://sqs"), RuntimeError("unexpected")])
+def test_failed_receiver_does_not_lose_the_others_messages(fake_sqs, settings, error):
+    settings.worker_sqs_max_receivers = 4
+    sqs = fake_sqs()
+    receiver = AdaptiveReceiver(settings, capacity=lambda: 100)
+    receiver.receivers = 4
+    sqs.receives = [10, error, 10, 10]
+
+    messages = receiver.poll()
+    receiver.close()
+
+    assert len(messages) == 30
+    assert len({message["ReceiptHandle"] for message in messages}) == 30
+    assert receiver.receivers == 2
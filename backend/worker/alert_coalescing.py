@@ -0,0 +1,76 @@
+"""Fold repeat detections of an ongoing incident into its open alert instead of inserting new ones."""
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings
+from app.db.models import Alert
+
+COALESCE_SCOPES = ("device", "room", "home")
+
+
+def coalesce_alert(
+    db_session: Session,
+    settings: Settings,
+    home_id: UUID,
+    room_id: UUID | None,
+    device_id: UUID,
+    alert_type: str,
+    score: float,
+    now: datetime,
+) -> Alert | None:
+    """Merge a detection into a matching open alert, if one was active within the coalescing window.
+
+    An open alert of the same type, for the same device, room or home (per
+    WORKER_ALERT_COALESCE_SCOPE), whose latest detection is at most
+    WORKER_ALERT_COALESCE_SECONDS old absorbs the detection: its occurrence
+    count goes up, it keeps the higher score and last_seen_at moves to now.
+    The window therefore slides while an incident keeps being heard. Returns
+    the updated alert, or None when the caller should insert a new one.
+
+    Takes a transaction-scoped advisory lock on (home, type, scope) first,
+    so concurrent workers hearing the same incident agree on one alert; the
+    caller must insert within the same transaction.
+    """
+    window = settings.worker_alert_coalesce_seconds
+    scope = settings.worker_alert_coalesce_scope
+    if window <= 0:
+        return None
+    if scope not in COALESCE_SCOPES:
+        raise ValueError(f"WORKER_ALERT_COALESCE_SCOPE must be one of {COALESCE_SCOPES}, got {scope!r}")
+
+    query = select(Alert).where(
+        Alert.home_id == home_id,
+        Alert.type == alert_type,
+        Alert.status == "open",
+        func.coalesce(Alert.last_seen_at, Alert.created_at) >= now - timedelta(seconds=window),
+    )
+    if scope == "device":
+        query = query.where(Alert.device_id == device_id)
+        scope_id = device_id
+    elif scope == "room":
+        # Devices without a room only coalesce with themselves
+        query = query.where(Alert.room_id == room_id) if room_id else query.where(Alert.device_id == device_id)
+        scope_id = room_id or device_id
+    else:
+        scope_id = home_id
+
+    if db_session.bind.dialect.name == "postgresql":
+        db_session.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"alert:{home_id}:{alert_type}:{scope_id}"},
+        )
+
+    alert = db_session.execute(
+        query.order_by(Alert.created_at.desc()).limit(1).with_for_update()
+    ).scalar_one_or_none()
+    if alert is None:
+        return None
+
+    # The row is locked until the caller commits
+    alert.occurrences += 1
+    alert.score = max(float(alert.score or 0), score)
+    alert.last_seen_at = now
+    return alert
@@ -0,0 +1,312 @@
+"""NumPy audio front-end: WAV decoding and polyphase resampling to the model rate, without TensorFlow."""
+import struct
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+# YAMNet expects 16 kHz mono
+MODEL_SAMPLE_RATE = 16000
+
+# YAMNet framing: 0.96s patches every 0.48s, built from 25ms STFT windows
+# with a 10ms hop. A waveform is padded to at least one full patch.
+PATCH_HOP_SAMPLES = 7680
+MIN_PATCH_SAMPLES = 15600
+
+# Resampling filter: windowed sinc with this many zero crossings per side,
+# Kaiser window with this beta (same design as scipy.signal.resample_poly)
+_FILTER_ZERO_CROSSINGS = 10
+_KAISER_BETA = 5.0
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def num_patches(num_samples: int) -> int:
+    """Number of patches YAMNet produces for a waveform (mirrors yamnet's pad_waveform)."""
+    extra = max(0, num_samples - MIN_PATCH_SAMPLES)
+    return 1 + -(-extra // PATCH_HOP_SAMPLES)
+
+
+def window_geometry(window_seconds: float) -> tuple[int, int, int]:
+    """(patches per window, samples between window starts, samples per window) for streaming.
+
+    Windows start on patch boundaries and overlap by one patch minus one hop,
+    so consecutive windows produce exactly the patches of the whole clip.
+    """
+    hops = max(1, round(window_seconds * MODEL_SAMPLE_RATE / PATCH_HOP_SAMPLES))
+    step = hops * PATCH_HOP_SAMPLES
+    return hops, step, step + MIN_PATCH_SAMPLES - PATCH_HOP_SAMPLES
+
+
+class WavFormat:
+    """The fields of a WAV fmt chunk the decoder needs, plus where the sample data sits."""
+
+    def __init__(self, format_tag: int, channels: int, sample_rate: int, bits_per_sample: int,
+                 data_offset: int, data_size: int):
+        self.format_tag = format_tag
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+        self.data_offset = data_offset
+        self.data_size = data_size
+
+    @property
+    def block_align(self) -> int:
+        return self.channels * self.bits_per_sample // 8
+
+    @property
+    def byte_rate(self) -> int:
+        return self.sample_rate * self.block_align
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.data_size / self.byte_rate if self.byte_rate else 0.0
+
+
+def parse_wav_header(wav_bytes: bytes) -> WavFormat:
+    """Walk the RIFF chunks up to the start of the data chunk."""
+    if len(wav_bytes) < 12 or wav_bytes[:4] != b"RIFF" or wav_bytes[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(wav_bytes):
+        chunk_id = wav_bytes[pos : pos + 4]
+        (chunk_size,) = struct.unpack_from("<I", wav_bytes, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            if body + chunk_size > len(wav_bytes):
+                break
+            if chunk_size < 16:
+                raise ValueError("WAV fmt chunk too short")
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", wav_bytes, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The real format code is the first two bytes of the SubFormat GUID
+                (format_tag,) = struct.unpack_from("<H", wav_bytes, body + 24)
+            fmt = (format_tag, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return WavFormat(*fmt, data_offset=body, data_size=chunk_size)
+        # Chunks are word-aligned
+        pos = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV file has no data chunk (or its header is truncated)")
+
+
+def decode_wav(wav_bytes: bytes) -> tuple[np.ndarray, int]:
+    """Decode a PCM or float WAV to a mono float32 waveform in [-1, 1] and its sample rate.
+
+    Multi-channel audio keeps the first channel, like tf.audio.decode_wav with
+    desired_channels=1. Truncated data (e.g. from a ranged S3 read) is decoded
+    up to the last whole frame.
+    """
+    fmt = parse_wav_header(wav_bytes)
+    _check_layout(fmt)
+    available = min(fmt.data_size, len(wav_bytes) - fmt.data_offset)
+    frames = available // fmt.block_align
+    data = memoryview(wav_bytes)[fmt.data_offset : fmt.data_offset + frames * fmt.block_align]
+    return _decode_frames(data, fmt), fmt.sample_rate
+
+
+def _check_layout(fmt: WavFormat) -> None:
+    if fmt.channels < 1 or fmt.bits_per_sample % 8:
+        raise ValueError(f"Unsupported WAV layout: {fmt.channels} channel(s), {fmt.bits_per_sample} bits")
+    if fmt.format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+        raise ValueError(f"Unsupported WAV format tag: {fmt.format_tag:#x}")
+
+
+def _decode_frames(data: memoryview, fmt: WavFormat) -> np.ndarray:
+    """First channel of whole sample frames as float32 in [-1, 1]."""
+    frames = len(data) // fmt.block_align
+    width = fmt.bits_per_sample // 8
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+        samples = np.frombuffer(data, dtype=f"<f{width}").reshape(frames, fmt.channels)[:, 0]
+        return samples.astype(np.float32)
+    if fmt.format_tag != WAVE_FORMAT_PCM:
+        raise ValueError(f"Unsupported WAV format tag: {fmt.format_tag:#x}")
+
+    if width == 1:
+        # 8-bit PCM is unsigned
+        samples = np.frombuffer(data, dtype=np.uint8).reshape(frames, fmt.channels)[:, 0]
+        return (samples.astype(np.float32) - 128.0) / 128.0
+    if width in (2, 4):
+        samples = np.frombuffer(data, dtype=f"<i{width}").reshape(frames, fmt.channels)[:, 0]
+        return samples.astype(np.float32) / float(2 ** (8 * width - 1))
+    if width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(frames, fmt.channels, 3)[:, 0, :].astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - (1 << 24), samples)
+        return samples.astype(np.float32) / float(1 << 23)
+    raise ValueError(f"Unsupported PCM sample width: {fmt.bits_per_sample} bits")
+
+
+class PolyphaseResampler:
+    """Rational-ratio resampler with a precomputed polyphase FIR filter bank.
+
+    Upsample by L, low-pass, downsample by M, without ever building the
+    upsampled signal: output sample n only needs one of the L filter phases
+    applied to a short run of input samples.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int = MODEL_SAMPLE_RATE):
+        divisor = gcd(source_rate, target_rate)
+        self.up = target_rate // divisor
+        self.down = source_rate // divisor
+
+        max_rate = max(self.up, self.down)
+        half_len = _FILTER_ZERO_CROSSINGS * max_rate
+        taps = np.arange(-half_len, half_len + 1, dtype=np.float64)
+        h = np.sinc(taps / max_rate) * np.kaiser(len(taps), _KAISER_BETA)
+        h *= self.up / h.sum()
+
+        # bank[r, k] = h[r + k * up], reversed along k so each row can be dotted
+        # with a forward-ordered input window
+        self.taps_per_phase = -(-len(h) // self.up)
+        padded = np.zeros(self.taps_per_phase * self.up)
+        padded[: len(h)] = h
+        self.bank = padded.reshape(self.taps_per_phase, self.up).T[:, ::-1].astype(np.float32)
+        self.delay = half_len
+
+    def output_length(self, num_samples: int) -> int:
+        return -(-num_samples * self.up // self.down)
+
+    def _input_index(self, n: int) -> int:
+        """Newest input sample that output sample n depends on."""
+        return (n * self.down + self.delay) // self.up
+
+    def _apply(self, x: np.ndarray, x_start: int, n0: int, n1: int) -> np.ndarray:
+        """Output samples [n0, n1) from input x, whose first element is input sample x_start.
+
+        x must cover every input sample the outputs depend on; samples before
+        the signal start (negative indices) or after its end are zeros.
+        """
+        up, down, k = self.up, self.down, self.taps_per_phase
+        out = np.empty(max(0, n1 - n0), dtype=np.float32)
+        windows = np.lib.stride_tricks.sliding_window_view(x, k)
+
+        # Outputs n, n + up, n + 2*up, ... share a filter phase and step through
+        # the input by `down` samples, so each group is one matrix-vector product.
+        for q in range(min(up, len(out))):
+            start, phase = divmod((n0 + q) * down + self.delay, up)
+            start -= k - 1 + x_start
+            count = len(range(q, len(out), up))
+            out[q::up] = windows[start : start + count * down : down] @ self.bank[phase]
+        return out
+
+    def __call__(self, waveform: np.ndarray) -> np.ndarray:
+        stream = self.stream()
+        return np.concatenate([stream.feed(waveform), stream.flush()])
+
+    def stream(self) -> "ResamplerStream":
+        return ResamplerStream(self)
+
+
+class ResamplerStream:
+    """Incremental use of a PolyphaseResampler; feed() + flush() equals one whole-signal call."""
+
+    def __init__(self, resampler: PolyphaseResampler):
+        self.resampler = resampler
+        k = resampler.taps_per_phase
+        # Input history, starting with the zeros before the signal
+        self._buffer = np.zeros(k - 1, dtype=np.float32)
+        self._buffer_start = -(k - 1)
+        self._total_in = 0
+        self._total_out = 0
+
+    def feed(self, samples: np.ndarray) -> np.ndarray:
+        """Resampled output that the input so far fully determines."""
+        r = self.resampler
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False)])
+        self._total_in += len(samples)
+        # Output n is ready once input sample _input_index(n) has arrived
+        ready = max(0, -(-(self._total_in * r.up - r.delay) // r.down))
+        return self._emit(ready)
+
+    def flush(self) -> np.ndarray:
+        """The remaining output, treating the signal as ended."""
+        r = self.resampler
+        end = r.output_length(self._total_in)
+        if end > self._total_out:
+            needed = r._input_index(end - 1) + 1 - (self._buffer_start + len(self._buffer))
+            if needed > 0:
+                self._buffer = np.concatenate([self._buffer, np.zeros(needed, np.float32)])
+        return self._emit(end)
+
+    def _emit(self, end: int) -> np.ndarray:
+        r = self.resampler
+        if end <= self._total_out:
+            return np.empty(0, dtype=np.float32)
+        out = r._apply(self._buffer, self._buffer_start, self._total_out, end)
+        self._total_out = end
+        # Drop input no later output can reach
+        keep_from = r._input_index(end) - (r.taps_per_phase - 1)
+        drop = keep_from - self._buffer_start
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._buffer_start = keep_from
+        return out
+
+
+@lru_cache(maxsize=16)
+def get_resampler(source_rate: int, target_rate: int = MODEL_SAMPLE_RATE) -> PolyphaseResampler:
+    """Resampler for a source rate, built once per process."""
+    return PolyphaseResampler(source_rate, target_rate)
+
+
+def load_waveform(wav_bytes: bytes) -> np.ndarray:
+    """Decode WAV bytes to the mono float32 16 kHz waveform the model expects."""
+    waveform, sample_rate = decode_wav(wav_bytes)
+    if sample_rate != MODEL_SAMPLE_RATE:
+        waveform = get_resampler(sample_rate)(waveform)
+    return waveform
+
+
+class WaveformStream:
+    """Decodes a WAV byte stream chunk by chunk into 16 kHz mono float32 samples.
+
+    feed() accepts arbitrary byte chunks (the header may span several) and
+    returns whatever samples are complete; finish() returns the rest.
+    """
+
+    # Give up looking for the data chunk after this much header
+    MAX_HEADER_BYTES = 1 << 20
+
+    def __init__(self):
+        self.format: WavFormat | None = None
+        self._pending = b""
+        self._data_remaining = 0
+        self._resampler: ResamplerStream | None = None
+
+    def feed(self, chunk: bytes) -> np.ndarray:
+        self._pending += chunk
+        if self.format is None:
+            try:
+                self.format = parse_wav_header(self._pending)
+            except ValueError:
+                if len(self._pending) > self.MAX_HEADER_BYTES:
+                    raise
+                # Header not complete yet; unless it is plainly not a WAV
+                if len(self._pending) >= 12 and not (self._pending[:4] == b"RIFF" and self._pending[8:12] == b"WAVE"):
+                    raise
+                return np.empty(0, dtype=np.float32)
+            _check_layout(self.format)
+            self._pending = self._pending[self.format.data_offset :]
+            self._data_remaining = self.format.data_size
+            if self.format.sample_rate != MODEL_SAMPLE_RATE:
+                self._resampler = get_resampler(self.format.sample_rate).stream()
+
+        # Ignore anything after the data chunk
+        usable = min(len(self._pending), self._data_remaining)
+        whole = usable - usable % self.format.block_align
+        samples = _decode_frames(memoryview(self._pending)[:whole], self.format)
+        self._pending = self._pending[whole:]
+        self._data_remaining -= whole
+        return self._resampler.feed(samples) if self._resampler else samples
+
+    def finish(self) -> np.ndarray:
+        if self.format is None:
+            raise ValueError("WAV stream ended before the data chunk")
+        return self._resampler.flush() if self._resampler else np.empty(0, dtype=np.float32)
@@ -0,0 +1,134 @@
+"""AIMD control of the worker's in-flight job limit and batch size against a target end-to-end latency."""
+import logging
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+
+from app.core.config import Settings
+from worker.metrics import (
+    BATCH_SIZE_LIMIT,
+    IN_FLIGHT_LIMIT,
+    JOB_LATENCY_SECONDS,
+    SQS_BACKLOG,
+    SQS_MESSAGE_AGE_SECONDS,
+)
+from worker.sqs_loop import queue_depth
+
+logger = logging.getLogger(__name__)
+
+# Multiplicative decrease applied when the latency target is missed
+DECREASE_FACTOR = 0.7
+# Share of the in-flight limit in use before more backlog is worth taking on
+BUSY_FRACTION = 0.8
+
+
+class ConcurrencyController:
+    """Adjusts how many jobs the worker holds and how large its inference batches get.
+
+    Every WORKER_AUTOTUNE_INTERVAL_SECONDS it reads the queue backlog, the
+    age of the oldest message received since the last round, and the p95
+    end-to-end latency (SQS send to persisted) of first-attempt jobs:
+
+    - p95 above WORKER_TARGET_LATENCY_SECONDS: the in-flight limit and the
+      batch size are cut multiplicatively, leaving the backlog in SQS where
+      an autoscaler can see it instead of queued inside this worker.
+    - otherwise, with a backlog waiting and the limit nearly used up: the
+      limit grows by one batch and the batch size by one clip.
+
+    Backlog and message age are exported whether or not tuning is enabled.
+    """
+
+    def __init__(self, settings: Settings, in_flight: Callable[[], int], max_in_flight: int):
+        self.settings = settings
+        self.in_flight = in_flight
+        self.min_in_flight = max(1, min(settings.worker_min_in_flight, max_in_flight))
+        self.max_in_flight = max_in_flight
+        self.max_batch_size = settings.worker_batch_size
+        if settings.worker_autotune_enabled:
+            # Start small and let additive increase find the level the target allows
+            self.limit = self.min_in_flight
+        else:
+            self.limit = max_in_flight
+        self.batch_size = self.max_batch_size
+
+        self._latencies: list[float] = []
+        self._oldest_age = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="concurrency", daemon=True)
+        IN_FLIGHT_LIMIT.set(self.limit)
+        BATCH_SIZE_LIMIT.set(self.batch_size)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def received(self, job: dict) -> None:
+        """Note a job's time in the queue when it is taken from SQS."""
+        if job.get("sent_at") is None:
+            return
+        age = time.time() - job["sent_at"]
+        with self._lock:
+            self._oldest_age = max(self._oldest_age, age)
+
+    def completed(self, job: dict) -> None:
+        """Record a finished job's end-to-end latency.
+
+        Redelivered jobs are left out: their send time predates the failed
+        attempts, so they would read as slow even when the worker is not.
+        """
+        if job.get("sent_at") is None or job.get("receive_count", 1) > 1:
+            return
+        latency = time.time() - job["sent_at"]
+        JOB_LATENCY_SECONDS.observe(latency)
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.settings.worker_autotune_interval_seconds):
+            try:
+                self._adjust()
+            except Exception:
+                logger.exception("Concurrency adjustment failed")
+
+    def _adjust(self) -> None:
+        with self._lock:
+            latencies, self._latencies = self._latencies, []
+            oldest_age, self._oldest_age = self._oldest_age, 0.0
+        SQS_MESSAGE_AGE_SECONDS.set(oldest_age)
+
+        depth = queue_depth(self.settings)
+        for state, count in depth.items():
+            SQS_BACKLOG.labels(state=state).set(count)
+        if not self.settings.worker_autotune_enabled:
+            return
+
+        p95 = float(np.percentile(latencies, 95)) if latencies else None
+        target = self.settings.worker_target_latency_seconds
+        limit, batch_size = self.limit, self.batch_size
+        if p95 is not None and p95 > target:
+            limit = max(self.min_in_flight, int(limit * DECREASE_FACTOR))
+            batch_size = max(1, int(batch_size * DECREASE_FACTOR))
+        elif depth.get("visible", 0) > 0 and self.in_flight() >= BUSY_FRACTION * limit:
+            limit = min(self.max_in_flight, limit + batch_size)
+            batch_size = min(self.max_batch_size, batch_size + 1)
+
+        if (limit, batch_size) != (self.limit, self.batch_size):
+            logger.info(
+                "In-flight limit %d -> %d, batch size %d -> %d (p95 %s, backlog %d, oldest %.0fs)",
+                self.limit,
+                limit,
+                self.batch_size,
+                batch_size,
+                f"{p95:.1f}s" if p95 is not None else "n/a",
+                depth.get("visible", 0),
+                oldest_age,
+            )
+            self.limit, self.batch_size = limit, batch_size
+            IN_FLIGHT_LIMIT.set(limit)
+            BATCH_SIZE_LIMIT.set(batch_size)
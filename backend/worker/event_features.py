@@ -0,0 +1,91 @@
+"""Per-event YAMNet frame scores and embeddings, kept as float16 so history can be re-scored without the audio."""
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+import numpy as np
+from pymongo import ASCENDING
+from pymongo.database import Database
+
+from app.core.config import Settings
+from worker.inference_cache import model_version
+
+
+class EventFeatureStore:
+    """The event_features collection: one document per processed event, keyed by the event's _id.
+
+    Frame scores (frames x 521) and embeddings (frames x 1024) are stored as
+    raw little-endian float16 bytes, about 3 KB per 0.48 s frame. They live
+    beside the events collection rather than inside it so event queries
+    don't pull the arrays.
+    """
+
+    def __init__(self, settings: Settings, db: Database):
+        self.model_version = model_version(settings)
+        self.collection = db["event_features"]
+        self.collection.create_index([("home_id", ASCENDING), ("timestamp", ASCENDING)])
+
+    def save(self, event: dict, frames: dict[str, Optional[np.ndarray]]) -> None:
+        """Store a result's frame outputs for its event, replacing any earlier copy."""
+        scores = np.asarray(frames["scores"], dtype="<f2")
+        embeddings = frames.get("embeddings")
+        doc = {
+            "home_id": event["home_id"],
+            "device_id": event["device_id"],
+            "timestamp": event.get("timestamp"),
+            "model_version": self.model_version,
+            "frames": scores.shape[0],
+            "classes": scores.shape[1],
+            "scores": scores.tobytes(),
+            "embedding_dim": embeddings.shape[1] if embeddings is not None else 0,
+            "embeddings": np.asarray(embeddings, dtype="<f2").tobytes() if embeddings is not None else None,
+            "created_at": datetime.utcnow(),
+        }
+        self.collection.replace_one({"_id": event["_id"]}, doc, upsert=True)
+
+    def copy(self, source_event_id: Any, event: dict) -> bool:
+        """Store another event's frame outputs for this event, e.g. for a duplicate clip.
+
+        Returns False if the source event has no features (yet).
+        """
+        doc = self.collection.find_one({"_id": source_event_id, "model_version": self.model_version})
+        if doc is None:
+            return False
+        doc.update(
+            _id=event["_id"],
+            home_id=event["home_id"],
+            device_id=event["device_id"],
+            timestamp=event.get("timestamp"),
+            created_at=datetime.utcnow(),
+        )
+        self.collection.replace_one({"_id": event["_id"]}, doc, upsert=True)
+        return True
+
+    def iter_home(
+        self,
+        home_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        with_embeddings: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """A home's feature documents for this model version, oldest first."""
+        query: dict[str, Any] = {"home_id": home_id, "model_version": self.model_version}
+        if since or until:
+            query["timestamp"] = {}
+            if since:
+                query["timestamp"]["$gte"] = since
+            if until:
+                query["timestamp"]["$lt"] = until
+        projection = None if with_embeddings else {"embeddings": 0}
+        return self.collection.find(query, projection).sort("timestamp", ASCENDING)
+
+
+def frame_scores(doc: dict) -> np.ndarray:
+    """(frames, classes) float16 scores of a feature document, without copying."""
+    return np.frombuffer(doc["scores"], dtype="<f2").reshape(doc["frames"], doc["classes"])
+
+
+def frame_embeddings(doc: dict) -> Optional[np.ndarray]:
+    """(frames, embedding_dim) float16 embeddings, or None if the engine produced none."""
+    if not doc.get("embeddings"):
+        return None
+    return np.frombuffer(doc["embeddings"], dtype="<f2").reshape(doc["frames"], doc["embedding_dim"])
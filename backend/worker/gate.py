@@ -0,0 +1,74 @@
+"""Cheap energy / spectral-flux pre-gate that skips YAMNet for near-silent clips."""
+from typing import Any
+
+import numpy as np
+
+from app.core.config import Settings
+
+# Per-home overrides live in the home's "audio_gate" model config params_json
+GATE_CONFIG_KEY = "audio_gate"
+
+_EPS = 1e-10
+
+
+def _dbfs(amplitude: float) -> float:
+    return float(20.0 * np.log10(amplitude + _EPS))
+
+
+def compute_features(waveform: np.ndarray, sample_rate: int) -> dict[str, float]:
+    """RMS, peak and max spectral flux of a waveform, all in dBFS.
+
+    Spectral flux is the positive frame-to-frame change of the magnitude
+    spectrum (32 ms Hann frames, 16 ms hop). It stays low for steady room
+    tone and jumps on onsets, so short quiet transients are not gated out
+    just because the clip's RMS is low.
+    """
+    if waveform.size == 0:
+        return {"rms_dbfs": _dbfs(0.0), "peak_dbfs": _dbfs(0.0), "flux_dbfs": _dbfs(0.0)}
+
+    rms = float(np.sqrt(np.mean(np.square(waveform, dtype=np.float64))))
+    peak = float(np.max(np.abs(waveform)))
+
+    frame = max(16, int(0.032 * sample_rate))
+    hop = frame // 2
+    flux = 0.0
+    if waveform.size >= frame + hop:
+        frames = np.lib.stride_tricks.sliding_window_view(waveform, frame)[::hop]
+        window = np.hanning(frame).astype(np.float32)
+        # Amplitude-scaled spectrum: a full-scale sine peaks at ~1.0 in its bin
+        magnitudes = np.abs(np.fft.rfft(frames * window, axis=1)) * (2.0 / window.sum())
+        rise = np.maximum(np.diff(magnitudes, axis=0), 0.0)
+        flux = float(np.sqrt(np.mean(np.square(rise), axis=1)).max())
+
+    return {"rms_dbfs": _dbfs(rms), "peak_dbfs": _dbfs(peak), "flux_dbfs": _dbfs(flux)}
+
+
+def gate_floors(settings: Settings, home_configs: dict[str, dict]) -> dict[str, Any] | None:
+    """Effective gate floors for a home, or None if gating is off for it.
+
+    The home's "audio_gate" model config can disable the gate (enabled=false)
+    or override any floor through params_json, e.g. {"rms_floor_dbfs": -60}.
+    """
+    floors = {
+        "rms_floor_dbfs": settings.worker_gate_rms_floor_dbfs,
+        "peak_floor_dbfs": settings.worker_gate_peak_floor_dbfs,
+        "flux_floor_dbfs": settings.worker_gate_flux_floor_dbfs,
+    }
+    config = home_configs.get(GATE_CONFIG_KEY)
+    if config:
+        if not config["enabled"]:
+            return None
+        params = config.get("params_json") or {}
+        floors.update({key: float(params[key]) for key in floors if params.get(key) is not None})
+    elif not settings.worker_gate_enabled:
+        return None
+    return floors
+
+
+def is_silent(features: dict[str, float], floors: dict[str, Any]) -> bool:
+    """A clip is silent only if it is below every floor."""
+    return (
+        features["rms_dbfs"] < floors["rms_floor_dbfs"]
+        and features["peak_dbfs"] < floors["peak_floor_dbfs"]
+        and features["flux_dbfs"] < floors["flux_floor_dbfs"]
+    )
@@ -0,0 +1,116 @@
+"""Inference result cache keyed by audio content hash, so identical clips are only scored once."""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+import numpy as np
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import Settings
+from worker.metrics import INFERENCE_CACHE_HITS, INFERENCE_CACHE_MISSES
+
+logger = logging.getLogger(__name__)
+
+# Fields of a decision result that are worth keeping
+_RESULT_FIELDS = ("type", "severity", "score", "scores")
+
+
+def model_version(settings: Settings) -> str:
+    """Version tag for stored model outputs; quantized engines never share entries with the SavedModel."""
+    if settings.worker_inference_engine == "tflite":
+        return f"{settings.worker_model_version}-tflite-{settings.worker_tflite_quantization}"
+    return settings.worker_model_version
+
+
+class InferenceCache:
+    """Two-level cache of model results: an in-process LRU in front of a Mongo collection.
+
+    Entries are keyed by the SHA-256 of the clip bytes plus the model version,
+    so SQS redeliveries and byte-identical re-uploads reuse the first result
+    and a model change never returns stale scores. Both levels expire entries
+    after WORKER_INFERENCE_CACHE_TTL_SECONDS; Mongo does it with a TTL index.
+    """
+
+    def __init__(self, settings: Settings, db: Database):
+        self.model_version = model_version(settings)
+        self.ttl_seconds = settings.worker_inference_cache_ttl_seconds
+        self.max_entries = settings.worker_inference_cache_max_entries
+        self.collection = db["inference_cache"]
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        try:
+            self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        except OperationFailure as e:
+            # An index with a different TTL already exists; keep it rather than fail startup
+            logger.warning("Could not create TTL index: %s", e)
+
+    def key_for(self, wav_bytes: bytes) -> str:
+        return f"{hashlib.sha256(wav_bytes).hexdigest()}:{self.model_version}"
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Cached result for a key, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                INFERENCE_CACHE_HITS.labels(level="memory").inc()
+                return dict(entry[1])
+            if entry:
+                del self._entries[key]
+
+        try:
+            doc = self.collection.find_one({"_id": key})
+        except PyMongoError as e:
+            logger.warning("Lookup failed: %s", e)
+            doc = None
+        if doc is None:
+            INFERENCE_CACHE_MISSES.inc()
+            return None
+
+        result = {field: doc[field] for field in _RESULT_FIELDS}
+        result["yamnet_scores"] = np.frombuffer(doc["yamnet_scores"], dtype=np.float32)
+        if doc.get("features_event_id") is not None:
+            result["features_event_id"] = doc["features_event_id"]
+        self._remember(key, result)
+        INFERENCE_CACHE_HITS.labels(level="mongo").inc()
+        return dict(result)
+
+    def put(self, key: str, result: dict[str, Any], features_event_id: Any = None) -> None:
+        """Store a model result. Error results and results without raw scores are not cached.
+
+        Per-frame outputs are left out; they are kept per event instead.
+        features_event_id names the event whose event_features document holds
+        them, and comes back with every hit so the features can be copied to
+        the new event.
+        """
+        if result.get("type") == "error" or result.get("yamnet_scores") is None:
+            return
+        result = {field: value for field, value in result.items() if field != "frames"}
+        if features_event_id is not None:
+            result["features_event_id"] = features_event_id
+        self._remember(key, result)
+        doc = {field: result[field] for field in _RESULT_FIELDS}
+        doc.update(
+            features_event_id=result.get("features_event_id"),
+            model_version=self.model_version,
+            yamnet_scores=np.asarray(result["yamnet_scores"], dtype=np.float32).tobytes(),
+            created_at=datetime.utcnow(),
+        )
+        try:
+            self.collection.replace_one({"_id": key}, doc, upsert=True)
+        except PyMongoError as e:
+            logger.warning("Store failed: %s", e)
+
+    def _remember(self, key: str, result: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,296 @@
+"""Pool of model-holding processes for YAMNet inference."""
+import logging
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from app.core.config import Settings
+from worker.audio import MODEL_SAMPLE_RATE, load_waveform, window_geometry
+from worker.metrics import INFERENCE_POOL_PENDING, STAGE_SECONDS
+from worker.shm_ring import SharedAudioRing, read_slot
+from worker.startup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Imported once by the forkserver so each inference process starts with
+# TensorFlow already in memory. Nothing here runs a TensorFlow op, which
+# would make the forked children unsafe.
+_FORKSERVER_PRELOAD = ["numpy", "tensorflow", "tensorflow_hub", "worker.model_runner"]
+
+# TensorFlow model is kept in separate processes to avoid memory corruption
+_model_runner = None
+# (name, slots, slot_samples) of the parent's shared audio ring, if any
+_ring_spec: tuple[str, int, int] | None = None
+
+
+def available_cpus() -> list[int]:
+    """CPUs this process may run on, trimmed to the container's CPU quota if one is set."""
+    try:
+        cpus = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = list(range(os.cpu_count() or 1))
+
+    # cgroup v2 quota, e.g. "200000 100000" for 2 CPUs; "max" means unlimited
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = cpus[: max(1, int(quota) // int(period))]
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def resolve_process_count(settings: Settings) -> int:
+    """Number of inference processes: the configured value, or one per intra-op thread group of CPUs."""
+    if settings.worker_inference_processes > 0:
+        return settings.worker_inference_processes
+    threads = max(1, settings.worker_tf_intra_op_threads)
+    return max(1, len(available_cpus()) // threads)
+
+
+def warmup_plan(settings: Settings) -> tuple[list[int], int, float]:
+    """(clip lengths in samples, batch size, max batch seconds) each inference process warms up with.
+
+    Covers the configured clip lengths, plus the streaming window when
+    long clips are streamed.
+    """
+    clip_samples = {int(seconds * MODEL_SAMPLE_RATE) for seconds in settings.worker_warmup_clip_seconds}
+    if clip_samples and settings.worker_stream_enabled:
+        clip_samples.add(window_geometry(settings.worker_stream_window_seconds)[2])
+    return sorted(clip_samples), settings.worker_batch_size, settings.worker_batch_max_audio_seconds
+
+
+def _init_model_runner(
+    process_counter=None,
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+    pin_cpus: bool = False,
+    ring_spec: tuple[str, int, int] | None = None,
+    warmup: tuple[list[int], int, float] | None = None,
+    ready_counter=None,
+    runner_options: dict | None = None,
+    log_level: str | None = None,
+) -> None:
+    """Initialize TensorFlow model runner in the subprocess.
+
+    The pool only hands tasks to a process once this returns, so a process
+    that warms up here never scores a real clip cold, including processes
+    the pool starts to replace ones that died.
+    """
+    global _model_runner, _ring_spec
+    if _model_runner is not None:
+        return
+    _ring_spec = ring_spec
+    if log_level:
+        configure_logging(log_level)
+
+    if process_counter is not None:
+        with process_counter.get_lock():
+            index = process_counter.value
+            process_counter.value += 1
+        if pin_cpus and intra_op_threads > 0:
+            cpus = available_cpus()
+            start = (index * intra_op_threads) % len(cpus)
+            pinned = {cpus[(start + i) % len(cpus)] for i in range(intra_op_threads)}
+            os.sched_setaffinity(0, pinned)
+            logger.info("Process %d pinned to CPUs %s", index, sorted(pinned))
+
+    # Thread pools must be sized before TensorFlow runs its first op
+    import tensorflow as tf
+
+    if intra_op_threads > 0:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads > 0:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    from worker.model_runner import ModelRunner
+
+    start = time.perf_counter()
+    _model_runner = ModelRunner(**(runner_options or {}))
+    _model_runner.load()
+    loaded = time.perf_counter() - start
+
+    if warmup:
+        warmup_seconds = _model_runner.warmup(*warmup)
+        logger.info(
+            "Process %d loaded in %.1fs, warmed %d length(s) in %.1fs",
+            os.getpid(),
+            loaded,
+            len(warmup[0]),
+            warmup_seconds,
+        )
+    if ready_counter is not None:
+        with ready_counter.get_lock():
+            ready_counter.value += 1
+
+
+def _run_inference(wav_bytes: bytes) -> dict:
+    """Run inference using the subprocess-held model runner."""
+    if _model_runner is None:
+        _init_model_runner()
+    return _model_runner.predict(wav_bytes)
+
+
+def _run_inference_batch(wav_list: list[bytes], max_batch_seconds: float) -> list[dict]:
+    """Run batched inference using the subprocess-held model runner."""
+    if _model_runner is None:
+        _init_model_runner()
+    return _model_runner.predict_batch(wav_list, max_batch_seconds)
+
+
+def _run_inference_waveforms(items: list, max_batch_seconds: float) -> list[dict]:
+    """Run batched inference on decoded waveforms.
+
+    Each item is a (slot, length) pair in the shared audio ring, a float32
+    array sent by value, or None for a clip the parent could not decode.
+    """
+    if _model_runner is None:
+        _init_model_runner()
+    waveforms = [read_slot(*_ring_spec, *item) if isinstance(item, tuple) else item for item in items]
+    return _model_runner.predict_waveforms(waveforms, max_batch_seconds)
+
+
+def _run_window(item, window_patches: int) -> tuple[np.ndarray, np.ndarray]:
+    """Score one streaming window, given as a ring slot or an array."""
+    if _model_runner is None:
+        _init_model_runner()
+    waveform = read_slot(*_ring_spec, *item) if isinstance(item, tuple) else item
+    return _model_runner.score_window(waveform, window_patches)
+
+
+class InferencePool:
+    """A fixed set of spawned processes, each holding its own loaded model."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.processes = resolve_process_count(settings)
+
+        self.ring: SharedAudioRing | None = None
+        if settings.worker_shm_enabled:
+            slots = settings.worker_shm_slots or self.processes * settings.worker_batch_size
+            self.ring = SharedAudioRing(slots, int(settings.worker_shm_slot_seconds * MODEL_SAMPLE_RATE))
+        ring_spec = (self.ring.name, self.ring.slots, self.ring.slot_samples) if self.ring else None
+
+        start_method = settings.worker_mp_start_method
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"
+        mp_ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            mp_ctx.set_forkserver_preload(_FORKSERVER_PRELOAD)
+
+        # Incremented by each process once its model is loaded and warm
+        self._ready = mp_ctx.Value("i", 0)
+        self._pool = mp_ctx.Pool(
+            processes=self.processes,
+            initializer=_init_model_runner,
+            initargs=(
+                mp_ctx.Value("i", 0),
+                settings.worker_tf_intra_op_threads,
+                settings.worker_tf_inter_op_threads,
+                settings.worker_pin_cpus,
+                ring_spec,
+                warmup_plan(settings),
+                self._ready,
+                {
+                    "engine": settings.worker_inference_engine,
+                    "tflite_quantization": settings.worker_tflite_quantization,
+                    "tflite_model_path": settings.worker_tflite_model_path,
+                    "tflite_threads": settings.worker_tf_intra_op_threads,
+                    "keep_frames": settings.worker_store_frames,
+                },
+                settings.worker_log_level,
+            ),
+        )
+        logger.info(
+            "%d %s process(es), engine=%s, intra_op=%d, inter_op=%d, pin_cpus=%s, shm_slots=%d",
+            self.processes,
+            start_method,
+            settings.worker_inference_engine,
+            settings.worker_tf_intra_op_threads,
+            settings.worker_tf_inter_op_threads,
+            settings.worker_pin_cpus,
+            self.ring.slots if self.ring else 0,
+        )
+
+    def wait_ready(self, timeout_seconds: float) -> bool:
+        """Block until every process has loaded and warmed its model, or the timeout passes."""
+        deadline = time.monotonic() + timeout_seconds
+        while self._ready.value < self.processes:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def apply_async(self, func, args=()):
+        """Submit a call to one of the inference processes."""
+        return self._pool.apply_async(func, args)
+
+    def _call(self, func, args: tuple, timeout: float, stage: str = "inference"):
+        """Run func in an inference process and wait for it, counting it as pending meanwhile."""
+        INFERENCE_POOL_PENDING.inc()
+        started = time.perf_counter()
+        try:
+            return self._pool.apply_async(func, args).get(timeout=timeout)
+        finally:
+            INFERENCE_POOL_PENDING.dec()
+            STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - started)
+
+    def predict_batch(self, wav_list: list[bytes]) -> list[dict]:
+        """Score a batch in one of the inference processes, blocking until done.
+
+        Clips are decoded here and handed over through the shared audio ring,
+        so only slot indices cross the process boundary. Clips longer than a
+        slot, or arriving while every slot is busy, are sent by value.
+        """
+        timeout = self.settings.worker_inference_timeout_seconds * len(wav_list)
+        if self.ring is None:
+            # Decoding happens in the inference process, inside the inference time
+            return self._call(_run_inference_batch, (wav_list, self.settings.worker_batch_max_audio_seconds), timeout)
+
+        items: list = []
+        slots: list[int] = []
+        try:
+            with STAGE_SECONDS.labels(stage="decode").time():
+                for wav_bytes in wav_list:
+                    try:
+                        waveform = load_waveform(wav_bytes)
+                    except Exception as e:
+                        logger.warning("Decode error: %s", e)
+                        items.append(None)
+                        continue
+                    slot = self.ring.write(waveform)
+                    if slot is None:
+                        items.append(np.ascontiguousarray(waveform))
+                    else:
+                        slots.append(slot[0])
+                        items.append(slot)
+
+            return self._call(
+                _run_inference_waveforms, (items, self.settings.worker_batch_max_audio_seconds), timeout
+            )
+        finally:
+            # After a timeout the child may still be reading; only that
+            # abandoned batch can see the slot being reused.
+            for slot in slots:
+                self.ring.release(slot)
+
+    def score_window(self, waveform: np.ndarray, window_patches: int) -> tuple[np.ndarray, np.ndarray]:
+        """Mean and max YAMNet scores of one streaming window, blocking until done."""
+        slot = self.ring.write(waveform) if self.ring is not None else None
+        try:
+            item = slot if slot is not None else np.ascontiguousarray(waveform)
+            return self._call(
+                _run_window, (item, window_patches), self.settings.worker_inference_timeout_seconds, stage="window"
+            )
+        finally:
+            if slot is not None:
+                self.ring.release(slot[0])
+
+    def terminate(self) -> None:
+        self._pool.terminate()
+        self._pool.join()
+        if self.ring is not None:
+            self.ring.close()
@@ -0,0 +1,273 @@
+"""Job stages shared by the worker loop: fetching audio and saving inference results."""
+import logging
+import time
+from datetime import datetime
+from uuid import UUID
+
+from app.core.config import Settings
+from app.db.models import Alert
+from app.services.email_service import enqueue_alert_notifications
+from app.services.events_repository import EventsRepository
+from worker.alert_coalescing import coalesce_alert
+from worker.audio import decode_wav
+from worker.gate import compute_features, gate_floors, is_silent
+from worker.metrics import JOB_OUTCOMES, STAGE_SECONDS
+from worker.routing_cache import HomeSnapshot, routing_cache
+from worker.streaming import AudioStream, is_long_clip
+
+logger = logging.getLogger(__name__)
+
+
+def home_snapshot(job: dict, db_session_factory, settings: Settings, refresh: bool = False) -> HomeSnapshot | None:
+    """The job's home routing snapshot from the worker cache."""
+    return routing_cache.get(
+        db_session_factory, job["home_id"], settings.worker_routing_cache_ttl_seconds, refresh=refresh
+    )
+
+
+def _content_length(response: dict) -> int:
+    """Full object size from a ranged get_object response ("bytes 0-1023/4096")."""
+    content_range = response.get("ContentRange")
+    if content_range and "/" in content_range:
+        return int(content_range.rsplit("/", 1)[1])
+    return response["ContentLength"]
+
+
+def fetch_audio(
+    job: dict,
+    events_repo: EventsRepository,
+    settings: Settings,
+    s3_client,
+    db_session_factory,
+) -> tuple[dict, bytes | AudioStream] | None:
+    """Look up the job's event, download its audio and run the silence gate.
+
+    Returns None if the job should be dropped, including clips the gate
+    marks as skipped_silent. With WORKER_GATE_PREFIX_BYTES set, only the
+    header and first part of the clip are downloaded before gating; the rest
+    is fetched only if the prefix is not silent. Clips of at least
+    WORKER_STREAM_MIN_SECONDS come back as an AudioStream over the rest of
+    the S3 body instead of bytes. Download errors are raised so the job can
+    be retried.
+    """
+    s3_key = job["s3_key"]
+
+    # Get the event from MongoDB
+    event = events_repo.get_event_by_s3_key(s3_key)
+    if not event:
+        logger.warning("Event not found for s3_key: %s", s3_key)
+        JOB_OUTCOMES.labels(outcome="skipped_missing").inc()
+        return None
+
+    snapshot = home_snapshot(job, db_session_factory, settings)
+    if snapshot is None:
+        logger.warning("Home not found: %s", job["home_id"])
+        JOB_OUTCOMES.labels(outcome="skipped_missing").inc()
+        return None
+    floors = gate_floors(settings, snapshot.model_configs)
+
+    try:
+        # Download audio from S3
+        logger.debug("Downloading audio from S3: %s/%s", settings.s3_bucket, s3_key)
+        download_started = time.perf_counter()
+        prefix_bytes = settings.worker_gate_prefix_bytes if floors else 0
+        body = None
+        if prefix_bytes:
+            response = s3_client.get_object(
+                Bucket=settings.s3_bucket, Key=s3_key, Range=f"bytes=0-{prefix_bytes - 1}"
+            )
+            wav_bytes = response["Body"].read()
+            complete = len(wav_bytes) >= _content_length(response)
+        elif settings.worker_stream_enabled:
+            # Read just the first chunk, enough to tell from the header whether to stream
+            response = s3_client.get_object(Bucket=settings.s3_bucket, Key=s3_key)
+            body = response["Body"]
+            wav_bytes = body.read(settings.worker_stream_chunk_bytes)
+            complete = len(wav_bytes) >= response["ContentLength"]
+        else:
+            response = s3_client.get_object(Bucket=settings.s3_bucket, Key=s3_key)
+            wav_bytes = response["Body"].read()
+            complete = True
+
+        long_clip = settings.worker_stream_enabled and not complete and is_long_clip(wav_bytes, settings)
+        if body is not None and not long_clip and not complete:
+            wav_bytes += body.read()
+            complete = True
+        download_seconds = time.perf_counter() - download_started
+
+        # Long clips are only gated on a configured prefix
+        if floors and (complete or prefix_bytes):
+            try:
+                with STAGE_SECONDS.labels(stage="gate").time():
+                    waveform, sample_rate = decode_wav(wav_bytes)
+                    features = compute_features(waveform, sample_rate)
+            except ValueError as e:
+                # Leave formats the gate can't read to the model
+                logger.info("Gate could not decode %s: %s", s3_key, e)
+                features = None
+            if features and is_silent(features, floors):
+                if body is not None:
+                    body.close()
+                features["scope"] = "full" if complete else "prefix"
+                logger.debug("Skipping silent clip %s: %s", s3_key, features)
+                STAGE_SECONDS.labels(stage="download").observe(download_seconds)
+                events_repo.update_event(str(event["_id"]), status="skipped_silent", gate=features)
+                JOB_OUTCOMES.labels(outcome="skipped_silent").inc()
+                return None
+
+        if not complete and body is None:
+            download_started = time.perf_counter()
+            response = s3_client.get_object(Bucket=settings.s3_bucket, Key=s3_key, Range=f"bytes={len(wav_bytes)}-")
+            if long_clip:
+                body = response["Body"]
+            else:
+                wav_bytes += response["Body"].read()
+            download_seconds += time.perf_counter() - download_started
+        # Streamed clips count only the header chunk; the rest is read window by window
+        STAGE_SECONDS.labels(stage="download").observe(download_seconds)
+        if long_clip:
+            logger.debug("Streaming long clip %s", s3_key)
+            return event, AudioStream(wav_bytes, body)
+        return event, wav_bytes
+    except Exception as e:
+        logger.warning("Error downloading audio for %s: %s", s3_key, e)
+        # Retried with backoff, then dead-lettered, by the caller
+        raise
+
+
+def handle_result(
+    job: dict,
+    event: dict,
+    decision_result: dict,
+    db_session_factory,
+    events_repo: EventsRepository,
+    settings: Settings,
+) -> int:
+    """Persist an inference result and create an alert when the home's model config allows it.
+
+    A detection matching an open alert within the coalescing window updates
+    that alert instead (see worker.alert_coalescing) and queues nothing.
+    Notifications for a high-severity alert go into the outbox in the same
+    transaction as the alert. Returns the number queued.
+    """
+    home_id = UUID(job["home_id"])
+    device_id = UUID(job["device_id"])
+    stream_info = decision_result.get("stream")
+
+    snapshot = home_snapshot(job, db_session_factory, settings)
+    if snapshot is None:
+        logger.warning("Home not found: %s", job["home_id"])
+        JOB_OUTCOMES.labels(outcome="skipped_missing").inc()
+        return 0
+
+    # Apply the home's label mapping and thresholds to the raw YAMNet scores
+    alert_fields = None
+    outcome = None
+    extra = {"stream": stream_info} if stream_info else {}
+    yamnet_scores = decision_result.get("yamnet_scores")
+    if yamnet_scores is not None:
+        rules = snapshot.rules
+        decision_result, alert_label = rules.evaluate(yamnet_scores)
+        # Recorded so re-scoring can report which events would alert differently
+        extra["alert_label"] = alert_label
+        if alert_label:
+            alert_fields = rules.alert_for(alert_label, decision_result["scores"])
+        else:
+            # Tell apart labels the home switched off from scores that were simply too low
+            outcome = "disabled_model" if rules.disabled_label(decision_result["scores"]) else "below_threshold"
+            logger.debug(
+                "No enabled label reached its threshold for %s (top: %s %.3f), skipping alert",
+                job["s3_key"],
+                decision_result["type"],
+                decision_result["score"],
+            )
+    else:
+        # Unknown ML type, log warning but still create alert (backward compatibility)
+        logger.warning("Unknown ML type '%s', no config check performed", decision_result["type"])
+        alert_fields = {key: decision_result[key] for key in ("type", "severity", "score")}
+
+    # Update event in MongoDB with scores and decision
+    event_id = str(event["_id"])
+    with STAGE_SECONDS.labels(stage="mongo_update").time():
+        events_repo.update_event(
+            event_id,
+            scores=decision_result.get("scores"),
+            decision=decision_result.get("type"),
+            status="processed",
+            **extra,
+        )
+    logger.debug("Event %s updated in MongoDB", event_id)
+
+    if alert_fields is None:
+        JOB_OUTCOMES.labels(outcome=outcome).inc()
+        return 0
+
+    # A device added since the snapshot was taken is worth one revalidation
+    device = snapshot.devices.get(job["device_id"])
+    if device is None:
+        snapshot = home_snapshot(job, db_session_factory, settings, refresh=True)
+        device = snapshot.devices.get(job["device_id"]) if snapshot else None
+    if not device:
+        logger.warning("Device not found: %s", device_id)
+        JOB_OUTCOMES.labels(outcome="skipped_missing").inc()
+        return 0
+
+    # Create alert in Postgres, or fold the detection into an ongoing one
+    now = datetime.utcnow()
+    room_id = UUID(device["room_id"]) if device["room_id"] else None
+    alert_started = time.perf_counter()
+    db_session = db_session_factory()
+    try:
+        alert = coalesce_alert(
+            db_session, settings, home_id, room_id, device_id, alert_fields["type"], alert_fields["score"], now
+        )
+        coalesced = alert is not None
+        notifications_queued = 0
+        if not coalesced:
+            alert = Alert(
+                home_id=home_id,
+                room_id=room_id,
+                device_id=device_id,
+                type=alert_fields["type"],
+                severity=alert_fields["severity"],
+                status="open",
+                score=alert_fields["score"],
+                occurrences=1,
+                last_seen_at=now,
+                created_at=now,
+            )
+            db_session.add(alert)
+            # Email notifications for high-severity alerts, sent by the notification dispatcher.
+            # Coalesced detections were already notified with their alert.
+            notifications_queued = enqueue_alert_notifications(
+                db_session,
+                alert,
+                snapshot.name,
+                device["name"],
+                device["room_name"],
+                [(contact["channel"], contact["value"]) for contact in snapshot.contacts],
+            )
+        db_session.commit()
+        db_session.refresh(alert)
+    finally:
+        db_session.close()
+    STAGE_SECONDS.labels(stage="alert_insert").observe(time.perf_counter() - alert_started)
+
+    if coalesced:
+        JOB_OUTCOMES.labels(outcome="coalesced").inc()
+        logger.info(
+            "Coalesced detection from device %s into alert %s (type: %s, occurrences: %d)",
+            device_id,
+            alert.id,
+            alert.type,
+            alert.occurrences,
+        )
+        return 0
+
+    JOB_OUTCOMES.labels(outcome="alerted").inc()
+    logger.info(
+        "Created alert %s for device %s (type: %s, score: %.3f)", alert.id, device_id, alert.type, alert_fields["score"]
+    )
+    if notifications_queued > 0:
+        logger.info("Queued %d email notification(s) for critical alert %s", notifications_queued, alert.id)
+    return notifications_queued
@@ -0,0 +1,313 @@
+"""YAMNet class to user label mapping, compiled to NumPy masks for vectorized scoring."""
+import csv
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from app.utils.model_mapping import ML_TYPE_TO_CONFIG_KEY
+
+logger = logging.getLogger(__name__)
+
+CLASS_MAP_PATH = Path(__file__).parent / "yamnet_class_map.csv"
+
+# User-defined classes for Senior Living
+USER_LABELS = [
+    "Fall / Impact",
+    "Distress / Pain",
+    "Choking / Vomiting",
+    "Breathing Emergency",
+    "Fire / Smoke Alarm",
+    "Glass Break",
+    "Coughing",
+    "Water Running",
+    "Door / Knock",
+    "Footsteps",
+]
+
+# Mapping from YAMNet class names to User class names
+DEFAULT_CLASS_MAPPING = {
+    # 1. Fall / Impact
+    "Thud": "Fall / Impact",
+    "Bump": "Fall / Impact",
+    "Smack, whack": "Fall / Impact",
+    "Falling down": "Fall / Impact",
+    "Slap, smack": "Fall / Impact",
+
+    # 2. Distress / Pain
+    "Scream": "Distress / Pain",
+    "Shout": "Distress / Pain",
+    "Yell": "Distress / Pain",
+    "Groan": "Distress / Pain",
+    "Moan": "Distress / Pain",
+    "Crying, sobbing": "Distress / Pain",
+    "Baby cry, infant cry": "Distress / Pain",
+    "Whimper": "Distress / Pain",
+    "Wail, moan": "Distress / Pain",
+
+    # 3. Choking / Vomiting
+    "Choking": "Choking / Vomiting",
+    "Vomit": "Choking / Vomiting",
+    "Retching": "Choking / Vomiting",
+    "Gagging": "Choking / Vomiting",
+    "Burping, eructation": "Choking / Vomiting",
+    "Hiccup": "Choking / Vomiting",
+
+    # 4. Breathing Emergency
+    "Gasp": "Breathing Emergency",
+    "Wheeze": "Breathing Emergency",
+    "Panting": "Breathing Emergency",
+    "Hyperventilation": "Breathing Emergency",
+    "Sniff": "Breathing Emergency",
+    "Heavy breathing": "Breathing Emergency",
+
+    # 5. Fire / Smoke Alarm
+    "Smoke detector, smoke alarm": "Fire / Smoke Alarm",
+    "Fire alarm": "Fire / Smoke Alarm",
+    "Buzzer": "Fire / Smoke Alarm",
+    "Alarm": "Fire / Smoke Alarm",
+    "Siren": "Fire / Smoke Alarm",
+    "Civil defense siren": "Fire / Smoke Alarm",
+
+    # 6. Glass Break
+    "Glass": "Glass Break",
+    "Shatter": "Glass Break",
+    "Breaking": "Glass Break",
+    "Crack": "Glass Break",
+
+    # 7. Coughing
+    "Cough": "Coughing",
+    "Throat clearing": "Coughing",
+
+    # 8. Water Running
+    "Pour": "Water Running",
+    "Trickle, dribble": "Water Running",
+    "Liquid": "Water Running",
+    "Water": "Water Running",
+    "Drip": "Water Running",
+    "Toilet flush": "Water Running",
+    "Bathtub (filling or washing)": "Water Running",
+    "Sink (filling or washing)": "Water Running",
+
+    # 9. Door / Knock
+    "Door": "Door / Knock",
+    "Knock": "Door / Knock",
+    "Doorbell": "Door / Knock",
+    "Ding-dong": "Door / Knock",
+    "Tap": "Door / Knock",
+    "Slam": "Door / Knock",
+
+    # 10. Footsteps
+    "Walk, footsteps": "Footsteps",
+    "Footsteps": "Footsteps",
+    "Run": "Footsteps",
+    "Shuffle": "Footsteps",
+}
+
+# High severity for distress, emergency, or critical health events
+HIGH_SEVERITY_LABELS = {
+    "Fall / Impact",
+    "Distress / Pain",
+    "Choking / Vomiting",
+    "Breathing Emergency",
+    "Fire / Smoke Alarm",
+    "Glass Break",
+}
+# Medium severity for health warnings or potential hazards
+MEDIUM_SEVERITY_LABELS = {
+    "Coughing",
+    "Water Running",
+}
+
+DEFAULT_THRESHOLD = 0.5
+
+_HIGH_SEVERITY_MASK = np.array([label in HIGH_SEVERITY_LABELS for label in USER_LABELS])
+
+_yamnet_classes: list[str] | None = None
+
+
+def load_yamnet_classes() -> list[str]:
+    """Load YAMNet display names, ordered by output index."""
+    global _yamnet_classes
+    if _yamnet_classes is None:
+        with open(CLASS_MAP_PATH, "r") as f:
+            # The CSV has columns: index, mid, display_name
+            rows = {int(row["index"]): row["display_name"] for row in csv.DictReader(f)}
+        _yamnet_classes = [rows[i] for i in range(len(rows))]
+    return _yamnet_classes
+
+
+def _decision(scores: np.ndarray) -> dict[str, Any]:
+    top = int(np.argmax(scores))
+    return {
+        "type": USER_LABELS[top],
+        "severity": _severity(USER_LABELS[top]),
+        "score": float(scores[top]),
+        "scores": dict(zip(USER_LABELS, scores.tolist())),
+    }
+
+
+def error_result() -> dict[str, Any]:
+    """Decision for a clip that could not be decoded or scored."""
+    return {
+        "type": "error",
+        "severity": "low",
+        "score": 0.0,
+        "scores": {},
+    }
+
+
+def _severity(label: str) -> str:
+    if label in HIGH_SEVERITY_LABELS:
+        return "high"
+    if label in MEDIUM_SEVERITY_LABELS:
+        return "medium"
+    return "low"
+
+
+class LabelMapping:
+    """A YAMNet-to-user-label mapping compiled into a (labels x classes) mask."""
+
+    def __init__(self, yamnet_classes: list[str], class_mapping: dict[str, str]):
+        label_index = {label: i for i, label in enumerate(USER_LABELS)}
+        self.mask = np.zeros((len(USER_LABELS), len(yamnet_classes)), dtype=bool)
+        for class_index, name in enumerate(yamnet_classes):
+            label = class_mapping.get(name)
+            if label in label_index:
+                self.mask[label_index[label], class_index] = True
+
+    def label_scores(self, mean_scores: np.ndarray) -> np.ndarray:
+        """Per-label max over the mapped YAMNet classes.
+
+        Accepts clip scores of shape (classes,) or a batch of shape (clips, classes).
+        Taking the max represents "confidence that at least one of these subtypes is present".
+        """
+        return np.where(self.mask, np.asarray(mean_scores)[..., None, :], 0.0).max(axis=-1)
+
+    def decide(self, mean_scores: np.ndarray) -> dict[str, Any]:
+        """Top user label, its severity and the full per-label scores for one clip."""
+        return _decision(self.label_scores(mean_scores))
+
+
+class HomeRules:
+    """A home's label mapping plus per-label enabled flags and thresholds.
+
+    Built from the home's ModelConfig rows. A config's params_json may extend
+    the default mapping for its label:
+
+        {"yamnet_classes": ["Beep, bleep"], "exclude_yamnet_classes": ["Buzzer"]}
+
+    Listed classes are moved to that label (overriding any default label) and
+    excluded classes are dropped from it.
+    """
+
+    def __init__(self, yamnet_classes: list[str], configs: dict[str, dict]):
+        class_mapping = dict(DEFAULT_CLASS_MAPPING)
+        known_classes = set(yamnet_classes)
+        self.enabled = np.ones(len(USER_LABELS), dtype=bool)
+        self.thresholds = np.full(len(USER_LABELS), DEFAULT_THRESHOLD)
+
+        for i, label in enumerate(USER_LABELS):
+            config = configs.get(ML_TYPE_TO_CONFIG_KEY[label])
+            if not config:
+                continue
+            self.enabled[i] = config["enabled"]
+            if config["threshold"] is not None:
+                self.thresholds[i] = float(config["threshold"])
+
+            params = config.get("params_json") or {}
+            for name in params.get("exclude_yamnet_classes") or []:
+                if class_mapping.get(name) == label:
+                    del class_mapping[name]
+            for name in params.get("yamnet_classes") or []:
+                if name in known_classes:
+                    class_mapping[name] = label
+                else:
+                    logger.warning("Unknown YAMNet class '%s' in %s params", name, ML_TYPE_TO_CONFIG_KEY[label])
+
+        self.mapping = LabelMapping(yamnet_classes, class_mapping)
+
+    def evaluate(self, mean_scores: np.ndarray) -> tuple[dict[str, Any], Optional[str]]:
+        """Score a clip and check every label against its threshold in one pass.
+
+        Returns the clip decision (top label by score) and the label to alert
+        on: the highest-scoring enabled label at or above its threshold, or
+        None when no label qualifies.
+        """
+        scores = self.mapping.label_scores(mean_scores)
+        decision = _decision(scores)
+
+        passing = self.enabled & (scores >= self.thresholds)
+        if not passing.any():
+            return decision, None
+        return decision, USER_LABELS[int(np.argmax(np.where(passing, scores, -1.0)))]
+
+    def evaluate_batch(self, mean_scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """evaluate() for a (clips, classes) batch.
+
+        Returns the (clips, labels) label scores and, per clip, the index in
+        USER_LABELS of the label to alert on, or -1.
+        """
+        scores = self.mapping.label_scores(mean_scores)
+        passing = self.enabled & (scores >= self.thresholds)
+        alert = np.argmax(np.where(passing, scores, -1.0), axis=1)
+        return scores, np.where(passing.any(axis=1), alert, -1)
+
+    def urgent_label(self, mean_scores: np.ndarray) -> Optional[str]:
+        """The highest-scoring enabled high-severity label at or above its threshold, if any."""
+        scores = self.mapping.label_scores(mean_scores)
+        passing = self.enabled & (scores >= self.thresholds) & _HIGH_SEVERITY_MASK
+        if not passing.any():
+            return None
+        return USER_LABELS[int(np.argmax(np.where(passing, scores, -1.0)))]
+
+    def disabled_label(self, scores: dict[str, float]) -> Optional[str]:
+        """The highest-scoring label that reached its threshold but is disabled for the home, if any."""
+        values = np.array([scores.get(label, 0.0) for label in USER_LABELS])
+        blocked = ~self.enabled & (values >= self.thresholds)
+        if not blocked.any():
+            return None
+        return USER_LABELS[int(np.argmax(np.where(blocked, values, -1.0)))]
+
+    def alert_for(self, label: str, scores: dict[str, float]) -> dict[str, Any]:
+        """Alert fields for a passing label."""
+        return {"type": label, "severity": _severity(label), "score": scores[label]}
+
+
+def config_fingerprint(configs: dict[str, dict]) -> str:
+    """Stable hash of a home's model configs, used to detect changes."""
+    payload = json.dumps(configs, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class HomeRulesCache:
+    """Compiled HomeRules per home, recompiled only when the configs change."""
+
+    def __init__(self, max_homes: int = 1024):
+        self.max_homes = max_homes
+        self._entries: OrderedDict[str, tuple[str, HomeRules]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, home_id: str, configs: dict[str, dict]) -> HomeRules:
+        fingerprint = config_fingerprint(configs)
+        with self._lock:
+            entry = self._entries.get(home_id)
+            if entry and entry[0] == fingerprint:
+                self._entries.move_to_end(home_id)
+                return entry[1]
+
+        rules = HomeRules(load_yamnet_classes(), configs)
+        with self._lock:
+            self._entries[home_id] = (fingerprint, rules)
+            self._entries.move_to_end(home_id)
+            while len(self._entries) > self.max_homes:
+                self._entries.popitem(last=False)
+        return rules
+
+
+home_rules_cache = HomeRulesCache()
@@ -1,188 +1,39 @@
 """Worker entry point for processing SQS messages."""
+import logging
 import sys
-import multiprocessing
-from multiprocessing.pool import TimeoutError
-from datetime import datetime
-from uuid import UUID
+import threading
+import time
 
 import boto3
 from app.core.config import Settings
-from app.db.models import Alert, Device, ModelConfig
 from app.db.session import get_session_local
-from app.services.ingestion_service import EventsRepository
-from app.utils.model_mapping import ml_type_to_config_key
-from worker.sqs_loop import delete_message, parse_job, receive_messages
+from app.services.events_repository import EventsRepository, get_events_repository
+from worker.event_features import EventFeatureStore
+from worker.inference_cache import InferenceCache
+from worker.inference_pool import InferencePool
+from worker.metrics import start_metrics_server
+from worker.notifier import NotificationDispatcher
+from worker.pipeline import WorkerPipeline
+from worker.sqs_loop import AdaptiveReceiver, parse_job
+from worker.startup import clear_ready, configure_logging, mark_ready
 
-# TensorFlow model is kept in a separate process to avoid memory corruption
-_model_runner = None
+logger = logging.getLogger("worker")
 
 
-def _init_model_runner():
-    """Initialize TensorFlow model runner in the subprocess."""
-    global _model_runner
-    if _model_runner is None:
-        from worker.model_runner import ModelRunner
-
-        _model_runner = ModelRunner()
-        _model_runner.load()
-
-
-def _run_inference(wav_bytes: bytes) -> dict:
-    """Run inference using the subprocess-held model runner."""
-    global _model_runner
-    if _model_runner is None:
-        _init_model_runner()
-    return _model_runner.predict(wav_bytes)
-
-
-def process_job(
-    job: dict,
+def main_loop(
+    settings: Settings,
     db_session_factory,
     events_repo: EventsRepository,
-    inference_pool,
-    settings: Settings,
-    s3_client,
-) -> None:
-    """Process a single inference job."""
-    print(f"Processing job: {job}")
-
-    s3_key = job["s3_key"]
-    home_id = UUID(job["home_id"])
-    device_id = UUID(job["device_id"])
-
-    # Get the event from MongoDB
-    event = events_repo.get_event_by_s3_key(s3_key)
-    if not event:
-        print(f"Warning: Event not found for s3_key: {s3_key}")
-        return
-
-    # Create a session for this job
-    db_session = db_session_factory()
-
-    try:
-        # Download audio from S3
-        print(f"Downloading audio from S3: {settings.s3_bucket}/{s3_key}", flush=True)
-        response = s3_client.get_object(Bucket=settings.s3_bucket, Key=s3_key)
-        wav_bytes = response["Body"].read()
-        
-        # Run inference in isolated subprocess
-        print(f"Running inference on {len(wav_bytes)} bytes (subprocess)...", flush=True)
-        async_result = inference_pool.apply_async(_run_inference, (wav_bytes,))
-        decision_result = async_result.get(timeout=60)
-        print(f"Inference complete. Result: {decision_result}", flush=True)
-    except TimeoutError:
-        print("Error: Inference timed out", flush=True)
-        return
-    except Exception as e:
-        print(f"Error downloading or processing audio: {e}", flush=True)
-        # We might want to mark event as failed here
-        return
-
-    # Update event in MongoDB with scores and decision
-    print(f"Updating event in MongoDB...", flush=True)
-    event_id = str(event["_id"])
-    events_repo.update_event(
-        event_id,
-        scores=decision_result.get("scores"),
-        decision=decision_result.get("type"),
-        status="processed",
-    )
-    print(f"Event updated in MongoDB", flush=True)
-
-    # CRITICAL: Close the old database session to avoid TensorFlow memory corruption
-    print("Closing old database session after TensorFlow inference...", flush=True)
-    try:
-        db_session.close()
-    except:
-        pass
-    
-    # Create a fresh database session
-    print("Creating fresh database session...", flush=True)
-    db_session = db_session_factory()
-    print("Fresh database session created", flush=True)
-
-    # Get device
-    print(f"Looking up device {device_id}...", flush=True)
-    try:
-        device = db_session.query(Device).filter(Device.id == device_id).first()
-    except Exception as e:
-        print(f"Error querying device {device_id}: {e}", flush=True)
-        db_session.close()
-        return
-
-    if not device:
-        print(f"Warning: Device not found: {device_id}", flush=True)
-        db_session.close()
-        return
-    print(f"Device found: {device.name if hasattr(device, 'name') else device_id}", flush=True)
-
-    # Check model configuration before creating alert
-    print(f"Checking model configuration...", flush=True)
-    ml_type = decision_result["type"]
-    config_key = ml_type_to_config_key(ml_type)
-    
-    if config_key:
-        # Get model config for this detection type
-        model_config = db_session.query(ModelConfig).filter(
-            ModelConfig.home_id == home_id,
-            ModelConfig.model_key == config_key
-        ).first()
-        
-        # Respect enabled flag and threshold from UI-configured model settings
-        print(f"Checking model config for {config_key}: enabled={model_config.enabled if model_config else 'N/A'}", flush=True)
-        if model_config and not model_config.enabled:
-            print(f"Model {config_key} is disabled, skipping alert creation")
-            db_session.close()
-            return
-        
-        threshold = model_config.threshold if model_config and model_config.threshold is not None else 0.5
-        score = decision_result["score"]
-        
-        if score < threshold:
-            print(f"Score {score:.3f} below threshold {threshold:.3f} for {config_key}, skipping alert")
-            db_session.close()
-            return
-    else:
-        # Unknown ML type, log warning but still create alert (backward compatibility)
-        print(f"Warning: Unknown ML type '{ml_type}', no config check performed")
-
-    # Create alert in Postgres
-    alert = Alert(
-        home_id=home_id,
-        room_id=device.room_id,
-        device_id=device_id,
-        type=decision_result["type"],
-        severity=decision_result["severity"],
-        status="open",
-        score=decision_result["score"],
-        created_at=datetime.utcnow(),
-    )
-
-    db_session.add(alert)
-    db_session.commit()
-    db_session.refresh(alert)
-
-    print(f"Created alert {alert.id} for device {device_id} (type: {ml_type}, score: {decision_result['score']:.3f})")
-
-    # Send email notifications for high-severity alerts
-    if decision_result["severity"] == "high":
-        from app.services.email_service import notify_contacts_for_alert
-        notifications_sent = notify_contacts_for_alert(db_session, alert, settings)
-        if notifications_sent > 0:
-            print(f"Sent {notifications_sent} email notification(s) for critical alert {alert.id}")
-    
-    # Close the database session
-    db_session.close()
-    print("Database session closed", flush=True)
+    stop_event: threading.Event | None = None,
+):
+    """Main worker loop. Runs until interrupted, or until stop_event is set (checked between polls)."""
+    logger.info("Worker started. Listening for messages...")
+    start_metrics_server(settings)
+    clear_ready(settings)
 
-
-def main_loop(settings: Settings, db_session_factory, events_repo: EventsRepository):
-    """Main worker loop."""
-    print("Worker started. Listening for messages...")
-
-    # Create a dedicated process pool for TensorFlow inference
-    mp_ctx = multiprocessing.get_context("spawn")
-    inference_pool = mp_ctx.Pool(processes=1, initializer=_init_model_runner)
+    # Dedicated process pool for TensorFlow inference; the processes load and
+    # warm their models while the rest of the worker initializes
+    inference_pool = InferencePool(settings)
 
     # Initialize S3 client
     s3_client = boto3.client(
@@ -193,10 +44,34 @@ def main_loop(settings: Settings, db_session_factory, events_repo: EventsReposit
         endpoint_url=settings.aws_s3_endpoint_url,
     )
 
+    # Reuse results for byte-identical clips (SQS redeliveries, re-uploads)
+    inference_cache = InferenceCache(settings, events_repo.db) if settings.worker_inference_cache_enabled else None
+
+    # Per-frame scores and embeddings, for re-scoring history after config changes
+    feature_store = EventFeatureStore(settings, events_repo.db) if settings.worker_store_frames else None
+
+    # Alert emails are delivered from the outbox on their own thread
+    notifier = NotificationDispatcher(settings, db_session_factory)
+
+    pipeline = WorkerPipeline(
+        settings, db_session_factory, events_repo, inference_pool, s3_client, inference_cache, feature_store, notifier
+    )
+
+    # Don't take jobs until every inference process is warm
+    if not inference_pool.wait_ready(settings.worker_warmup_timeout_seconds):
+        inference_pool.terminate()
+        raise RuntimeError(f"Inference pool not ready after {settings.worker_warmup_timeout_seconds}s")
+    notifier.start()
+    pipeline.start()
+    mark_ready(settings)
+    receiver = AdaptiveReceiver(settings, pipeline.capacity)
+
     try:
-        while True:
+        while stop_event is None or not stop_event.is_set():
             try:
-                messages = receive_messages(settings)
+                # submit() only blocks when the download stage is full, so the
+                # next batch is polled while the current one is still in flight
+                messages = receiver.poll()
                 if not messages:
                     continue
 
@@ -204,50 +79,41 @@ def main_loop(settings: Settings, db_session_factory, events_repo: EventsReposit
                     job = parse_job(message)
                     if not job:
                         # Delete malformed message
-                        delete_message(settings, message["ReceiptHandle"])
+                        pipeline.acks.add(message["ReceiptHandle"])
                         continue
-
-                    try:
-                        # Process the job
-                        process_job(job, db_session_factory, events_repo, inference_pool, settings, s3_client)
-
-                        # Delete message after successful processing
-                        delete_message(settings, job["receipt_handle"])
-                    except Exception as e:
-                        print(f"Error processing job: {str(e)}")
-                        # Message will become visible again after VisibilityTimeout
-                        # In production, you might want to track retry counts
+                    pipeline.submit(job)
 
             except KeyboardInterrupt:
-                print("\nWorker stopped by user")
+                logger.info("Worker stopped by user")
                 break
-            except Exception as e:
-                print(f"Error in main loop: {str(e)}")
-                import time
-
+            except Exception:
+                logger.exception("Error in main loop")
                 time.sleep(5)  # Wait before retrying
     finally:
+        clear_ready(settings)
+        receiver.close()
+        pipeline.stop()
+        notifier.close()
         inference_pool.terminate()
-        inference_pool.join()
 
 
 if __name__ == "__main__":
-    print("Worker: Starting initialization...")
     # Initialize settings
     settings = Settings()
-    print("Worker: Settings loaded")
+    configure_logging(settings.worker_log_level)
+    logger.info("Settings loaded")
 
     # Initialize database session
     SessionLocal = get_session_local(settings)
-    print("Worker: Database session initialized")
+    logger.info("Database session initialized")
 
     # Initialize MongoDB
-    events_repo = EventsRepository(settings.mongo_uri)
-    print("Worker: MongoDB repository initialized")
+    events_repo = get_events_repository(settings)
+    logger.info("MongoDB repository initialized")
 
     # Start main loop
     try:
         main_loop(settings, SessionLocal, events_repo)
-    except Exception as e:
-        print(f"Fatal error: {str(e)}")
+    except Exception:
+        logger.exception("Fatal error")
         sys.exit(1)
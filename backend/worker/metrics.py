@@ -0,0 +1,119 @@
+"""Prometheus metrics for the worker, served on WORKER_METRICS_PORT."""
+import logging
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = Histogram(
+    "worker_stage_seconds",
+    "Time spent in each job stage: download, gate, decode and inference per batch, window per "
+    "streamed window, mongo_update, alert_insert, and notification per email",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+JOB_OUTCOMES = Counter(
+    "worker_job_outcomes_total",
+    "Jobs by outcome: alerted, coalesced, below_threshold, disabled_model, skipped_silent, "
+    "skipped_missing, retried, dead_lettered",
+    ["outcome"],
+)
+JOB_ERRORS = Counter(
+    "worker_job_errors_total",
+    "Job failures by the pipeline stage they happened in",
+    ["stage"],
+)
+JOBS_IN_FLIGHT = Gauge(
+    "worker_jobs_in_flight",
+    "Jobs taken from SQS and not yet acked or handed back for retry",
+)
+STAGE_QUEUE_DEPTH = Gauge(
+    "worker_stage_queue_depth",
+    "Items waiting in each pipeline stage's queue",
+    ["stage"],
+)
+JOB_LATENCY_SECONDS = Histogram(
+    "worker_job_latency_seconds",
+    "Seconds from SQS send to a first-attempt job being settled",
+    buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1800),
+)
+SQS_BACKLOG = Gauge(
+    "worker_sqs_backlog_messages",
+    "Approximate queue messages by state: visible (waiting), in_flight, delayed",
+    ["state"],
+)
+SQS_MESSAGE_AGE_SECONDS = Gauge(
+    "worker_sqs_message_age_seconds",
+    "Age of the oldest message received in the last adjustment interval",
+)
+IN_FLIGHT_LIMIT = Gauge(
+    "worker_in_flight_limit",
+    "Jobs the worker currently allows in flight, set by the concurrency controller",
+)
+BATCH_SIZE_LIMIT = Gauge(
+    "worker_batch_size_limit",
+    "Largest inference batch the worker currently builds, set by the concurrency controller",
+)
+INFERENCE_POOL_PENDING = Gauge(
+    "worker_inference_pool_pending",
+    "Batches and windows submitted to the inference processes and not yet returned",
+)
+
+INFERENCE_CACHE_HITS = Counter(
+    "worker_inference_cache_hits_total",
+    "Clips whose result came from the inference cache",
+    ["level"],
+)
+INFERENCE_CACHE_MISSES = Counter(
+    "worker_inference_cache_misses_total",
+    "Clips not found in the inference cache",
+)
+
+SQS_API_CALLS = Counter(
+    "worker_sqs_api_calls_total",
+    "SQS API calls made by the worker",
+    ["operation"],
+)
+SQS_MESSAGES_RECEIVED = Counter(
+    "worker_sqs_messages_received_total",
+    "Messages received from SQS",
+)
+SQS_RECEIVERS = Gauge(
+    "worker_sqs_receivers",
+    "Concurrent ReceiveMessage calls in the current poll",
+)
+SQS_POLL_API_CALLS = Histogram(
+    "worker_sqs_poll_api_calls",
+    "ReceiveMessage calls per poll",
+    buckets=(1, 2, 4, 8, 16),
+)
+SQS_POLL_CPU_SECONDS = Histogram(
+    "worker_sqs_poll_cpu_seconds",
+    "CPU time spent in the receive threads per poll",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+NOTIFICATIONS = Counter(
+    "worker_notifications_total",
+    "Outbox notification send attempts by outcome",
+    ["result"],
+)
+
+STARTUP_SECONDS = Gauge(
+    "worker_startup_seconds",
+    "Seconds from process start to a startup milestone",
+    ["phase"],
+)
+READY = Gauge(
+    "worker_ready",
+    "1 once every inference process is warm and the worker is polling",
+)
+
+
+def start_metrics_server(settings: Settings) -> None:
+    """Serve /metrics in a background thread, unless disabled with port 0."""
+    if settings.worker_metrics_port:
+        start_http_server(settings.worker_metrics_port)
+        logger.info("Metrics on :%d/metrics", settings.worker_metrics_port)
@@ -1,12 +1,18 @@
 """ML model runner for processing device data."""
-import csv
+import logging
 import os
+import time
 from typing import Any
 
 import numpy as np
 import tensorflow as tf
 import tensorflow_hub as hub
 
+from worker.audio import MIN_PATCH_SAMPLES, MODEL_SAMPLE_RATE, PATCH_HOP_SAMPLES, load_waveform, num_patches
+from worker.label_mapping import DEFAULT_CLASS_MAPPING, LabelMapping, error_result, load_yamnet_classes
+
+logger = logging.getLogger(__name__)
+
 # Disable GPU for worker
 os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
 
@@ -14,249 +20,221 @@ os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
 class ModelRunner:
     """Model runner for inference using TensorFlow YAMNet."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        engine: str = "tensorflow",
+        tflite_quantization: str = "dynamic",
+        tflite_model_path: str | None = None,
+        tflite_threads: int = 0,
+        keep_frames: bool = False,
+    ):
+        self.engine = engine
+        # Return per-frame scores and embeddings (float16) with each result
+        self.keep_frames = keep_frames
+        self.tflite_quantization = tflite_quantization
+        self.tflite_model_path = tflite_model_path
+        self.tflite_threads = tflite_threads
         self.yamnet_model = None
         self.yamnet_classes = []
-        
-        # User-defined classes for Senior Living
-        self.user_labels = [
-            "Fall / Impact",
-            "Distress / Pain",
-            "Choking / Vomiting",
-            "Breathing Emergency",
-            "Fire / Smoke Alarm",
-            "Glass Break",
-            "Coughing",
-            "Water Running",
-            "Door / Knock",
-            "Footsteps"
-        ]
-        
-        # Mapping from YAMNet class names to User class names
-        self.class_mapping = {
-            # 1. Fall / Impact
-            "Thud": "Fall / Impact",
-            "Bump": "Fall / Impact",
-            "Smack, whack": "Fall / Impact",
-            "Falling down": "Fall / Impact",
-            "Slap, smack": "Fall / Impact",
-            
-            # 2. Distress / Pain
-            "Scream": "Distress / Pain",
-            "Shout": "Distress / Pain",
-            "Yell": "Distress / Pain",
-            "Groan": "Distress / Pain",
-            "Moan": "Distress / Pain",
-            "Crying, sobbing": "Distress / Pain",
-            "Baby cry, infant cry": "Distress / Pain",
-            "Whimper": "Distress / Pain",
-            "Wail, moan": "Distress / Pain",
-            
-            # 3. Choking / Vomiting
-            "Choking": "Choking / Vomiting",
-            "Vomit": "Choking / Vomiting",
-            "Retching": "Choking / Vomiting",
-            "Gagging": "Choking / Vomiting",
-            "Burping, eructation": "Choking / Vomiting",
-            "Hiccup": "Choking / Vomiting",
-            
-            # 4. Breathing Emergency
-            "Gasp": "Breathing Emergency",
-            "Wheeze": "Breathing Emergency",
-            "Panting": "Breathing Emergency",
-            "Hyperventilation": "Breathing Emergency",
-            "Sniff": "Breathing Emergency",
-            "Heavy breathing": "Breathing Emergency",
-            
-            # 5. Fire / Smoke Alarm
-            "Smoke detector, smoke alarm": "Fire / Smoke Alarm",
-            "Fire alarm": "Fire / Smoke Alarm",
-            "Buzzer": "Fire / Smoke Alarm",
-            "Alarm": "Fire / Smoke Alarm",
-            "Siren": "Fire / Smoke Alarm",
-            "Civil defense siren": "Fire / Smoke Alarm",
-            
-            # 6. Glass Break
-            "Glass": "Glass Break",
-            "Shatter": "Glass Break",
-            "Breaking": "Glass Break",
-            "Crack": "Glass Break",
-            
-            # 7. Coughing
-            "Cough": "Coughing",
-            "Throat clearing": "Coughing",
-            
-            # 8. Water Running
-            "Pour": "Water Running",
-            "Trickle, dribble": "Water Running",
-            "Liquid": "Water Running",
-            "Water": "Water Running",
-            "Drip": "Water Running",
-            "Toilet flush": "Water Running",
-            "Bathtub (filling or washing)": "Water Running",
-            "Sink (filling or washing)": "Water Running",
-            
-            # 9. Door / Knock
-            "Door": "Door / Knock",
-            "Knock": "Door / Knock",
-            "Doorbell": "Door / Knock",
-            "Ding-dong": "Door / Knock",
-            "Tap": "Door / Knock",
-            "Slam": "Door / Knock",
-            
-            # 10. Footsteps
-            "Walk, footsteps": "Footsteps",
-            "Footsteps": "Footsteps",
-            "Run": "Footsteps",
-            "Shuffle": "Footsteps",
-        }
+        self.label_mapping: LabelMapping | None = None
 
     def load(self) -> None:
         """Load the model and class map."""
         try:
-            print("ModelRunner: Starting model load...", flush=True)
-            # Load YAMNet model from SavedModel format (bundled in Docker image)
-            model_path = os.path.join(os.path.dirname(__file__), "yamnet_savedmodel")
-            print(f"ModelRunner: Checking for model at {model_path}", flush=True)
-            if os.path.exists(model_path):
-                print(f"ModelRunner: Loading YAMNet model from {model_path}", flush=True)
-                self.yamnet_model = tf.saved_model.load(model_path)
-                print("ModelRunner: YAMNet model loaded from SavedModel", flush=True)
+            logger.info("Starting model load...")
+            if self.engine == "tflite":
+                from worker.tflite_engine import TFLiteYamnet
+
+                self.yamnet_model = TFLiteYamnet.load(
+                    self.tflite_quantization, self.tflite_model_path, self.tflite_threads
+                )
+                logger.info("YAMNet TFLite model loaded from %s", self.yamnet_model.model_path)
             else:
-                # Fallback to TFHub if local model not found
-                print("ModelRunner: Local SavedModel not found, trying TFHub...", flush=True)
-                yamnet_url = "https://tfhub.dev/google/yamnet/1"
-                print(f"ModelRunner: Downloading/Loading from {yamnet_url}...", flush=True)
-                self.yamnet_model = hub.load(yamnet_url)
-                print("ModelRunner: YAMNet model loaded from TFHub", flush=True)
-            
-            print("ModelRunner: Loading class map...")
-            # Load class map
-            class_map_path = os.path.join(os.path.dirname(__file__), "yamnet_class_map.csv")
-            with open(class_map_path, 'r') as f:
-                reader = csv.DictReader(f)
-                # YAMNet outputs are ordered by index in this CSV
-                # We need to store them in order to map index -> name
-                # The CSV has columns: index, mid, display_name
-                # We'll create a list where index i contains the display_name
-                temp_classes = {}
-                for row in reader:
-                    temp_classes[int(row['index'])] = row['display_name']
-                
-                self.yamnet_classes = [temp_classes[i] for i in range(len(temp_classes))]
-                print(f"ModelRunner: Loaded {len(self.yamnet_classes)} YAMNet classes")
-            
-            print("ModelRunner: Model and class map loaded successfully!")
-        except Exception as e:
-            print(f"ModelRunner: Failed to load model or class map: {e}")
-            import traceback
-            traceback.print_exc()
+                self._load_saved_model()
+
+            self.yamnet_classes = load_yamnet_classes()
+            # Compile the default mapping once so scoring is a few NumPy ops per clip
+            self.label_mapping = LabelMapping(self.yamnet_classes, DEFAULT_CLASS_MAPPING)
+            logger.info("Model and class map loaded (%d YAMNet classes)", len(self.yamnet_classes))
+        except Exception:
+            logger.exception("Failed to load model or class map")
             raise
 
+    def _load_saved_model(self) -> None:
+        """Load the full-precision SavedModel, bundled in the image or from TFHub."""
+        # Load YAMNet model from SavedModel format (bundled in Docker image)
+        model_path = os.path.join(os.path.dirname(__file__), "yamnet_savedmodel")
+        if os.path.exists(model_path):
+            self.yamnet_model = tf.saved_model.load(model_path)
+            logger.info("YAMNet model loaded from %s", model_path)
+        else:
+            # Fallback to TFHub if local model not found
+            yamnet_url = "https://tfhub.dev/google/yamnet/1"
+            logger.warning("No SavedModel at %s, loading %s", model_path, yamnet_url)
+            self.yamnet_model = hub.load(yamnet_url)
+            logger.info("YAMNet model loaded from TFHub")
+
+    def warmup(
+        self, clip_samples: list[int], batch_size: int = 1, max_batch_seconds: float | None = None
+    ) -> float:
+        """Run silent clips through the model so real clips don't pay first-call costs.
+
+        The first call of the SavedModel builds and optimizes its graph, and
+        each new input length allocates its buffers. Every length in
+        clip_samples is scored on its own, then a full batch of the shortest
+        goes through the packing path. Returns the seconds spent.
+        """
+        start = time.perf_counter()
+        for samples in clip_samples:
+            self.predict_waveforms([np.zeros(samples, dtype=np.float32)], max_batch_seconds)
+        if clip_samples and batch_size > 1:
+            shortest = np.zeros(min(clip_samples), dtype=np.float32)
+            self.predict_waveforms([shortest] * batch_size, max_batch_seconds)
+        return time.perf_counter() - start
+
     def predict(self, wav_bytes: bytes) -> dict[str, Any]:
         """
         Run inference on audio data using YAMNet and map to user classes.
         """
+        return self.predict_batch([wav_bytes])[0]
+
+    def predict_batch(
+        self, wav_list: list[bytes], max_batch_seconds: float | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Run inference on several clips using as few YAMNet forward passes as possible.
+
+        Clips are packed into one waveform on patch-hop boundaries so every
+        clip sees exactly the patches it would get when scored on its own.
+        Results are returned in input order; a clip that fails to decode gets
+        the error result without affecting the rest of the batch.
+        """
+        waveforms: list[np.ndarray | None] = []
+        for wav_bytes in wav_list:
+            try:
+                waveforms.append(self._decode(wav_bytes))
+            except Exception as e:
+                logger.warning("Decode error: %s", e)
+                waveforms.append(None)
+        return self.predict_waveforms(waveforms, max_batch_seconds)
+
+    def predict_waveforms(
+        self, waveforms: list[np.ndarray | None], max_batch_seconds: float | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Run inference on already-decoded 16 kHz mono float32 waveforms.
+
+        A None entry stands for a clip that failed to decode and gets the
+        error result.
+        """
         if self.yamnet_model is None:
             raise RuntimeError("Model not loaded")
 
-        try:
-            # Decode WAV
-            print(f"ModelRunner: Decoding {len(wav_bytes)} bytes of WAV...", flush=True)
-            waveform, sample_rate = tf.audio.decode_wav(wav_bytes, desired_channels=1)
-            sample_rate_val = int(sample_rate.numpy())
-            print(f"ModelRunner: WAV decoded. Sample rate: {sample_rate_val}. Squeezing...", flush=True)
-            waveform = tf.squeeze(waveform, axis=-1)
-            
-            # Resample to 16000Hz if needed
-            if sample_rate_val != 16000:
-                print(f"ModelRunner: Resampling from {sample_rate_val}Hz to 16000Hz...", flush=True)
-                # Convert to numpy for resampling
-                waveform_np = waveform.numpy()
-                # Calculate new length
-                new_length = int(len(waveform_np) * 16000 / sample_rate_val)
-                # Simple linear interpolation resampling
-                import numpy as np
-                indices = np.linspace(0, len(waveform_np) - 1, new_length)
-                waveform_resampled = np.interp(indices, np.arange(len(waveform_np)), waveform_np)
-                waveform = tf.constant(waveform_resampled, dtype=tf.float32)
-                print("ModelRunner: Resampling complete.", flush=True)
-            
-            # Run YAMNet
-            # scores: (N, 521) - prediction for each frame
-            print("ModelRunner: Running YAMNet inference...", flush=True)
-            scores, embeddings, spectrogram = self.yamnet_model(waveform)
-            print("ModelRunner: Inference complete. Calculating mean scores...", flush=True)
-            
-            # Average scores across all frames to get clip-level prediction
-            # mean_scores: (521,)
-            mean_scores = np.mean(scores, axis=0)
-            print(f"ModelRunner: Mean scores calculated. Shape: {mean_scores.shape}", flush=True)
-            
-            # Map YAMNet scores to User classes
-            print("ModelRunner: Starting score mapping...", flush=True)
-            user_scores = {label: 0.0 for label in self.user_labels}
-            
-            for i, score in enumerate(mean_scores):
-                if i % 100 == 0:
-                    print(f"ModelRunner: Mapping index {i}...", flush=True)
-                yamnet_label = self.yamnet_classes[i]
-                if yamnet_label in self.class_mapping:
-                    user_label = self.class_mapping[yamnet_label]
-                    # Accumulate score (or take max? Accumulating makes sense if multiple YAMNet classes map to one)
-                    # But since these are probabilities, summing might exceed 1.0. 
-                    # Taking max is safer for "detection" logic, or we can sum and clip.
-                    # Let's take MAX for now to represent "confidence that at least one of these subtypes is present"
-                    user_scores[user_label] = max(user_scores[user_label], float(score))
-            print("ModelRunner: Score mapping complete.", flush=True)
-            
-            # Find top YAMNet class (raw) and top mapped user class
-            raw_top_idx = int(np.argmax(mean_scores))
-            raw_top_label = self.yamnet_classes[raw_top_idx]
-            raw_top_score = float(mean_scores[raw_top_idx])
-            print(f"ModelRunner: Top YAMNet class: {raw_top_label} ({raw_top_score:.4f})", flush=True)
-
-            top_event = max(user_scores.items(), key=lambda x: x[1])
-            print(f"ModelRunner: Top mapped event: {top_event}", flush=True)
-            
-            top_user_label = top_event[0]
-            top_score = top_event[1]
-            
-            # Determine severity
-            # High severity for distress, emergency, or critical health events
-            high_severity_events = [
-                "Fall / Impact",
-                "Distress / Pain",
-                "Choking / Vomiting",
-                "Breathing Emergency",
-                "Fire / Smoke Alarm",
-                "Glass Break"
-            ]
-            # Medium severity for health warnings or potential hazards
-            medium_severity_events = [
-                "Coughing",
-                "Water Running"
-            ]
-            
-            if top_user_label in high_severity_events:
-                severity = "high"
-            elif top_user_label in medium_severity_events:
-                severity = "medium"
-            else:
-                severity = "low"
-
-            return {
-                "type": top_user_label,
-                "severity": severity,
-                "score": top_score,
-                "scores": user_scores,
-            }
-
-        except Exception as e:
-            print(f"ModelRunner: Inference error: {e}")
-            return {
-                "type": "error",
-                "severity": "low",
-                "score": 0.0,
-                "scores": {},
-            }
+        results: list[dict[str, Any] | None] = [
+            error_result() if waveform is None else None for waveform in waveforms
+        ]
+        items = [(i, waveform) for i, waveform in enumerate(waveforms) if waveform is not None]
+
+        max_samples = int((max_batch_seconds or 0) * MODEL_SAMPLE_RATE)
+        for group in _group_by_size(items, max_samples):
+            try:
+                frame_outputs = self._forward([waveform for _, waveform in group])
+            except Exception:
+                logger.exception("Inference error on a group of %d clip(s)", len(group))
+                for i, _ in group:
+                    results[i] = error_result()
+                continue
+            for (i, _), (scores, embeddings) in zip(group, frame_outputs):
+                # Average scores across all frames to get clip-level prediction
+                results[i] = self._decide(np.mean(scores, axis=0))
+                if self.keep_frames:
+                    results[i]["frames"] = {
+                        "scores": scores.astype(np.float16),
+                        "embeddings": embeddings.astype(np.float16) if embeddings is not None else None,
+                    }
+
+        return results
+
+    def _decode(self, wav_bytes: bytes) -> np.ndarray:
+        """Decode WAV bytes to a mono float32 waveform at 16 kHz."""
+        return load_waveform(wav_bytes)
+
+    def _forward(self, waveforms: list[np.ndarray]) -> list[tuple[np.ndarray, np.ndarray | None]]:
+        """Score waveforms in a single YAMNet call and split the frame scores and embeddings per clip.
+
+        The TFLite engine has no embedding output, so its embeddings are None.
+        """
+        if self.engine == "tflite":
+            # TFLite scores one patch per call, so packing would only add the gap patches
+            return [(self.yamnet_model(waveform), None) for waveform in waveforms]
+
+        offsets = []
+        total = 0
+        for waveform in waveforms:
+            offsets.append(total)
+            total += _packed_length(len(waveform))
+
+        packed = np.zeros(total, dtype=np.float32)
+        for offset, waveform in zip(offsets, waveforms):
+            packed[offset : offset + len(waveform)] = waveform
+
+        # scores: (N, 521), embeddings: (N, 1024) - one row per frame of the packed waveform
+        scores, embeddings, spectrogram = self.yamnet_model(tf.constant(packed))
+        scores = scores.numpy()
+        embeddings = embeddings.numpy()
+
+        frame_outputs = []
+        for offset, waveform in zip(offsets, waveforms):
+            frames = slice(offset // PATCH_HOP_SAMPLES, offset // PATCH_HOP_SAMPLES + num_patches(len(waveform)))
+            frame_outputs.append((scores[frames], embeddings[frames]))
+        return frame_outputs
+
+    def score_window(self, waveform: np.ndarray, window_patches: int) -> tuple[np.ndarray, np.ndarray]:
+        """Mean and max YAMNet scores over the first window_patches patches of a window."""
+        if self.yamnet_model is None:
+            raise RuntimeError("Model not loaded")
+        scores = self._frame_scores(waveform)[:window_patches]
+        return scores.mean(axis=0), scores.max(axis=0)
+
+    def _frame_scores(self, waveform: np.ndarray) -> np.ndarray:
+        """(patches, classes) YAMNet scores for a 16 kHz waveform, from whichever engine is loaded."""
+        if self.engine == "tflite":
+            return self.yamnet_model(waveform)
+        scores, embeddings, spectrogram = self.yamnet_model(tf.constant(waveform, dtype=tf.float32))
+        return scores.numpy()
+
+    def _decide(self, mean_scores: np.ndarray) -> dict[str, Any]:
+        """Map clip-level YAMNet scores to the default user label decision.
+
+        The raw YAMNet scores are returned too, so per-home mappings and
+        thresholds can be applied without re-running the model.
+        """
+        result = self.label_mapping.decide(mean_scores)
+        result["yamnet_scores"] = mean_scores.astype(np.float32)
+        return result
+
+
+def _packed_length(num_samples: int) -> int:
+    """Space a clip takes in a packed batch, rounded up to the next patch hop.
+
+    The patches that straddle two clips fall in the gap and are discarded.
+    """
+    padded = MIN_PATCH_SAMPLES + (num_patches(num_samples) - 1) * PATCH_HOP_SAMPLES
+    return -(-padded // PATCH_HOP_SAMPLES) * PATCH_HOP_SAMPLES
+
+
+def _group_by_size(items: list[tuple[int, np.ndarray]], max_samples: int) -> list[list[tuple[int, np.ndarray]]]:
+    """Split clips into forward-pass groups of at most max_samples packed samples (0 = no limit)."""
+    groups: list[list[tuple[int, np.ndarray]]] = []
+    current: list[tuple[int, np.ndarray]] = []
+    current_size = 0
+    for item in items:
+        size = _packed_length(len(item[1]))
+        if current and max_samples and current_size + size > max_samples:
+            groups.append(current)
+            current, current_size = [], 0
+        current.append(item)
+        current_size += size
+    if current:
+        groups.append(current)
+    return groups
@@ -0,0 +1,142 @@
+"""Notification dispatcher: delivers the alert outbox over pooled SMTP connections, off the job pipeline."""
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+
+from app.core.config import Settings
+from app.db.models import NotificationOutbox
+from app.services.email_service import SMTPConnectionPool
+from worker.metrics import NOTIFICATIONS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """Sends due outbox rows on a background thread and records the outcome on each row.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and leased for
+    WORKER_NOTIFY_LEASE_SECONDS before anything is sent, so several workers
+    can share the outbox and a worker that dies mid-send only delays its
+    rows until the lease runs out. Failed sends are retried with exponential
+    backoff; after WORKER_NOTIFY_MAX_ATTEMPTS the row is marked failed.
+    """
+
+    def __init__(self, settings: Settings, db_session_factory):
+        self.settings = settings
+        self.db_session_factory = db_session_factory
+        self.smtp = SMTPConnectionPool(settings, settings.smtp_pool_size)
+        self._senders = ThreadPoolExecutor(max_workers=settings.smtp_pool_size, thread_name_prefix="smtp")
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Check the outbox now instead of at the next poll, e.g. right after queuing an alert."""
+        self._wake.set()
+
+    def close(self) -> None:
+        """Finish the current round, then stop and close the SMTP connections."""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._senders.shutdown()
+        self.smtp.close()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            try:
+                claimed = self._dispatch_due()
+            except Exception:
+                logger.exception("Error dispatching outbox")
+                claimed = 0
+            # A full batch means more rows are probably due
+            if claimed < self.settings.worker_notify_batch_size:
+                self._wake.wait(self.settings.worker_notify_poll_seconds)
+                self._wake.clear()
+
+    def _dispatch_due(self) -> int:
+        """Claim, send and settle one batch of due rows. Returns the number claimed."""
+        rows = self._claim()
+        if not rows:
+            return 0
+        futures = [
+            (row_id, self._senders.submit(self._send, recipient, subject, body))
+            for row_id, recipient, subject, body, _ in rows
+        ]
+        attempts = {row[0]: row[4] for row in rows}
+
+        db_session = self.db_session_factory()
+        try:
+            for row_id, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    self._settle_failure(db_session, row_id, attempts[row_id], str(e))
+                    continue
+                db_session.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id == row_id)
+                    .values(status="sent", sent_at=func.now(), last_error=None)
+                )
+                NOTIFICATIONS.labels(result="sent").inc()
+            db_session.commit()
+        finally:
+            db_session.close()
+        return len(rows)
+
+    def _send(self, recipient: str, subject: str, body: str) -> None:
+        with STAGE_SECONDS.labels(stage="notification").time():
+            self.smtp.send(recipient, subject, body)
+
+    def _claim(self) -> list[tuple[UUID, str, str, str, int]]:
+        """Lease a batch of due pending rows; returns (id, recipient, subject, body, attempts)."""
+        lease_until = datetime.now(timezone.utc) + timedelta(seconds=self.settings.worker_notify_lease_seconds)
+        db_session = self.db_session_factory()
+        try:
+            rows = db_session.execute(
+                select(
+                    NotificationOutbox.id,
+                    NotificationOutbox.recipient,
+                    NotificationOutbox.subject,
+                    NotificationOutbox.body,
+                    NotificationOutbox.attempts,
+                )
+                .where(NotificationOutbox.status == "pending", NotificationOutbox.next_attempt_at <= func.now())
+                .order_by(NotificationOutbox.next_attempt_at)
+                .limit(self.settings.worker_notify_batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if rows:
+                db_session.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id.in_([row.id for row in rows]))
+                    .values(attempts=NotificationOutbox.attempts + 1, next_attempt_at=lease_until)
+                )
+            db_session.commit()
+        finally:
+            db_session.close()
+        return [(row.id, row.recipient, row.subject, row.body, row.attempts + 1) for row in rows]
+
+    def _settle_failure(self, db_session, row_id: UUID, attempts: int, error: str) -> None:
+        if attempts >= self.settings.worker_notify_max_attempts:
+            logger.error("Giving up on notification %s after %d attempts: %s", row_id, attempts, error)
+            values = {"status": "failed", "last_error": error}
+            NOTIFICATIONS.labels(result="failed").inc()
+        else:
+            delay = self.settings.worker_notify_retry_base_seconds * 2 ** (attempts - 1)
+            delay = random.uniform(delay / 2, delay)
+            logger.warning("Retrying notification %s in %.0fs: %s", row_id, delay, error)
+            values = {
+                "last_error": error,
+                "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+            }
+            NOTIFICATIONS.labels(result="retried").inc()
+        db_session.execute(update(NotificationOutbox).where(NotificationOutbox.id == row_id).values(**values))
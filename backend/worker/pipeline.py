@@ -0,0 +1,326 @@
+"""Staged job pipeline: download -> inference -> persist, with bounded queues between stages."""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from multiprocessing.pool import TimeoutError
+
+from app.core.config import Settings
+from app.services.events_repository import EventsRepository
+from worker.concurrency import ConcurrencyController
+from worker.event_features import EventFeatureStore
+from worker.inference_cache import InferenceCache
+from worker.inference_pool import InferencePool
+from worker.jobs import fetch_audio, handle_result, home_snapshot
+from worker.metrics import JOB_ERRORS, JOB_OUTCOMES, JOBS_IN_FLIGHT, STAGE_QUEUE_DEPTH
+from worker.notifier import NotificationDispatcher
+from worker.startup import mark_first_result
+from worker.streaming import AudioStream, stream_inference
+from worker.sqs_loop import (
+    AckBuffer,
+    VisibilityHeartbeat,
+    change_visibilities,
+    retry_delay_seconds,
+    send_to_dead_letter_queue,
+)
+
+logger = logging.getLogger(__name__)
+
+# Queue sentinel telling a stage thread to exit
+_STOP = object()
+
+
+class WorkerPipeline:
+    """Runs jobs through download, inference and persistence stages concurrently.
+
+    Each stage has its own threads and hands work to the next through a
+    bounded queue, so network I/O never holds up the inference processes and
+    a slow stage backs up into submit() instead of growing memory. How many
+    jobs are taken on at once, and how large batches get, is set by a
+    ConcurrencyController within what the queues can hold.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        db_session_factory,
+        events_repo: EventsRepository,
+        inference_pool: InferencePool,
+        s3_client,
+        inference_cache: InferenceCache | None = None,
+        feature_store: EventFeatureStore | None = None,
+        notifier: NotificationDispatcher | None = None,
+    ):
+        self.settings = settings
+        self.db_session_factory = db_session_factory
+        self.events_repo = events_repo
+        self.inference_pool = inference_pool
+        self.s3_client = s3_client
+        self.inference_cache = inference_cache
+        self.feature_store = feature_store
+        self.notifier = notifier
+        # Deletes are buffered and sent to SQS in batches of 10
+        self.acks = AckBuffer(settings)
+        # Keeps messages invisible while their jobs are queued or running
+        self.heartbeat = VisibilityHeartbeat(settings)
+
+        max_pending = settings.worker_max_pending_batches or 2 * inference_pool.processes
+        self.download_queue: queue.Queue = queue.Queue(maxsize=settings.worker_stage_queue_size)
+        self.inference_queue: queue.Queue = queue.Queue(maxsize=max_pending * settings.worker_batch_size)
+        self.persist_queue: queue.Queue = queue.Queue(maxsize=settings.worker_stage_queue_size)
+
+        self._stages = [
+            (self.download_queue, self._download_stage, settings.worker_download_threads),
+            (self.inference_queue, self._inference_stage, inference_pool.processes),
+            (self.persist_queue, self._persist_stage, settings.worker_persist_threads),
+        ]
+        self._threads: list[list[threading.Thread]] = []
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        max_in_flight = settings.worker_max_in_flight or (
+            self.download_queue.maxsize
+            + self.inference_queue.maxsize
+            + self.persist_queue.maxsize
+            + settings.worker_download_threads
+            + inference_pool.processes * settings.worker_batch_size
+            + settings.worker_persist_threads
+        )
+        self.controller = ConcurrencyController(settings, self.in_flight, max_in_flight)
+        for stage, stage_queue in (
+            ("download", self.download_queue),
+            ("inference", self.inference_queue),
+            ("persist", self.persist_queue),
+        ):
+            STAGE_QUEUE_DEPTH.labels(stage=stage).set_function(stage_queue.qsize)
+
+    def start(self) -> None:
+        """Start the stage threads."""
+        self.acks.start()
+        self.heartbeat.start()
+        self.controller.start()
+        for stage_queue, target, count in self._stages:
+            threads = [
+                threading.Thread(target=target, name=f"{target.__name__.strip('_')}-{i}", daemon=True)
+                for i in range(count)
+            ]
+            for thread in threads:
+                thread.start()
+            self._threads.append(threads)
+
+    def submit(self, job: dict) -> None:
+        """Queue a parsed job. Blocks while the download stage is full."""
+        self.heartbeat.track(job["receipt_handle"])
+        self.controller.received(job)
+        self._settle_in_flight(1)
+        self.download_queue.put(job)
+
+    def capacity(self) -> int:
+        """Jobs that can be taken on now: room under the in-flight limit and in the download queue."""
+        room = self.download_queue.maxsize - self.download_queue.qsize()
+        return max(0, min(room, self.controller.limit - self.in_flight()))
+
+    def in_flight(self) -> int:
+        """Jobs submitted and not yet acked or handed back for retry."""
+        return self._in_flight
+
+    def _settle_in_flight(self, delta: int) -> None:
+        with self._in_flight_lock:
+            self._in_flight += delta
+            JOBS_IN_FLIGHT.set(self._in_flight)
+
+    def stop(self) -> None:
+        """Drain in-flight jobs stage by stage, then stop the threads."""
+        for (stage_queue, _, _), threads in zip(self._stages, self._threads):
+            for _ in threads:
+                stage_queue.put(_STOP)
+            for thread in threads:
+                thread.join()
+        self.controller.close()
+        self.heartbeat.close()
+        self.acks.close()
+
+    def _ack(self, job: dict) -> None:
+        # Delete message after processing
+        self.heartbeat.untrack(job["receipt_handle"])
+        self._settle_in_flight(-1)
+        self.controller.completed(job)
+        self.acks.add(job["receipt_handle"])
+
+    def _fail(self, job: dict, reason: str) -> None:
+        """Retry a failed job with backoff, or dead-letter it once it has used up its receives.
+
+        Never raises, as it runs in the stages' error handlers: if SQS cannot
+        be reached the message is left to time out and be received again.
+        """
+        self.heartbeat.untrack(job["receipt_handle"])
+        self._settle_in_flight(-1)
+        receive_count = job.get("receive_count", 1)
+        if receive_count < self.settings.worker_sqs_max_receives:
+            delay = retry_delay_seconds(self.settings, receive_count)
+            logger.warning("Retrying %s in %ds (attempt %d): %s", job["s3_key"], delay, receive_count, reason)
+            JOB_OUTCOMES.labels(outcome="retried").inc()
+            try:
+                change_visibilities(self.settings, [(job["receipt_handle"], delay)])
+            except Exception:
+                logger.exception("Could not delay the retry of %s", job["s3_key"])
+            return
+
+        logger.error("Dead-lettering %s after %d attempts: %s", job["s3_key"], receive_count, reason)
+        try:
+            self.events_repo.update_event_by_s3_key(
+                job["s3_key"],
+                status="failed",
+                failure={"reason": reason, "receive_count": receive_count, "failed_at": datetime.utcnow()},
+            )
+        except Exception as e:
+            # Keep the message so the failure is not lost
+            logger.error("Could not record failure for %s: %s", job["s3_key"], e)
+            return
+        try:
+            sent = send_to_dead_letter_queue(self.settings, job, reason)
+        except Exception:
+            logger.exception("Could not dead-letter %s", job["s3_key"])
+            sent = False
+        if sent:
+            JOB_OUTCOMES.labels(outcome="dead_lettered").inc()
+            self.acks.add(job["receipt_handle"])
+
+    def _download_stage(self) -> None:
+        while True:
+            job = self.download_queue.get()
+            if job is _STOP:
+                return
+            try:
+                logger.debug("Processing job: %s", job)
+                audio = fetch_audio(job, self.events_repo, self.settings, self.s3_client, self.db_session_factory)
+                if audio is None:
+                    self._ack(job)
+                    continue
+                event, wav_bytes = audio
+                if isinstance(wav_bytes, AudioStream):
+                    decision_result = self._stream(job, wav_bytes)
+                    if decision_result is None:
+                        self._ack(job)
+                    else:
+                        self.persist_queue.put((job, event, decision_result, None))
+                    continue
+
+                cache_key = None
+                if self.inference_cache is not None:
+                    cache_key = self.inference_cache.key_for(wav_bytes)
+                    cached = self.inference_cache.get(cache_key)
+                    if cached is not None:
+                        logger.debug("Inference cache hit for %s", job["s3_key"])
+                        self.persist_queue.put((job, event, cached, None))
+                        continue
+                self.inference_queue.put((job, event, wav_bytes, cache_key))
+            except Exception as e:
+                logger.exception("Download stage failed for %s", job["s3_key"])
+                JOB_ERRORS.labels(stage="download").inc()
+                self._fail(job, f"download: {e}")
+
+    def _stream(self, job: dict, stream: AudioStream) -> dict | None:
+        """Score a long clip window by window on this download thread; None if the job should be dropped."""
+        snapshot = home_snapshot(job, self.db_session_factory, self.settings)
+        if snapshot is None:
+            # The home was deleted since fetch_audio looked it up
+            stream.close()
+            logger.warning("Home not found: %s", job["home_id"])
+            JOB_OUTCOMES.labels(outcome="skipped_missing").inc()
+            return None
+        return stream_inference(stream, snapshot.rules, self.inference_pool, self.settings)
+
+    def _next_batch(self) -> tuple[list[tuple], bool]:
+        """Collect up to the controller's batch size, waiting at most batch_max_wait_ms after the first clip."""
+        item = self.inference_queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.settings.worker_batch_max_wait_ms / 1000
+        while len(batch) < self.controller.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.inference_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _inference_stage(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                # Run inference in isolated subprocess
+                wav_list = [wav_bytes for _, _, wav_bytes, _ in batch]
+                logger.debug("Running batched inference on %d clip(s)", len(wav_list))
+                decision_results = self.inference_pool.predict_batch(wav_list)
+            except TimeoutError:
+                logger.error("Inference timed out for a batch of %d clip(s)", len(batch))
+                JOB_ERRORS.labels(stage="inference").inc(len(batch))
+                for job, _, _, _ in batch:
+                    self._fail(job, "inference: timed out")
+                continue
+            except Exception as e:
+                logger.exception("Inference failed for a batch of %d clip(s)", len(batch))
+                JOB_ERRORS.labels(stage="inference").inc(len(batch))
+                for job, _, _, _ in batch:
+                    self._fail(job, f"inference: {e}")
+                continue
+
+            for (job, event, _, cache_key), decision_result in zip(batch, decision_results):
+                self.persist_queue.put((job, event, decision_result, cache_key))
+
+    def _persist_stage(self) -> None:
+        while True:
+            item = self.persist_queue.get()
+            if item is _STOP:
+                return
+            job, event, decision_result, cache_key = item
+            logger.debug(
+                "Inference complete for %s: %s (%.3f)", job["s3_key"], decision_result["type"], decision_result["score"]
+            )
+            if cache_key is not None:
+                # Hits for the same clip copy this event's frame features
+                keeps_frames = self.feature_store is not None and decision_result.get("frames") is not None
+                self.inference_cache.put(cache_key, decision_result, event["_id"] if keeps_frames else None)
+            try:
+                queued = handle_result(
+                    job, event, decision_result, self.db_session_factory, self.events_repo, self.settings
+                )
+                if queued and self.notifier is not None:
+                    self.notifier.wake()
+                self._save_frames(event, decision_result)
+                self._ack(job)
+                mark_first_result()
+            except Exception as e:
+                logger.exception("Persist stage failed for %s", job["s3_key"])
+                JOB_ERRORS.labels(stage="persist").inc()
+                self._fail(job, f"persist: {e}")
+
+    def _save_frames(self, event: dict, decision_result: dict) -> None:
+        """Keep the clip's frame outputs for re-scoring. Failures only cost re-scoring coverage.
+
+        A cached result has no frames of its own; the first event scored from
+        the same clip has them, and they are copied.
+        """
+        if self.feature_store is None:
+            return
+        frames = decision_result.get("frames")
+        source_event_id = decision_result.get("features_event_id")
+        try:
+            if frames is not None:
+                self.feature_store.save(event, frames)
+            elif source_event_id is not None and not self.feature_store.copy(source_event_id, event):
+                logger.debug("No frame features for event %s yet; not copied to %s", source_event_id, event["_id"])
+        except Exception as e:
+            logger.warning("Could not save frame features for event %s: %s", event["_id"], e)
@@ -0,0 +1,120 @@
+"""Per-home routing snapshots (devices, model configs, contacts, policy) cached in the worker."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from worker.label_mapping import HomeRules, home_rules_cache
+
+# Everything the worker needs about a home, in one round trip
+_SNAPSHOT_SQL = text(
+    """
+    SELECT
+        h.name,
+        h.config_version,
+        (SELECT coalesce(json_agg(json_build_object(
+                    'id', d.id, 'name', d.name, 'room_id', d.room_id, 'room_name', r.name)), '[]')
+           FROM devices d LEFT JOIN rooms r ON r.id = d.room_id
+          WHERE d.home_id = h.id) AS devices,
+        (SELECT coalesce(json_agg(json_build_object(
+                    'model_key', m.model_key, 'enabled', m.enabled,
+                    'threshold', m.threshold, 'params_json', m.params_json)), '[]')
+           FROM model_configs m
+          WHERE m.home_id = h.id) AS model_configs,
+        (SELECT coalesce(json_agg(json_build_object(
+                    'name', c.name, 'channel', c.channel, 'value', c.value, 'priority', c.priority)
+                    ORDER BY c.priority DESC), '[]')
+           FROM contacts c
+          WHERE c.home_id = h.id) AS contacts,
+        (SELECT json_build_object(
+                    'quiet_start_time', p.quiet_start_time, 'quiet_end_time', p.quiet_end_time,
+                    'auto_escalate_after_seconds', p.auto_escalate_after_seconds)
+           FROM policies p
+          WHERE p.home_id = h.id) AS policy
+    FROM homes h
+    WHERE h.id = :home_id
+    """
+)
+
+_VERSION_SQL = text("SELECT config_version FROM homes WHERE id = :home_id")
+
+
+class HomeSnapshot:
+    """A home's routing data as of one config_version."""
+
+    def __init__(self, home_id: str, row):
+        self.home_id = home_id
+        self.name: str = row.name
+        self.version: int = row.config_version
+        # Keyed by device id string: {"name", "room_id", "room_name"}
+        self.devices: dict[str, dict[str, Any]] = {device.pop("id"): device for device in row.devices}
+        # Same shape as the API's model configs: {model_key: {enabled, threshold, params_json}}
+        self.model_configs: dict[str, dict] = {
+            config.pop("model_key"): config for config in row.model_configs
+        }
+        # Highest priority first
+        self.contacts: list[dict[str, Any]] = row.contacts
+        self.policy: Optional[dict[str, Any]] = row.policy
+
+    @property
+    def rules(self) -> HomeRules:
+        return home_rules_cache.get(self.home_id, self.model_configs)
+
+
+class RoutingCache:
+    """Snapshots per home, trusted for ttl_seconds and then revalidated against homes.config_version.
+
+    Revalidation is a single-row lookup; the snapshot is only reloaded when
+    the version moved, which the database triggers guarantee for any change
+    to the home's devices, rooms, model configs, contacts or policy.
+    """
+
+    def __init__(self, max_homes: int = 1024):
+        self.max_homes = max_homes
+        self._entries: OrderedDict[str, tuple[float, HomeSnapshot]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, db_session_factory, home_id: str, ttl_seconds: float, refresh: bool = False
+    ) -> Optional[HomeSnapshot]:
+        """The home's snapshot, or None if the home does not exist.
+
+        refresh=True skips the TTL and revalidates now, e.g. when a device
+        is missing from a cached snapshot.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(home_id)
+        if entry and not refresh and now - entry[0] < ttl_seconds:
+            return entry[1]
+
+        db_session = db_session_factory()
+        try:
+            if entry:
+                version = db_session.execute(_VERSION_SQL, {"home_id": home_id}).scalar()
+                if version == entry[1].version:
+                    self._store(home_id, entry[1], now)
+                    return entry[1]
+            row = db_session.execute(_SNAPSHOT_SQL, {"home_id": home_id}).first()
+        finally:
+            db_session.close()
+
+        if row is None:
+            with self._lock:
+                self._entries.pop(home_id, None)
+            return None
+        snapshot = HomeSnapshot(home_id, row)
+        self._store(home_id, snapshot, now)
+        return snapshot
+
+    def _store(self, home_id: str, snapshot: HomeSnapshot, checked_at: float) -> None:
+        with self._lock:
+            self._entries[home_id] = (checked_at, snapshot)
+            self._entries.move_to_end(home_id)
+            while len(self._entries) > self.max_homes:
+                self._entries.popitem(last=False)
+
+
+routing_cache = RoutingCache()
@@ -0,0 +1,63 @@
+"""Shared-memory ring of float32 audio slots for handing waveforms to the inference processes."""
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Per-process view of the ring, opened on first use in an inference process
+_attached: dict[str, tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+
+class SharedAudioRing:
+    """Fixed-size float32 slots in one shared memory block, owned by the worker process.
+
+    The worker writes a decoded waveform into a free slot and sends the
+    inference process only (slot, length); the child reads the samples in
+    place. Slots are handed out from a free list and must be released once
+    the inference call that uses them has returned.
+    """
+
+    def __init__(self, slots: int, slot_samples: int):
+        self.slots = slots
+        self.slot_samples = slot_samples
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_samples * 4)
+        self._buffer = np.ndarray((slots, slot_samples), dtype=np.float32, buffer=self._shm.buf)
+        self._free: queue.SimpleQueue[int] = queue.SimpleQueue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write(self, waveform: np.ndarray) -> tuple[int, int] | None:
+        """Copy a waveform into a free slot and return (slot, length).
+
+        Returns None if the waveform does not fit a slot or every slot is in
+        use; the caller should then send the samples by value.
+        """
+        if len(waveform) > self.slot_samples:
+            return None
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            return None
+        self._buffer[slot, : len(waveform)] = waveform
+        return slot, len(waveform)
+
+    def release(self, slot: int) -> None:
+        self._free.put(slot)
+
+    def close(self) -> None:
+        """Free the shared memory block. Call once the inference processes are gone."""
+        del self._buffer
+        self._shm.close()
+        self._shm.unlink()
+
+
+def read_slot(name: str, slots: int, slot_samples: int, slot: int, length: int) -> np.ndarray:
+    """Zero-copy view of a slot's samples, from an inference process."""
+    if name not in _attached:
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = (shm, np.ndarray((slots, slot_samples), dtype=np.float32, buffer=shm.buf))
+    return _attached[name][1][slot, :length]
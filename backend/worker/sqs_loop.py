@@ -1,64 +1,401 @@
-"""SQS message receiving and processing loop."""
+"""SQS message receiving, acknowledgement batching and adaptive polling."""
 import json
-from typing import Optional
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 
 from app.core.config import Settings
+from worker.metrics import (
+    SQS_API_CALLS,
+    SQS_MESSAGES_RECEIVED,
+    SQS_POLL_API_CALLS,
+    SQS_POLL_CPU_SECONDS,
+    SQS_RECEIVERS,
+)
 
+logger = logging.getLogger(__name__)
+
+# SQS limit for ReceiveMessage and DeleteMessageBatch
+SQS_MAX_BATCH = 10
+
+# Singleton SQS client; boto3 clients are thread-safe once created
+_sqs_client: Optional[object] = None
+_client_lock = threading.Lock()
 
-def get_sqs_client(settings: Settings):
-    """Get SQS client."""
-    client_kwargs = {
-        "region_name": settings.aws_region,
-        "aws_access_key_id": settings.aws_access_key_id,
-        "aws_secret_access_key": settings.aws_secret_access_key,
-    }
-    if settings.aws_sqs_endpoint_url:
-        client_kwargs["endpoint_url"] = settings.aws_sqs_endpoint_url
 
-    return boto3.client("sqs", **client_kwargs)
+def get_sqs_client(settings: Settings):
+    """Get or create the worker's SQS client."""
+    global _sqs_client
+    with _client_lock:
+        if _sqs_client is None:
+            client_kwargs = {
+                "region_name": settings.aws_region,
+                "aws_access_key_id": settings.aws_access_key_id,
+                "aws_secret_access_key": settings.aws_secret_access_key,
+            }
+            if settings.aws_sqs_endpoint_url:
+                client_kwargs["endpoint_url"] = settings.aws_sqs_endpoint_url
+            _sqs_client = boto3.client("sqs", **client_kwargs)
+        return _sqs_client
 
 
-def receive_messages(settings: Settings) -> list[dict]:
+def receive_messages(settings: Settings, max_messages: int = 10, wait_seconds: int = 20) -> list[dict]:
     """Receive messages from SQS queue."""
     sqs = get_sqs_client(settings)
 
     try:
+        SQS_API_CALLS.labels(operation="ReceiveMessage").inc()
         response = sqs.receive_message(
             QueueUrl=settings.sqs_queue_url,
-            MaxNumberOfMessages=10,
-            WaitTimeSeconds=20,
-            VisibilityTimeout=60,
+            MaxNumberOfMessages=max(1, min(max_messages, SQS_MAX_BATCH)),
+            WaitTimeSeconds=wait_seconds,
+            VisibilityTimeout=settings.worker_sqs_visibility_timeout,
+            AttributeNames=["ApproximateReceiveCount", "SentTimestamp"],
         )
-        return response.get("Messages", [])
-    except ClientError as e:
-        print(f"Error receiving messages from SQS: {str(e)}")
+        messages = response.get("Messages", [])
+        SQS_MESSAGES_RECEIVED.inc(len(messages))
+        return messages
+    except (ClientError, BotoCoreError) as e:
+        logger.error("Error receiving messages from SQS: %s", e)
         return []
 
 
+def queue_depth(settings: Settings) -> dict[str, int]:
+    """Approximate visible, in-flight and delayed message counts of the job queue ({} on error)."""
+    sqs = get_sqs_client(settings)
+    names = {
+        "ApproximateNumberOfMessages": "visible",
+        "ApproximateNumberOfMessagesNotVisible": "in_flight",
+        "ApproximateNumberOfMessagesDelayed": "delayed",
+    }
+
+    try:
+        SQS_API_CALLS.labels(operation="GetQueueAttributes").inc()
+        response = sqs.get_queue_attributes(QueueUrl=settings.sqs_queue_url, AttributeNames=list(names))
+    except ClientError as e:
+        logger.warning("Error reading queue attributes: %s", e)
+        return {}
+    attributes = response.get("Attributes", {})
+    return {state: int(attributes.get(name, 0)) for name, state in names.items()}
+
+
 def delete_message(settings: Settings, receipt_handle: str) -> None:
     """Delete a message from SQS queue."""
     sqs = get_sqs_client(settings)
 
     try:
+        SQS_API_CALLS.labels(operation="DeleteMessage").inc()
         sqs.delete_message(QueueUrl=settings.sqs_queue_url, ReceiptHandle=receipt_handle)
     except ClientError as e:
-        print(f"Error deleting message from SQS: {str(e)}")
+        logger.error("Error deleting message from SQS: %s", e)
+
+
+def delete_messages(settings: Settings, receipt_handles: list[str]) -> bool:
+    """Delete up to 10 messages with one DeleteMessageBatch call.
+
+    Returns False if the call itself failed (e.g. SQS unreachable), so the
+    caller can retry the batch. Messages SQS rejects one by one are logged
+    and not retried: their receipt handles are no longer valid.
+    """
+    sqs = get_sqs_client(settings)
+    entries = [{"Id": str(i), "ReceiptHandle": handle} for i, handle in enumerate(receipt_handles)]
+
+    try:
+        SQS_API_CALLS.labels(operation="DeleteMessageBatch").inc()
+        response = sqs.delete_message_batch(QueueUrl=settings.sqs_queue_url, Entries=entries)
+    except (ClientError, BotoCoreError) as e:
+        logger.error("Error deleting %d message(s) from SQS: %s", len(entries), e)
+        return False
+    for failure in response.get("Failed", []):
+        # The message becomes visible again and is redelivered
+        logger.warning("Error deleting message from SQS: %s %s", failure.get("Code"), failure.get("Message"))
+    return True
+
+
+def change_visibilities(settings: Settings, entries: list[tuple[str, int]]) -> list[str] | None:
+    """Set the visibility timeout of up to 10 messages in one call.
+
+    Returns the receipt handles SQS rejected (typically messages whose
+    visibility already ran out and were received again elsewhere), or None
+    if the call itself failed and no message was changed.
+    """
+    sqs = get_sqs_client(settings)
+    batch = [
+        {"Id": str(i), "ReceiptHandle": handle, "VisibilityTimeout": timeout}
+        for i, (handle, timeout) in enumerate(entries)
+    ]
+
+    try:
+        SQS_API_CALLS.labels(operation="ChangeMessageVisibilityBatch").inc()
+        response = sqs.change_message_visibility_batch(QueueUrl=settings.sqs_queue_url, Entries=batch)
+    except (ClientError, BotoCoreError) as e:
+        logger.error("Error changing visibility of %d message(s): %s", len(batch), e)
+        return None
+    failed = []
+    for failure in response.get("Failed", []):
+        logger.warning("Error changing message visibility: %s %s", failure.get("Code"), failure.get("Message"))
+        failed.append(entries[int(failure["Id"])][0])
+    return failed
+
+
+def send_to_dead_letter_queue(settings: Settings, job: dict, reason: str) -> bool:
+    """Forward a job that ran out of retries to WORKER_SQS_DEAD_LETTER_QUEUE_URL, if set.
+
+    Returns False if the send failed, so the message can be kept and tried again.
+    """
+    if not settings.worker_sqs_dead_letter_queue_url:
+        return True
+    sqs = get_sqs_client(settings)
+    body = {key: job[key] for key in ("s3_key", "home_id", "device_id", "timestamp")}
+
+    try:
+        SQS_API_CALLS.labels(operation="SendMessage").inc()
+        sqs.send_message(
+            QueueUrl=settings.worker_sqs_dead_letter_queue_url,
+            MessageBody=json.dumps(body),
+            MessageAttributes={"failure_reason": {"DataType": "String", "StringValue": reason[:1024]}},
+        )
+    except (ClientError, BotoCoreError) as e:
+        logger.error("Error sending job to dead-letter queue: %s", e)
+        return False
+    return True
+
+
+def retry_delay_seconds(settings: Settings, receive_count: int) -> int:
+    """Exponential backoff from the message's receive count, with +/-20% jitter."""
+    delay = settings.worker_sqs_retry_base_seconds * 2 ** max(0, receive_count - 1)
+    delay = min(delay, settings.worker_sqs_retry_max_seconds)
+    # SQS allows at most 12 hours of visibility
+    return int(min(43200, delay * random.uniform(0.8, 1.2)))
+
+
+class VisibilityHeartbeat:
+    """Keeps received messages invisible while their jobs are still in the worker.
+
+    Every job is tracked from receipt until it is acknowledged or released.
+    A background thread extends the visibility of messages about to become
+    visible again, in batches of 10, so slow jobs are not redelivered and run
+    twice. A job held longer than WORKER_SQS_MAX_IN_FLIGHT_SECONDS is no
+    longer extended, so a stuck job's message eventually comes back. If a
+    call fails as a whole, its messages stay tracked and are extended on the
+    next tick; only messages SQS rejects are dropped.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.timeout = settings.worker_sqs_visibility_timeout
+        # A third of the timeout leaves two chances to extend before it runs out
+        self.interval = max(1.0, self.timeout / 3)
+        # receipt handle -> (received at, visible again at), both monotonic
+        self._tracked: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqs-heartbeat", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def track(self, receipt_handle: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._tracked[receipt_handle] = (now, now + self.timeout)
+
+    def untrack(self, receipt_handle: str) -> None:
+        with self._lock:
+            self._tracked.pop(receipt_handle, None)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._extend_due()
+
+    def _extend_due(self) -> None:
+        """Extend every tracked message that would become visible before the tick after next."""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                handle
+                for handle, (received_at, visible_at) in self._tracked.items()
+                if visible_at - now < 2 * self.interval
+                and now - received_at < self.settings.worker_sqs_max_in_flight_seconds
+            ]
+        for i in range(0, len(due), SQS_MAX_BATCH):
+            handles = due[i : i + SQS_MAX_BATCH]
+            try:
+                failed = change_visibilities(self.settings, [(handle, self.timeout) for handle in handles])
+            except Exception:
+                # Keep the thread alive; without it long jobs are redelivered
+                logger.exception("Error extending visibility of %d message(s)", len(handles))
+                failed = None
+            if failed is None:
+                # Still due, so retried on the next tick
+                continue
+            failed = set(failed)
+            extended_to = time.monotonic() + self.timeout
+            with self._lock:
+                for handle in handles:
+                    if handle not in self._tracked:
+                        continue
+                    if handle in failed:
+                        del self._tracked[handle]
+                    else:
+                        self._tracked[handle] = (self._tracked[handle][0], extended_to)
+
+
+class AckBuffer:
+    """Collects receipt handles and deletes them in batches of 10 on a background thread.
+
+    A batch is sent as soon as 10 handles are waiting, or after
+    WORKER_SQS_ACK_FLUSH_MS otherwise, so a quiet queue is not left holding
+    acknowledgements for long. A batch that fails to send goes back into the
+    buffer and is retried after a pause; what is still unsent at close() is
+    dropped, and those messages are redelivered.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._pending: list[str] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="sqs-ack", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def add(self, receipt_handle: str) -> None:
+        with self._cond:
+            self._pending.append(receipt_handle)
+            if len(self._pending) >= SQS_MAX_BATCH:
+                self._cond.notify()
+
+    def close(self) -> None:
+        """Flush what is left and stop the flusher thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        interval = self.settings.worker_sqs_ack_flush_ms / 1000
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= SQS_MAX_BATCH or self._closed, timeout=interval)
+                handles, self._pending = self._pending, []
+                closed = self._closed
+            unsent = []
+            for i in range(0, len(handles), SQS_MAX_BATCH):
+                batch = handles[i : i + SQS_MAX_BATCH]
+                try:
+                    deleted = delete_messages(self.settings, batch)
+                except Exception:
+                    # Keep the thread alive; without it every later ack is lost
+                    logger.exception("Error flushing %d acknowledgement(s)", len(batch))
+                    deleted = False
+                if not deleted:
+                    unsent.extend(batch)
+            if closed:
+                if unsent:
+                    logger.warning("Dropping %d unsent acknowledgement(s) at shutdown", len(unsent))
+                return
+            if unsent:
+                with self._cond:
+                    self._pending[:0] = unsent
+                    # Pause before retrying instead of spinning while SQS is unreachable
+                    self._cond.wait_for(lambda: self._closed, timeout=max(interval, 1.0))
+
+
+class AdaptiveReceiver:
+    """Polls SQS with one long-polling receive while idle and parallel receives while hot.
+
+    When every receive in a poll comes back full, the queue has more
+    waiting, so the next poll doubles the number of concurrent receives (up
+    to WORKER_SQS_MAX_RECEIVERS and to what the pipeline has room for). As
+    soon as a receive comes back empty, it halves again, and a single
+    receiver uses a 20 s long poll so an idle queue costs one call per 20 s.
+    """
+
+    def __init__(self, settings: Settings, capacity: Callable[[], int]):
+        self.settings = settings
+        self.capacity = capacity
+        self.receivers = 1
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.worker_sqs_max_receivers), thread_name_prefix="sqs-receive"
+        )
+
+    def poll(self) -> list[dict]:
+        room = self.capacity()
+        if room <= 0:
+            # At the in-flight limit; wait for jobs to finish instead of receiving
+            time.sleep(0.1)
+            return []
+        receivers = max(1, min(self.receivers, room // SQS_MAX_BATCH))
+        SQS_RECEIVERS.set(receivers)
+        start_cpu = time.thread_time()
+
+        if receivers == 1:
+            batches = [receive_messages(self.settings, min(room, SQS_MAX_BATCH), wait_seconds=20)]
+            cpu = time.thread_time() - start_cpu
+        else:
+            # Short waits, so one receiver finding the queue empty does not
+            # hold back the messages the others already have
+            wait_seconds = self.settings.worker_sqs_hot_wait_seconds
+            futures = [
+                self._executor.submit(self._timed_receive, wait_seconds) for _ in range(receivers)
+            ]
+            batches = []
+            cpu = time.thread_time() - start_cpu
+            for future in futures:
+                # One failed receiver must not cost the messages the others already took
+                try:
+                    messages, receive_cpu = future.result()
+                except Exception:
+                    logger.exception("Error receiving messages from SQS")
+                    messages, receive_cpu = [], 0.0
+                batches.append(messages)
+                cpu += receive_cpu
+
+        SQS_POLL_CPU_SECONDS.observe(cpu)
+        SQS_POLL_API_CALLS.observe(receivers)
+
+        if all(len(messages) == SQS_MAX_BATCH for messages in batches):
+            self.receivers = min(self.settings.worker_sqs_max_receivers, receivers * 2)
+        elif any(not messages for messages in batches):
+            self.receivers = max(1, receivers // 2)
+        return [message for messages in batches for message in messages]
+
+    def _timed_receive(self, wait_seconds: int) -> tuple[list[dict], float]:
+        start_cpu = time.thread_time()
+        messages = receive_messages(self.settings, SQS_MAX_BATCH, wait_seconds=wait_seconds)
+        return messages, time.thread_time() - start_cpu
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
 
 
 def parse_job(message: dict) -> Optional[dict]:
     """Parse job from SQS message."""
     try:
         body = json.loads(message["Body"])
+        attributes = message.get("Attributes", {})
         return {
             "receipt_handle": message["ReceiptHandle"],
             "s3_key": body["s3_key"],
             "home_id": body["home_id"],
             "device_id": body["device_id"],
             "timestamp": body["timestamp"],
+            "receive_count": int(attributes.get("ApproximateReceiveCount", 1)),
+            # Epoch seconds the message was first sent, for end-to-end latency
+            "sent_at": int(attributes["SentTimestamp"]) / 1000 if "SentTimestamp" in attributes else None,
         }
     except (KeyError, json.JSONDecodeError) as e:
-        print(f"Error parsing job from message: {str(e)}")
+        logger.warning("Error parsing job from message: %s", e)
         return None
@@ -0,0 +1,78 @@
+"""Startup timing, logging setup and the worker's readiness file."""
+import logging
+import os
+import threading
+import time
+
+from app.core.config import Settings
+from worker.metrics import READY, STARTUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(processName)s] %(name)s: %(message)s"
+
+_first_result_lock = threading.Lock()
+_first_result_seen = False
+# Fallback origin when /proc is unavailable
+_IMPORTED_AT = time.monotonic()
+
+
+def configure_logging(level: str) -> None:
+    """Send log records to stderr at the given level name (e.g. "INFO", "DEBUG").
+
+    Called by the worker's main process and by each inference process, which
+    start without the parent's logging setup.
+    """
+    logging.basicConfig(level=level.upper(), format=LOG_FORMAT)
+
+
+def seconds_since_start() -> float:
+    """Seconds since this process started, including interpreter startup and imports.
+
+    The worker is the container's main process, so this is effectively the
+    time since the container started.
+    """
+    try:
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, in clock ticks since boot); the command name may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+def clear_ready(settings: Settings) -> None:
+    """Remove a readiness file left over from a previous run."""
+    READY.set(0)
+    if settings.worker_ready_file:
+        try:
+            os.remove(settings.worker_ready_file)
+        except FileNotFoundError:
+            pass
+
+
+def mark_ready(settings: Settings) -> None:
+    """Create the readiness file and record the time to ready."""
+    elapsed = seconds_since_start()
+    STARTUP_SECONDS.labels(phase="ready").set(elapsed)
+    READY.set(1)
+    if settings.worker_ready_file:
+        with open(settings.worker_ready_file, "w") as f:
+            f.write(f"{elapsed:.3f}\n")
+    logger.info("Ready %.1fs after start", elapsed)
+
+
+def mark_first_result() -> None:
+    """Record the time to the first persisted result. Only the first call counts."""
+    global _first_result_seen
+    if _first_result_seen:
+        return
+    with _first_result_lock:
+        if _first_result_seen:
+            return
+        _first_result_seen = True
+    elapsed = seconds_since_start()
+    STARTUP_SECONDS.labels(phase="first_result").set(elapsed)
+    logger.info("First result %.1fs after start", elapsed)
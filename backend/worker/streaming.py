@@ -0,0 +1,120 @@
+"""Streaming sliding-window inference for long recordings, with early exit on urgent labels."""
+from typing import Any
+
+import numpy as np
+
+from app.core.config import Settings
+from worker.audio import (
+    MODEL_SAMPLE_RATE,
+    PATCH_HOP_SAMPLES,
+    WaveformStream,
+    num_patches,
+    parse_wav_header,
+    window_geometry,
+)
+from worker.inference_pool import InferencePool
+from worker.label_mapping import USER_LABELS, HomeRules
+
+
+class AudioStream:
+    """A long clip whose S3 body is read incrementally instead of downloaded up front."""
+
+    def __init__(self, head: bytes, body):
+        self.head = head
+        self.body = body
+
+    def chunks(self, chunk_bytes: int):
+        yield self.head
+        while True:
+            chunk = self.body.read(chunk_bytes)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        self.body.close()
+
+
+def is_long_clip(head: bytes, settings: Settings) -> bool:
+    """Whether the WAV header in head describes a clip long enough to stream."""
+    try:
+        fmt = parse_wav_header(head)
+    except ValueError:
+        return False
+    return fmt.duration_seconds >= settings.worker_stream_min_seconds
+
+
+def stream_inference(
+    stream: AudioStream,
+    rules: HomeRules,
+    inference_pool: InferencePool,
+    settings: Settings,
+) -> dict[str, Any]:
+    """Score a long clip window by window as its bytes arrive.
+
+    Windows start on YAMNet patch boundaries and overlap by one patch minus
+    one hop, so together they produce exactly the patches of the whole clip
+    and the final running mean equals the non-streaming result. After each
+    window the home's rules are checked on that window's mean; if an enabled
+    high-severity label passes its threshold, the rest of the clip is not
+    read and the result is reported from that window.
+    """
+    hops_per_window, step, window_samples = window_geometry(settings.worker_stream_window_seconds)
+
+    decoder = WaveformStream()
+    buffer = np.empty(0, dtype=np.float32)
+    first_patch = 0  # global patch index of buffer[0]
+    total_samples = 0
+    score_sum = np.zeros(rules.mapping.mask.shape[1], dtype=np.float64)
+    score_max = np.zeros_like(score_sum)
+    patches = 0
+    windows = 0
+
+    def score(window: np.ndarray, window_patches: int) -> np.ndarray:
+        nonlocal patches, windows, score_max
+        mean, peak = inference_pool.score_window(window, window_patches)
+        score_sum[:] += mean * window_patches
+        score_max = np.maximum(score_max, peak)
+        patches += window_patches
+        windows += 1
+        return mean
+
+    def result(mean_scores: np.ndarray, early_exit: bool, trigger_patch: int | None = None) -> dict[str, Any]:
+        decision, _ = rules.evaluate(mean_scores)
+        decision["yamnet_scores"] = mean_scores.astype(np.float32)
+        decision["stream"] = {
+            "windows": windows,
+            "seconds_scored": round(patches * PATCH_HOP_SAMPLES / MODEL_SAMPLE_RATE, 2),
+            "early_exit": early_exit,
+            "trigger_seconds": (
+                round(trigger_patch * PATCH_HOP_SAMPLES / MODEL_SAMPLE_RATE, 2) if trigger_patch is not None else None
+            ),
+            # Per-label max over every patch scored so far
+            "label_max": dict(zip(USER_LABELS, rules.mapping.label_scores(score_max).tolist())),
+        }
+        return decision
+
+    try:
+        for chunk in stream.chunks(settings.worker_stream_chunk_bytes):
+            samples = decoder.feed(chunk)
+            total_samples += len(samples)
+            buffer = np.concatenate([buffer, samples])
+            while len(buffer) >= window_samples:
+                mean = score(buffer[:window_samples], hops_per_window)
+                if rules.urgent_label(mean):
+                    return result(mean, early_exit=True, trigger_patch=first_patch)
+                buffer = buffer[step:]
+                first_patch += hops_per_window
+
+        tail = decoder.finish()
+        total_samples += len(tail)
+        buffer = np.concatenate([buffer, tail])
+        remaining = num_patches(total_samples) - first_patch
+        if remaining > 0:
+            mean = score(buffer, remaining)
+            if rules.urgent_label(mean):
+                return result(mean, early_exit=True, trigger_patch=first_patch)
+    finally:
+        stream.close()
+
+    return result(score_sum / max(1, patches), early_exit=False)
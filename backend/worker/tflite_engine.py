@@ -0,0 +1,119 @@
+"""Reduced-precision YAMNet on the TFLite interpreter, converted from the bundled SavedModel."""
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import tensorflow as tf
+
+from worker.audio import MIN_PATCH_SAMPLES, PATCH_HOP_SAMPLES, num_patches
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ("dynamic", "int8")
+
+SAVED_MODEL_PATH = Path(__file__).parent / "yamnet_savedmodel"
+
+
+def default_model_path(quantization: str) -> Path:
+    return Path(__file__).parent / f"yamnet_{quantization}.tflite"
+
+
+def convert_yamnet(
+    quantization: str,
+    saved_model_path: Path = SAVED_MODEL_PATH,
+    representative_waveforms: Iterable[np.ndarray] | None = None,
+) -> bytes:
+    """Convert the SavedModel to a TFLite flatbuffer that scores one patch per call.
+
+    The input is fixed at one patch (MIN_PATCH_SAMPLES) so the converter can
+    plan every tensor statically. "dynamic" quantizes weights to int8 and
+    keeps float activations. "int8" also quantizes activations, calibrated
+    on patches from representative_waveforms; ops without an int8 kernel
+    (the STFT front-end) stay float.
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+
+    model = tf.saved_model.load(str(saved_model_path))
+
+    @tf.function(input_signature=[tf.TensorSpec([MIN_PATCH_SAMPLES], tf.float32)])
+    def scores(waveform):
+        return model(waveform)[0]
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([scores.get_concrete_function()], model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        if representative_waveforms is None:
+            raise ValueError("int8 quantization needs representative waveforms for calibration")
+        waveforms = list(representative_waveforms)
+
+        def representative_dataset():
+            for waveform in waveforms:
+                for patch in _patches(waveform):
+                    yield [patch]
+
+        converter.representative_dataset = representative_dataset
+    return converter.convert()
+
+
+def _patches(waveform: np.ndarray) -> np.ndarray:
+    """The (patches, MIN_PATCH_SAMPLES) windows YAMNet scores, zero-padded like its own framing."""
+    count = num_patches(len(waveform))
+    padded = np.zeros(MIN_PATCH_SAMPLES + (count - 1) * PATCH_HOP_SAMPLES, dtype=np.float32)
+    padded[: len(waveform)] = waveform
+    return np.lib.stride_tricks.sliding_window_view(padded, MIN_PATCH_SAMPLES)[::PATCH_HOP_SAMPLES]
+
+
+class TFLiteYamnet:
+    """YAMNet frame scores from a TFLite model, matching the SavedModel's (patches, classes) output.
+
+    Each patch covers exactly the samples the full model would use for it,
+    so the two engines see the same framing and their scores can be compared
+    patch for patch.
+    """
+
+    def __init__(self, model_path: Path, num_threads: int = 0):
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(model_path=str(model_path), num_threads=num_threads or None)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]["index"]
+        output = self.interpreter.get_output_details()[0]
+        self._output = output["index"]
+        self._classes = int(np.prod(output["shape"]))
+
+    @classmethod
+    def load(cls, quantization: str, model_path: str | None = None, num_threads: int = 0) -> "TFLiteYamnet":
+        """Open the converted model, converting and saving it first if it is missing.
+
+        Only "dynamic" can be converted on the fly; an "int8" model needs
+        calibration clips and is built with scripts/convert_yamnet_tflite.py.
+        """
+        path = Path(model_path) if model_path else default_model_path(quantization)
+        if not path.exists():
+            if quantization != "dynamic":
+                raise FileNotFoundError(f"{path} not found; build it with scripts/convert_yamnet_tflite.py")
+            logger.info("Converting SavedModel to %s...", path)
+            flatbuffer = convert_yamnet(quantization)
+            try:
+                # Several inference processes may convert at once; only publish complete files
+                partial = path.with_suffix(f".{os.getpid()}.partial")
+                partial.write_bytes(flatbuffer)
+                os.replace(partial, path)
+            except OSError as e:
+                # Read-only image: keep a copy for this process instead
+                logger.warning("Could not save %s: %s", path, e)
+                path = Path(tempfile.gettempdir()) / f"yamnet_{quantization}.{os.getpid()}.tflite"
+                path.write_bytes(flatbuffer)
+        return cls(path, num_threads)
+
+    def __call__(self, waveform: np.ndarray) -> np.ndarray:
+        patches = _patches(np.asarray(waveform, dtype=np.float32))
+        scores = np.empty((len(patches), self._classes), dtype=np.float32)
+        for i, patch in enumerate(patches):
+            self.interpreter.set_tensor(self._input, np.ascontiguousarray(patch))
+            self.interpreter.invoke()
+            scores[i] = self.interpreter.get_tensor(self._output).reshape(-1)
+        return scores
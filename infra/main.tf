@@ -116,6 +116,7 @@ module "ec2_app" {
   # AWS services
   s3_bucket_name     = module.s3.bucket_name
   sqs_queue_url      = module.sqs.queue_url
+  sqs_dlq_url        = module.sqs.dlq_url
   aws_region         = var.aws_region
 
   tags = var.tags
@@ -76,6 +76,11 @@ variable "sqs_queue_url" {
   type        = string
 }
 
+variable "sqs_dlq_url" {
+  description = "SQS dead letter queue URL"
+  type        = string
+}
+
 variable "aws_region" {
   description = "AWS region"
   type        = string
@@ -200,6 +205,7 @@ resource "aws_launch_template" "worker" {
     database_url = var.database_url
     mongo_uri   = var.mongo_uri
     sqs_queue   = var.sqs_queue_url
+    sqs_dlq     = var.sqs_dlq_url
     aws_region  = var.aws_region
   }))
 
@@ -16,8 +16,10 @@ docker pull ${ecr_repo}:latest
 docker run -d \
   --name smart-home-worker \
   --restart always \
+  --shm-size=512m \
   -e DATABASE_URL="${database_url}" \
   -e MONGO_URI="${mongo_uri}" \
   -e SQS_QUEUE_URL="${sqs_queue}" \
+  -e WORKER_SQS_DEAD_LETTER_QUEUE_URL="${sqs_dlq}" \
   -e AWS_REGION="${aws_region}" \
   ${ecr_repo}:latest
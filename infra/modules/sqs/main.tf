@@ -20,17 +20,18 @@ variable "tags" {
 resource "aws_sqs_queue" "main" {
   name = "${var.queue_name}-${var.environment}"
 
-  # TODO: Configure visibility timeout based on job processing time
+  # The worker extends visibility while a job is running (heartbeat)
   visibility_timeout_seconds = 60
 
   # TODO: Configure message retention period
   message_retention_seconds = 345600 # 4 days
 
-  # TODO: Configure dead letter queue
-  # redrive_policy = jsonencode({
-  #   deadLetterTargetArn = aws_sqs_queue.dlq.arn
-  #   maxReceiveCount     = 3
-  # })
+  # The worker dead-letters a job itself after WORKER_SQS_MAX_RECEIVES (5) and
+  # records why; this redrive only catches messages it never got to handle
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.dlq.arn
+    maxReceiveCount     = 10
+  })
 
   # TODO: Enable encryption
   # kms_master_key_id = aws_kms_key.sqs.id
@@ -43,11 +44,18 @@ resource "aws_sqs_queue" "main" {
   )
 }
 
-# TODO: Create dead letter queue
-# resource "aws_sqs_queue" "dlq" {
-#   name = "${var.queue_name}-dlq-${var.environment}"
-#   message_retention_seconds = 1209600 # 14 days
-# }
+# Dead letter queue
+resource "aws_sqs_queue" "dlq" {
+  name                      = "${var.queue_name}-dlq-${var.environment}"
+  message_retention_seconds = 1209600 # 14 days
+
+  tags = merge(
+    var.tags,
+    {
+      Name = "${var.environment}-${var.queue_name}-dlq"
+    }
+  )
+}
 
 # TODO: Configure queue policy for IAM access
 # resource "aws_sqs_queue_policy" "main" { ... }
@@ -63,6 +71,11 @@ output "queue_arn" {
   value       = aws_sqs_queue.main.arn
 }
 
+output "dlq_url" {
+  description = "Dead letter queue URL"
+  value       = aws_sqs_queue.dlq.url
+}
+
 output "queue_name" {
   description = "SQS queue name"
   value       = aws_sqs_queue.main.name